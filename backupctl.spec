@@ -28,7 +28,8 @@ a = Analysis(
     pathex=['.'],
     binaries=[],
     datas=datas,
-    hiddenimports=collect_submodules("backupctl"),
+    # zstandard is optional for pip installs, the bundle always writes tar.zst archives
+    hiddenimports=collect_submodules("backupctl") + ["zstandard"],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
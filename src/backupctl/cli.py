@@ -1,16 +1,13 @@
 import argparse
+import importlib
 import sys
-import requests
-import backupctl.register.cmd as register
-import backupctl.status.cmd as status
-import backupctl.validate.cmd as validate
-import backupctl.remove.cmd as remove
-import backupctl.enable_disable.cmd as enable_disable
-import backupctl.run.cmd as run
-import backupctl.list.cmd as list_
-import backupctl.inspect.cmd as inspect_
-
-from backupctl.utils.version import format_version
+
+from typing import Callable
+
+from backupctl.utils.version import format_version, refresh_release_cache, version_notice
+
+# Commands run by cron or as daemons, which never check the version
+UNATTENDED_COMMANDS = { "run", "watch", "scheduler", "serve" }
 
 def add_bool_argument(
     parser: argparse.ArgumentParser, *arg_name: str, help: str="", 
@@ -19,9 +16,16 @@ def add_bool_argument(
     parser.add_argument(*arg_name, action=action, 
         help=help, default=default)
 
+def command( module: str, name: str = "run" ) -> Callable[[argparse.Namespace], int]:
+    """ Returns the handler of a subcommand, importing its module only when
+    the subcommand is chosen, as most of them pull in heavy dependencies """
+    def handler( args: argparse.Namespace ) -> int:
+        return getattr( importlib.import_module( module ), name )( args )
+    return handler
+
 def main():
     if "--version" in sys.argv:
-        format_version()
+        format_version( refresh_release_cache() )
         return 0
 
     parser = argparse.ArgumentParser(
@@ -29,50 +33,88 @@ def main():
         description="Backup control and consistency tool",
     )
 
-    sub = parser.add_subparsers(required=True)
+    sub = parser.add_subparsers(dest="command", required=True)
     
     # Create the: backupctl register COMMAND
     p_plan = sub.add_parser("register", help="Create and register a new backup plan")
-    p_plan.set_defaults(func=register.run)
+    p_plan.set_defaults(func=command("backupctl.register.cmd"))
     p_plan.add_argument("config", help="Backup Plan configuration file")
     add_bool_argument(p_plan, "-v", "--verbose", help="Enable/Disable Verbosity")
+    p_plan.add_argument("--backend", choices=["cron", "scheduler"], default="cron",
+        help="Run the job from the crontab or from the scheduler daemon (default: cron)")
 
     # Create the: backupctl validate COMMAND
     p_validate = sub.add_parser("validate", help="Validate a user configuration")
-    p_validate.set_defaults(func=validate.run)
+    p_validate.set_defaults(func=command("backupctl.validate.cmd"))
     p_validate.add_argument("config", help="The configuration file to validate", type=str)
 
     # Create the: backupctl status COMMAND
     p_check = sub.add_parser("status", help="High-level health check")
-    p_check.set_defaults(func=status.run)
+    p_check.set_defaults(func=command("backupctl.status.cmd"))
     add_bool_argument(p_check, "--apply-fix", help="Automatically solve errors")
 
     # Create the: backupctl remove COMMAND
     p_remove = sub.add_parser("remove", help="Remove all or a list of specified jobs")
-    p_remove.set_defaults(func=remove.run)
+    p_remove.set_defaults(func=command("backupctl.remove.cmd"))
     p_remove.add_argument("--target", nargs="+", help="List of target jobs to remove")
 
     # Create the: backupctl enable COMMAND
     p_enable = sub.add_parser("enable", help="Enable all or a list of specified jobs")
-    p_enable.set_defaults(func=enable_disable.run_enable)
+    p_enable.set_defaults(func=command("backupctl.enable_disable.cmd", "run_enable"))
     p_enable.add_argument("--target", nargs="+", help="List of target jobs to enable")
 
     # Create the: backupctl disable COMMAND
     p_disable = sub.add_parser("disable", help="Disable all or a list of specified jobs")
-    p_disable.set_defaults(func=enable_disable.run_disable)
+    p_disable.set_defaults(func=command("backupctl.enable_disable.cmd", "run_disable"))
     p_disable.add_argument("--target", nargs="+", help="List of target jobs to disable")
 
     # Create the: backupctl run COMMAND
     p_run = sub.add_parser("run", help="Run a specified job")
-    p_run.set_defaults(func=run.run)
+    p_run.set_defaults(func=command("backupctl.run.cmd"))
     p_run.add_argument("target", help="The job to run", type=str)
     add_bool_argument(p_run, "--notify", help="Enable notifications")
     add_bool_argument(p_run, "--log", help="Enable file logging")
     add_bool_argument(p_run,"--dry-run", help="Run rsync command in dry-run mode")
+    p_run.add_argument("--workers", type=int, default=None,
+        help="Number of concurrent rsync processes (overrides the plan)")
+
+    # Create the: backupctl watch COMMAND
+    p_watch = sub.add_parser("watch", help="Keep a job synchronised as its sources change")
+    p_watch.set_defaults(func=command("backupctl.watch.cmd"))
+    p_watch.add_argument("target", help="The job to keep synchronised", type=str)
+    add_bool_argument(p_watch, "--notify", help="Enable notifications")
+    add_bool_argument(p_watch, "--log", help="Enable file logging")
+    p_watch.add_argument("--debounce", type=float, default=5.0,
+        help="Seconds without changes before a sync starts (default: 5)")
+    p_watch.add_argument("--max-delay", type=float, default=60.0,
+        help="Maximum seconds a change waits to be synced (default: 60)")
+
+    # Create the: backupctl scheduler COMMAND
+    p_scheduler = sub.add_parser("scheduler", help="Run the jobs of the scheduler backend")
+    p_scheduler.set_defaults(func=command("backupctl.scheduler.cmd"))
+    p_scheduler.add_argument("--max-jobs", type=int, default=4,
+        help="Maximum number of jobs running at once (default: 4)")
+    p_scheduler.add_argument("--max-per-host", type=int, default=1,
+        help="Maximum number of jobs running towards the same remote (default: 1)")
+    p_scheduler.add_argument("--catch-up", choices=["skip", "once", "all"], default="once",
+        help="How firings missed while down are run (default: once)")
+
+    # Create the: backupctl serve COMMAND
+    p_serve = sub.add_parser("serve",
+        help="Serve the registry, crontab and run state to list, status and inspect")
+    p_serve.set_defaults(func=command("backupctl.serve.cmd"))
+
+    # Create the: backupctl verify COMMAND
+    p_verify = sub.add_parser("verify", help="Verify the remote copy of a job with checksums")
+    p_verify.set_defaults(func=command("backupctl.verify.cmd"))
+    p_verify.add_argument("target", help="The job to verify", type=str)
+    add_bool_argument(p_verify, "--full", help="Verify all the files instead of a sample")
+    add_bool_argument(p_verify, "--notify", help="Enable notifications")
+    add_bool_argument(p_verify, "--log", help="Enable file logging")
 
     # Create the: backupctl list
     p_list = sub.add_parser("list", help="List jobs in the registry or cronlist")
-    p_list.set_defaults(func=list_.run)
+    p_list.set_defaults(func=command("backupctl.list.cmd"))
     g = p_list.add_mutually_exclusive_group()
     add_bool_argument(p_list, "--registry", help="list jobs from registry") 
     add_bool_argument(p_list, "--cron", help="list jobs from crontab")
@@ -81,14 +123,36 @@ def main():
 
     # Create the: backupctl inspect
     p_inspect = sub.add_parser("inspect", help="Inspect a registered target")
-    p_inspect.set_defaults(func=inspect_.run)
+    p_inspect.set_defaults(func=command("backupctl.inspect.cmd"))
     p_inspect.add_argument(
         "--target",
         nargs="+",
         help="List of target jobs to inspect (default: all)",
     )
 
-    format_version()
+    # Create the: backupctl stats
+    p_stats = sub.add_parser("stats", help="Show run statistics from the run journal")
+    p_stats.set_defaults(func=command("backupctl.stats.cmd"))
+    p_stats.add_argument(
+        "--target",
+        nargs="+",
+        help="List of targets to report (default: all)",
+    )
+    p_stats.add_argument("--days", type=int, default=30,
+        help="Only consider runs of the last N days (default: 30)")
+
+    # Create the: backupctl top
+    p_top = sub.add_parser("top", help="Show the progress of running jobs")
+    p_top.set_defaults(func=command("backupctl.top.cmd"))
+    p_top.add_argument("-i", "--interval", type=float, default=None,
+        help="Refresh every N seconds until interrupted (default: show once)")
+
+    # Create the: backupctl retention
+    p_retention = sub.add_parser("retention", help="Apply the log retention policy of a job")
+    p_retention.set_defaults(func=command("backupctl.retention.cmd"))
+    p_retention.add_argument("target", help="The job whose logs are archived", type=str)
+
     args = parser.parse_args()
+    if args.command not in UNATTENDED_COMMANDS: version_notice()
     args.func(args)
     return 0
@@ -11,8 +11,16 @@ DEFAULT_PLAN_CONF_FOLDER = DEFAULT_BACKUP_FOLDER / "plans"
 DEFAULT_PLAN_SUFFIX      = "-plan.json"
 BACKUPCTL_RUN_COMMAND    = "/usr/local/bin/backupctl"
 REGISTERED_JOBS_FILE     = DEFAULT_BACKUP_FOLDER / "REGISTRY"
+RUN_JOURNAL_FILE         = DEFAULT_BACKUP_FOLDER / "journal.db"
+RUN_STATUS_FOLDER        = DEFAULT_BACKUP_FOLDER / "run"
+RUN_LOCK_FOLDER          = DEFAULT_BACKUP_FOLDER / "locks"
+MANIFEST_FOLDER          = DEFAULT_BACKUP_FOLDER / "manifest"
+SCHEDULER_STATE_FILE     = DEFAULT_BACKUP_FOLDER / "scheduler.json"
+CONTROL_SOCKET_FILE      = DEFAULT_BACKUP_FOLDER / "control.sock"
+VERSION_CACHE_FILE       = DEFAULT_BACKUP_FOLDER / "version.json"
 CRONTAB_TAG_PREFIX       = "#backupctl:"
 RELEASE_API_URL          = "https://pypi.org/simple/backupctl/"
+DEFAULT_NOTIFICATION_DEADLINE = 120.0 # Seconds before giving up on notifications
 
 SMTP_PROVIDERS = {
     "gmail.com":  ("smtp.gmail.com", 587, False),
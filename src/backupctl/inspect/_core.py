@@ -2,15 +2,18 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import List, Optional
 
 from backupctl.constants import (
     DEFAULT_PLAN_CONF_FOLDER,
     DEFAULT_PLAN_SUFFIX,
     REGISTERED_JOBS_FILE,
 )
+from backupctl.models.journal import latest_run
 from backupctl.models.plan_config import PlanCfg, load_plan_configuration
+from backupctl.models.retention import RetentionIndex
 from backupctl.models.registry import Job, JobStatusType, Registry, read_registry
+from backupctl.utils.control import control_query
 from backupctl.utils.exceptions import InputValidationError, ensure
 from backupctl.utils.schedule import human_schedule_from_cron
 
@@ -35,10 +38,10 @@ def _human_schedule(cmd: str) -> str:
 def _find_latest_log(log_dir: Path) -> Optional[Path]:
     if not log_dir.exists() or not log_dir.is_dir():
         return None
-    candidates = [p for p in log_dir.iterdir() if p.is_file()]
-    if not candidates:
+    logs = RetentionIndex.load(log_dir).logs
+    if not logs:
         return None
-    return max(candidates, key=lambda p: p.stat().st_mtime)
+    return log_dir / logs[-1].name
 
 
 def _parse_log_meta(log_path: Path) -> tuple[str, str]:
@@ -50,7 +53,8 @@ def _parse_log_meta(log_path: Path) -> tuple[str, str]:
         with log_path.open("r", encoding="utf-8") as io:
             for line in io:
                 line = line.strip()
-                if line.startswith("Started :"):
+                # Parallel runs also log a start time for each worker
+                if line.startswith("Started :") and last_run == "unknown":
                     last_run = line.split(":", 1)[1].strip()
                 elif line.startswith("Exit code:"):
                     exit_code = line.split(":", 1)[1].strip()
@@ -69,7 +73,7 @@ def _parse_log_meta(log_path: Path) -> tuple[str, str]:
     return last_run, exit_code, last_error
 
 
-def _load_plan(target_name: str) -> PlanCfg:
+def load_target_plan(target_name: str) -> PlanCfg:
     plan_path = DEFAULT_PLAN_CONF_FOLDER / f"{target_name}{DEFAULT_PLAN_SUFFIX}"
     if not plan_path.exists():
         raise InputValidationError(f"Plan file not found for target '{target_name}'")
@@ -79,8 +83,7 @@ def _load_plan(target_name: str) -> PlanCfg:
         raise InputValidationError(str(exc)) from exc
 
 
-def _inspect_target(job: Job) -> InspectInfo:
-    plan = _load_plan(job.name)
+def _inspect_target(job: Job, plan: PlanCfg) -> InspectInfo:
     log_path = Path(plan.log.path)
     schedule = _human_schedule(job.cmd)
     command = " ".join(plan.command) if isinstance(plan.command, list) else str(plan.command)
@@ -88,8 +91,16 @@ def _inspect_target(job: Job) -> InspectInfo:
     exit_code = "unknown"
     exit_code_source = "unknown"
 
-    latest_log = _find_latest_log(log_path)
-    if latest_log:
+    # The run journal is the fast path, logs are parsed only for
+    # targets that have not been run since the journal was introduced
+    record = latest_run(job.name)
+    latest_log = None if record is not None else _find_latest_log(log_path)
+    if record is not None:
+        last_run = record.started.isoformat()
+        exit_code = str(record.exit_code)
+        exit_code_source = record.log_file or "journal"
+        last_error = record.error or "none"
+    elif latest_log:
         last_run, exit_code, last_error = _parse_log_meta(latest_log)
         exit_code_source = str(latest_log)
     else:
@@ -134,21 +145,29 @@ def _format_block(info: InspectInfo) -> str:
 def _get_registry() -> Registry:
     if not REGISTERED_JOBS_FILE.exists():
         raise InputValidationError("Registry file not found")
-    registry = read_registry()
+    return read_registry()
+
+
+def select_jobs(registry: Registry, targets: Optional[List[str]]) -> List[Job]:
+    """Returns the jobs of the input targets, all of them by default."""
     if not registry:
         raise InputValidationError("Registry is empty")
-    return registry
+    if not targets:
+        return list(registry.values())
+    missing = [t for t in targets if t not in registry]
+    ensure(not missing, f"Targets not found: {', '.join(missing)}", InputValidationError)
+    return [registry[t] for t in targets]
+
+
+def inspect_block(job: Job, plan: PlanCfg) -> str:
+    return _format_block(_inspect_target(job, plan))
 
 
 def inspect_targets(targets: Optional[List[str]]) -> List[str]:
-    registry = _get_registry()
-    selected: Iterable[Job]
-    if targets:
-        missing = [t for t in targets if t not in registry]
-        ensure(not missing, f"Targets not found: {', '.join(missing)}", InputValidationError)
-        selected = [registry[t] for t in targets]
-    else:
-        selected = registry.values()
+    # The control server, when running, answers from its cached state
+    reply = control_query({"query": "inspect", "targets": targets})
+    if reply is not None:
+        return reply["result"]
 
-    blocks = [_format_block(_inspect_target(job)) for job in selected]
-    return blocks
+    selected = select_jobs(_get_registry(), targets)
+    return [inspect_block(job, load_target_plan(job.name)) for job in selected]
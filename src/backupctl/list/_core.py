@@ -1,5 +1,4 @@
-from backupctl.models.registry import read_registry
-from backupctl.utils.cron import read_cronlist_jobs
+from backupctl.utils.control import served_cronlist, served_registry
 from tabulate import tabulate
 from typing import List
 from backupctl.utils.console import cinfo, cwarn
@@ -27,7 +26,7 @@ def _print_task_list( l: List[List[str]], *, title: str|None=None ) -> None:
 
 def print_registry( enabled: bool, disabled: bool ) -> None:
     """ Print the tasks from the registry """
-    registry = read_registry()
+    registry = served_registry()
     if not registry:
         cwarn("[*] The registry is empty")
         return
@@ -47,7 +46,7 @@ def print_registry( enabled: bool, disabled: bool ) -> None:
 
 def print_cron( enabled: bool, disabled: bool ):
     """ Print the task from the cronlist """
-    cronlist = read_cronlist_jobs()
+    cronlist = served_cronlist()
     if not cronlist:
         cwarn("[*] The crontab is empty")
         return
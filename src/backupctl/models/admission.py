@@ -0,0 +1,10 @@
+from backupctl.models.rsync import CaseInsensitiveEnum
+
+class OverlapPolicy(CaseInsensitiveEnum):
+    skip  = "skip"  # Do not run while another run of the target is active
+    queue = "queue" # Run once the active run ends, keeping at most one pending run
+    wait  = "wait"  # Every run waits for its turn in FIFO order
+
+def host_key( host: str, port: int ) -> str:
+    """ Returns the identifier of the sessions towards a remote """
+    return f"{host}:{port}"
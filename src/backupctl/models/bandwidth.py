@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import List, Optional
+
+@dataclass
+class BandwidthWindow:
+    start : time          # When the window opens (local time)
+    end   : time          # When the window closes, before start if crossing midnight
+    limit : Optional[int] # Bandwidth limit in bytes per second, None for unlimited
+
+    def contains( self, moment: time ) -> bool:
+        if self.start <= self.end:
+            return self.start <= moment < self.end
+        return moment >= self.start or moment < self.end
+
+@dataclass
+class BandwidthSchedule:
+    """ Bandwidth limits by time of day. The first window containing the
+    current time sets the limit, the default limit applies outside them. """
+    windows : List[BandwidthWindow]
+    default : Optional[int] = None # Limit outside the windows, None for unlimited
+
+    def limit_at( self, moment: datetime ) -> Optional[int]:
+        for window in self.windows:
+            if window.contains( moment.time() ): return window.limit
+        return self.default
+
+    def next_change( self, moment: datetime ) -> Optional[datetime]:
+        """ Returns the first window boundary after the input moment where
+        the limit changes, or None if the limit never changes. """
+        current = self.limit_at( moment )
+        boundaries = sorted(
+            datetime.combine( moment.date() + timedelta(days=days), boundary )
+            for days in range( 2 )
+            for window in self.windows
+            for boundary in ( window.start, window.end )
+        )
+
+        for boundary in boundaries:
+            if boundary <= moment: continue
+            if self.limit_at( boundary ) != current: return boundary
+        return None
+
+    def shared( self, n: int ) -> 'BandwidthSchedule':
+        """ Returns the schedule of each one of `n` concurrent transfers """
+        share = lambda limit: None if limit is None else max( 1, limit // n )
+        windows = [ BandwidthWindow( w.start, w.end, share(w.limit) ) for w in self.windows ]
+        return BandwidthSchedule( windows, share(self.default) )
+
+def bwlimit_option( limit: Optional[int] ) -> str:
+    """ Returns the rsync --bwlimit option, in KiB per second, for the input
+    limit in bytes per second ( None, as 0 for rsync, means unlimited ). """
+    if limit is None: return "--bwlimit=0"
+    return f"--bwlimit={max( 1, limit // 1024 )}"
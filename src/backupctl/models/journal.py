@@ -0,0 +1,224 @@
+import json
+import sqlite3
+
+from contextlib import closing
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from backupctl.constants import RUN_JOURNAL_FILE
+from backupctl.models.rsync import RSyncStatus, RSyncStats
+from backupctl.models.verify import VerifyResult
+from backupctl.utils.scan import ScanEntry
+
+JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    target            TEXT    NOT NULL,
+    started           TEXT    NOT NULL,
+    finished          TEXT    NOT NULL,
+    duration_s        REAL    NOT NULL,
+    exit_code         INTEGER NOT NULL,
+    status            TEXT    NOT NULL,
+    dry_run           INTEGER NOT NULL DEFAULT 0,
+    bytes_transferred INTEGER,
+    files_transferred INTEGER,
+    error             TEXT,
+    log_file          TEXT,
+    notifications     TEXT    NOT NULL DEFAULT '{}',
+    stats             TEXT,
+    snapshot          TEXT,
+    transfer          TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_target_started ON runs (target, started);
+CREATE TABLE IF NOT EXISTS verifications (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    target            TEXT    NOT NULL,
+    started           TEXT    NOT NULL,
+    finished          TEXT    NOT NULL,
+    full              INTEGER NOT NULL,
+    checked           INTEGER NOT NULL,
+    mismatched        INTEGER NOT NULL,
+    error             TEXT
+);
+CREATE TABLE IF NOT EXISTS verified (
+    target            TEXT    NOT NULL,
+    path              TEXT    NOT NULL,
+    size              INTEGER NOT NULL,
+    mtime_ns          INTEGER NOT NULL,
+    inode             INTEGER NOT NULL,
+    PRIMARY KEY (target, path)
+);
+"""
+
+JOURNAL_COLUMNS = (
+    "target", "started", "finished", "duration_s", "exit_code", "status", "dry_run",
+    "bytes_transferred", "files_transferred", "error", "log_file", "notifications", "stats",
+    "snapshot", "transfer"
+)
+
+# Columns added after the first version of the journal
+JOURNAL_MIGRATIONS = {
+    "stats": "ALTER TABLE runs ADD COLUMN stats TEXT",
+    "snapshot": "ALTER TABLE runs ADD COLUMN snapshot TEXT",
+    "transfer": "ALTER TABLE runs ADD COLUMN transfer TEXT",
+}
+
+@dataclass
+class RunRecord:
+    target            : str           # The name of the target
+    started           : datetime      # When the run has been started
+    finished          : datetime      # When the run has finished
+    exit_code         : int           # The rsync exit code
+    status            : RSyncStatus   # The rsync status
+    dry_run           : bool = False  # If the run was a dry-run
+    bytes_transferred : Optional[int] = None # Bytes sent to the remote
+    files_transferred : Optional[int] = None # Number of files sent to the remote
+    error             : Optional[str] = None # The last error printed by rsync
+    log_file          : Optional[str] = None # The log file of the run
+    notifications     : Dict[str, Optional[str]] = \
+        field(default_factory=dict) # Notification system -> error (None if delivered)
+    stats             : Optional[RSyncStats] = None # The rsync transfer metrics
+    snapshot          : Optional[str] = None # The snapshot written by the run
+    transfer          : Optional[str] = None # Full, incremental or no-op, with a manifest
+
+    def __post_init__( self ) -> None:
+        if self.stats is None: return
+        if self.bytes_transferred is None:
+            self.bytes_transferred = self.stats.total_transferred_size
+        if self.files_transferred is None:
+            self.files_transferred = self.stats.num_files_transferred
+
+    @property
+    def duration_s( self ) -> float:
+        return ( self.finished - self.started ).total_seconds()
+
+    def ok( self ) -> bool:
+        return self.exit_code == 0
+
+    def throughput( self ) -> Optional[float]:
+        """ Returns the throughput in bytes per second if known """
+        if self.bytes_transferred is None or self.duration_s <= 0: return None
+        return self.bytes_transferred / self.duration_s
+
+    def to_row( self ) -> tuple:
+        return (
+            self.target, self.started.isoformat(), self.finished.isoformat(),
+            self.duration_s, self.exit_code, self.status.value, int(self.dry_run),
+            self.bytes_transferred, self.files_transferred, self.error,
+            self.log_file, json.dumps(self.notifications),
+            None if self.stats is None else json.dumps(asdict(self.stats)),
+            self.snapshot, self.transfer
+        )
+
+    @staticmethod
+    def from_row( row: sqlite3.Row ) -> 'RunRecord':
+        return RunRecord(
+            target=row["target"], started=datetime.fromisoformat(row["started"]),
+            finished=datetime.fromisoformat(row["finished"]), exit_code=row["exit_code"],
+            status=RSyncStatus(row["status"]), dry_run=bool(row["dry_run"]),
+            bytes_transferred=row["bytes_transferred"],
+            files_transferred=row["files_transferred"], error=row["error"],
+            log_file=row["log_file"], notifications=json.loads(row["notifications"]),
+            stats=None if row["stats"] is None else RSyncStats(**json.loads(row["stats"])),
+            snapshot=row["snapshot"], transfer=row["transfer"]
+        )
+
+def open_journal( path: Path = RUN_JOURNAL_FILE ) -> sqlite3.Connection:
+    """ Open the run journal, creating it if it does not exists """
+    path = path.expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect( path, timeout=30 )
+    conn.row_factory = sqlite3.Row
+    conn.executescript( JOURNAL_SCHEMA )
+
+    columns = { row["name"] for row in conn.execute( "PRAGMA table_info(runs)" ) }
+    for column, statement in JOURNAL_MIGRATIONS.items():
+        if column not in columns: conn.execute( statement )
+
+    return conn
+
+def append_run( record: RunRecord, path: Path = RUN_JOURNAL_FILE ) -> None:
+    """ Append a run record into the journal """
+    placeholders = ", ".join( "?" for _ in JOURNAL_COLUMNS )
+    query = f"INSERT INTO runs ({', '.join(JOURNAL_COLUMNS)}) VALUES ({placeholders})"
+    with closing( open_journal(path) ) as conn, conn:
+        conn.execute( query, record.to_row() )
+
+def latest_run( target: str, path: Path = RUN_JOURNAL_FILE ) -> Optional[RunRecord]:
+    """ Returns the most recent run of the target, or None if the
+    journal does not exist or the target has never been run. """
+    if not path.expanduser().exists(): return None
+    query = "SELECT * FROM runs WHERE target = ? ORDER BY started DESC LIMIT 1"
+    with closing( open_journal(path) ) as conn:
+        row = conn.execute( query, (target,) ).fetchone()
+    return None if row is None else RunRecord.from_row( row )
+
+def read_runs(
+    targets: Optional[List[str]] = None, since: Optional[datetime] = None,
+    with_dry_runs: bool = False, path: Path = RUN_JOURNAL_FILE
+) -> List[RunRecord]:
+    """ Returns all the runs of the input targets (all if None) started
+    after the input datetime, sorted by start time. """
+    if not path.expanduser().exists(): return []
+
+    conditions, params = [], []
+    if targets:
+        conditions.append( f"target IN ({', '.join('?' for _ in targets)})" )
+        params.extend( targets )
+    if since is not None:
+        conditions.append( "started >= ?" )
+        params.append( since.isoformat() )
+    if not with_dry_runs:
+        conditions.append( "dry_run = 0" )
+
+    where = "" if not conditions else "WHERE " + " AND ".join( conditions )
+    query = f"SELECT * FROM runs {where} ORDER BY started ASC"
+    with closing( open_journal(path) ) as conn:
+        return [ RunRecord.from_row(row) for row in conn.execute( query, params ) ]
+
+def failed_snapshots( target: str, path: Path = RUN_JOURNAL_FILE ) -> Set[str]:
+    """ Returns the snapshots of the target written by failed runs """
+    if not path.expanduser().exists(): return set()
+    query = "SELECT snapshot FROM runs WHERE target = ? AND snapshot IS NOT NULL " +\
+        "AND exit_code != 0 AND dry_run = 0"
+    with closing( open_journal(path) ) as conn:
+        return { row["snapshot"] for row in conn.execute( query, (target,) ) }
+
+def append_verification( target: str, result: VerifyResult, path: Path = RUN_JOURNAL_FILE ) -> None:
+    """ Append the outcome of a verification into the journal """
+    query = "INSERT INTO verifications (target, started, finished, full, checked, " +\
+        "mismatched, error) VALUES (?, ?, ?, ?, ?, ?, ?)"
+    with closing( open_journal(path) ) as conn, conn:
+        conn.execute( query, ( target, result.started.isoformat(), result.finished.isoformat(),
+            int(result.full), result.checked, len(result.mismatched), result.error ) )
+
+def last_full_verification( target: str, path: Path = RUN_JOURNAL_FILE ) -> Optional[datetime]:
+    """ Returns when the last complete full verification of the target started """
+    if not path.expanduser().exists(): return None
+    query = "SELECT MAX(started) AS started FROM verifications " +\
+        "WHERE target = ? AND full = 1 AND error IS NULL"
+    with closing( open_journal(path) ) as conn:
+        row = conn.execute( query, (target,) ).fetchone()
+    return None if row["started"] is None else datetime.fromisoformat( row["started"] )
+
+def verified_files( target: str, path: Path = RUN_JOURNAL_FILE ) -> Set[Tuple[str, int, int, int]]:
+    """ Returns the (path, size, mtime_ns, inode) of the files of the target
+    whose copy has been verified, as they were when verified. A file changed
+    since then no longer matches them. """
+    if not path.expanduser().exists(): return set()
+    query = "SELECT path, size, mtime_ns, inode FROM verified WHERE target = ?"
+    with closing( open_journal(path) ) as conn:
+        return { tuple(row) for row in conn.execute( query, (target,) ) }
+
+def save_verified( 
+    target: str, entries: List[ScanEntry], reset: bool = False, path: Path = RUN_JOURNAL_FILE 
+) -> None:
+    """ Record the verified files, replacing all the previous ones if reset """
+    query = "INSERT OR REPLACE INTO verified (target, path, size, mtime_ns, inode) " +\
+        "VALUES (?, ?, ?, ?, ?)"
+    with closing( open_journal(path) ) as conn, conn:
+        if reset: conn.execute( "DELETE FROM verified WHERE target = ?", (target,) )
+        conn.executemany( query, ( ( target, e.path, e.size, e.mtime_ns, e.inode ) 
+            for e in entries ) )
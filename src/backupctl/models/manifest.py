@@ -0,0 +1,118 @@
+import json
+import os
+
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional
+
+from backupctl.constants import MANIFEST_FOLDER
+from backupctl.utils.scan import ScanEntry
+
+MANIFEST_VERSION = 2
+
+class TransferMode(str, Enum):
+    full        = "full"        # All the sources are synchronised
+    incremental = "incremental" # Only the changed paths are sent
+    noop        = "noop"        # Nothing changed, the transfer is skipped
+
+@dataclass
+class SourceManifest:
+    """ Compact snapshot of the source tree. Paths are kept sorted and the
+    metadata lives in parallel typed arrays, stored as raw bytes on disk
+    so that loading them does not parse any record. Plans preserve the
+    permissions, owners, ACLs and xattrs, hence the metadata includes the
+    status change time, which is the only trace of an ACL or xattr change. """
+    full_run : datetime # When the last full run has been done
+    paths    : List[str] = field(default_factory=list) # Sorted relative paths
+    sizes    : array = field(default_factory=lambda: array("q")) # Sizes in bytes
+    mtimes   : array = field(default_factory=lambda: array("q")) # Modification times (ns)
+    inodes   : array = field(default_factory=lambda: array("Q")) # Inode numbers
+    modes    : array = field(default_factory=lambda: array("Q")) # File types and permissions
+    uids     : array = field(default_factory=lambda: array("Q")) # Owner user ids
+    gids     : array = field(default_factory=lambda: array("Q")) # Owner group ids
+    ctimes   : array = field(default_factory=lambda: array("q")) # Status change times (ns)
+
+    def __len__( self ) -> int:
+        return len( self.paths )
+
+    @staticmethod
+    def from_entries( entries: List[ScanEntry], full_run: datetime ) -> 'SourceManifest':
+        """ Creates the manifest out of entries sorted by path """
+        return SourceManifest( full_run, [ e.path for e in entries ], 
+            array("q", ( e.size for e in entries )), array("q", ( e.mtime_ns for e in entries )),
+            array("Q", ( e.inode for e in entries )), array("Q", ( e.mode for e in entries )),
+            array("Q", ( e.uid for e in entries )), array("Q", ( e.gid for e in entries )),
+            array("q", ( e.ctime_ns for e in entries )) )
+
+    def _arrays( self ) -> List[array]:
+        return [ self.sizes, self.mtimes, self.inodes, self.modes, self.uids, self.gids, 
+            self.ctimes ]
+
+    def metadata( self, idx: int ) -> tuple:
+        """ Returns the metadata of the idx-th path compared between runs """
+        return tuple( values[idx] for values in self._arrays() )
+
+    def save( self, path: Path ) -> None:
+        """ Write the manifest atomically: a JSON header line, the arrays
+        and the NUL separated paths """
+        header = { "version": MANIFEST_VERSION, "count": len(self), 
+            "full_run": self.full_run.isoformat() }
+        path.parent.mkdir( parents=True, exist_ok=True )
+        tmp_path = path.with_name( f".{path.name}.tmp" )
+        with tmp_path.open( "wb" ) as io:
+            io.write( json.dumps(header).encode("utf-8") + b"\n" )
+            for values in self._arrays(): values.tofile( io )
+            io.write( "\0".join( self.paths ).encode("utf-8", "surrogateescape") )
+        os.replace( tmp_path, path )
+
+    @staticmethod
+    def load( path: Path ) -> Optional['SourceManifest']:
+        """ Read the manifest, None if missing, corrupted or outdated """
+        try:
+            data = path.read_bytes()
+            header_end = data.index( b"\n" )
+            header = json.loads( data[:header_end] )
+            if header["version"] != MANIFEST_VERSION: return None
+
+            manifest = SourceManifest( datetime.fromisoformat(header["full_run"]) )
+            offset, count = header_end + 1, header["count"]
+            for values in manifest._arrays():
+                end = offset + count * values.itemsize
+                values.frombytes( data[offset:end] )
+                offset = end
+
+            blob = data[offset:].decode( "utf-8", "surrogateescape" )
+            manifest.paths = blob.split("\0") if count else []
+            if len( manifest.paths ) != count: return None
+            return manifest
+        except ( OSError, ValueError, KeyError ):
+            return None
+
+@dataclass
+class ManifestDiff:
+    changed : List[str] = field(default_factory=list) # New or modified paths
+    removed : List[str] = field(default_factory=list) # Paths no longer in the sources
+
+    def empty( self ) -> bool:
+        return not self.changed and not self.removed
+
+def diff_manifests( old: SourceManifest, new: SourceManifest ) -> ManifestDiff:
+    """ Compare two manifests walking their sorted paths side by side """
+    diff, i, j = ManifestDiff(), 0, 0
+    while i < len(old) or j < len(new):
+        if j >= len(new) or ( i < len(old) and old.paths[i] < new.paths[j] ):
+            diff.removed.append( old.paths[i] )
+            i += 1
+        elif i >= len(old) or new.paths[j] < old.paths[i]:
+            diff.changed.append( new.paths[j] )
+            j += 1
+        else:
+            if old.metadata(i) != new.metadata(j): diff.changed.append( new.paths[j] )
+            i, j = i + 1, j + 1
+    return diff
+
+def manifest_file( target: str, folder: Path = MANIFEST_FOLDER ) -> Path:
+    return folder / f"{target}.manifest"
@@ -0,0 +1,80 @@
+from typing import List, Optional, Dict, Any, Annotated
+from pydantic import BaseModel, Field, model_validator, ConfigDict, EmailStr, HttpUrl, \
+    computed_field, AfterValidator
+
+from .notification import NotifType, EventType
+from backupctl.constants import SMTP_PROVIDERS, AVAILABLE_WEBHOOKS
+from backupctl.utils.units import TIMEOUT_PATTERN, timeout_seconds
+
+class SMTP_Cfg(BaseModel):
+    server: str
+    port: Optional[int] = Field(default=None, ge=1, le=65535)
+    ssl: bool = False
+
+class EmailCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid", populated_by_name=True)
+
+    from_: EmailStr = Field(alias="from") # The sender email
+    to: List[EmailStr]
+    password: str # The SMTP password for the email
+    smtp: Optional[SMTP_Cfg] = None # Optional SMTP server
+
+    @model_validator(mode="after")
+    def fill_smtp_defaults(self) -> 'EmailCfg':
+        """ Fills the stmp section with defaults parameter
+        from the detected SMTP domain if inferred. """
+        if self.smtp is not None: return self
+        domain = self.from_.split("@")[-1]
+        if domain not in SMTP_PROVIDERS:
+            raise ValueError(
+                f"No SMTP defaults for '{domain}'. "
+                "Please specify smtp.server and smtp.port explicitly."
+            )
+        
+        server, port, ssl = SMTP_PROVIDERS[domain]
+        self.smtp = SMTP_Cfg(server=server, port=port, ssl=ssl)
+        return self
+
+def _validate_timeout_str( v: Optional[str] ) -> Optional[str]:
+    """ Validate the timeout string """
+    if v is None: return v # None value can be provided
+    # The pattern matches scientific notation and time notation
+    if TIMEOUT_PATTERN.fullmatch( v ) is None:
+        raise ValueError(f"Incorrect formatting for timeout field {v}")
+    return v
+
+TimeoutField = Annotated[str, AfterValidator(_validate_timeout_str)]
+
+class WebhookCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid", 
+                              populate_by_name=True, 
+                              validate_default=True)
+    
+    type_       : NotifType = Field(alias="type")               # The type of the webhook endpoint
+    name        : str                                           # The name given to the webhook
+    url         : HttpUrl                                       # The URL endpoint for the webhook
+    events      : List[EventType] = Field(default_factory=list, min_length=1) # List of subscribed events
+    timeout     : Optional[TimeoutField] = None                 # Optional timeout for receiving the response
+    max_retries : Optional[int] = Field( default=None, ge=0 ) # Maximum number of retries
+    headers     : Optional[Dict[str,Any]] = None                # Optional additional headers for the HTTP request
+
+    @model_validator(mode="after")
+    def validate( self ) -> 'WebhookCfg':
+        """ Validates the webhook notification type """
+        if self.type_.value not in AVAILABLE_WEBHOOKS:
+            raise ValueError(f"Uknown webhook notification type")
+        
+        encoded_url = self.url.encoded_string()
+        expected_prefix = AVAILABLE_WEBHOOKS[self.type_.value]
+        if not encoded_url.startswith( expected_prefix ):
+            raise ValueError(
+                f"For webhook notification type '{self.type_.value}' " + \
+                f"a URL starting with '{expected_prefix}' is expected!"
+            )
+
+        return self
+    
+    @computed_field
+    @property
+    def timeout_s(self) -> Optional[float]:
+        return timeout_seconds( self.timeout )
@@ -3,15 +3,17 @@ import requests
 import requests.sessions as sessions
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, TypeAlias
 from pathlib import Path
 from datetime import datetime
 
 from backupctl.models.notification.notification import Event
-from backupctl.models.notification.webhook import HttpRequest, Webhook, WebhookStatus
+from backupctl.models.notification.webhook import Webhook, WebhookStatus
 from backupctl.utils.dataclass import DictConfiguration, dataclass_from_dict
 from backupctl.utils.console import cwarn
 
+HttpRequest: TypeAlias = requests.Request
+
 @dataclass
 class DiscordPayload(DictConfiguration):
     content     : str                   # the message contents (up to 2000 characters)
@@ -4,41 +4,13 @@ import smtplib
 from pathlib import Path
 from email.message import EmailMessage
 from dataclasses import dataclass, field
-from typing import List, Optional
-from pydantic import BaseModel, Field, model_validator, ConfigDict, EmailStr
+from typing import TYPE_CHECKING, List
 
 from .notification import NotificationMeta, NotificationType, Event
 from backupctl.utils.dataclass import DictConfiguration, PrintableConfiguration
-from backupctl.constants import SMTP_PROVIDERS
 
-class SMTP_Cfg(BaseModel):
-    server: str
-    port: Optional[int] = Field(default=None, ge=1, le=65535)
-    ssl: bool = False
-
-class EmailCfg(BaseModel):
-    model_config = ConfigDict(extra="forbid", populated_by_name=True)
-
-    from_: EmailStr = Field(alias="from") # The sender email
-    to: List[EmailStr]
-    password: str # The SMTP password for the email
-    smtp: Optional[SMTP_Cfg] = None # Optional SMTP server
-
-    @model_validator(mode="after")
-    def fill_smtp_defaults(self) -> 'EmailCfg':
-        """ Fills the stmp section with defaults parameter
-        from the detected SMTP domain if inferred. """
-        if self.smtp is not None: return self
-        domain = self.from_.split("@")[-1]
-        if domain not in SMTP_PROVIDERS:
-            raise ValueError(
-                f"No SMTP defaults for '{domain}'. "
-                "Please specify smtp.server and smtp.port explicitly."
-            )
-        
-        server, port, ssl = SMTP_PROVIDERS[domain]
-        self.smtp = SMTP_Cfg(server=server, port=port, ssl=ssl)
-        return self
+if TYPE_CHECKING:
+    from .config import EmailCfg
 
 @dataclass
 class EmailNotification(NotificationMeta, DictConfiguration, PrintableConfiguration):
@@ -50,7 +22,7 @@ class EmailNotification(NotificationMeta, DictConfiguration, PrintableConfigurat
     to       : List[str] = field(default_factory=list) # A list of recipients
 
     @staticmethod
-    def from_configuration(id_: int, notif: EmailCfg) -> 'EmailNotification':
+    def from_configuration(id_: int, notif: 'EmailCfg') -> 'EmailNotification':
         """ Creates an object from the Email user configuration """
         return EmailNotification(
             id=id_, type=NotificationType.email, from_=notif.from_, to=notif.to,
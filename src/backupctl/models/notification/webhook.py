@@ -1,78 +1,17 @@
-import requests
-import requests.sessions as sessions
 import time
-import re
 
 from pathlib import Path
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any, TypeAlias, Annotated
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 from dataclasses import dataclass
-from pydantic import BaseModel, model_validator, HttpUrl, Field, \
-    ConfigDict, computed_field, AfterValidator
 
 from .notification import NotificationType, NotificationMeta, Event, NotifType, EventType
-from backupctl.constants import HTTP_RETRY_STATUS, AVAILABLE_WEBHOOKS
+from backupctl.constants import HTTP_RETRY_STATUS
 from backupctl.utils.dataclass import DictConfiguration, PrintableConfiguration
 
-HttpRequest: TypeAlias = requests.Request
-HttpResponse: TypeAlias = requests.Response
-
-def _validate_timeout_str( v: Optional[str] ) -> Optional[str]:
-    """ Validate the timeout string """
-    if v is None: return v # None value can be provided
-    # This regex, matches scientific notation and time notation
-    pattern = re.compile(r"^(\d+)(?:\.(\d+))?(?:e(\d+))?(s|ms|us)$")
-    match = re.fullmatch( pattern, v )
-    if match is None:
-        raise ValueError(f"Incorrect formatting for timeout field {v}")
-    return v
-
-def _get_timeout_float_sec( v: Optional[str] ) -> Optional[float]:
-    """ Convert the timeout string into a float value """
-    if v is None: return None
-    pattern = re.compile(r"^(\d+)(?:\.(\d+))?(?:e(\d+))?(s|ms|us)$")
-    units, decs, exp, time_unit = pattern.fullmatch( v ).groups()
-    result = int(units)
-    if decs is not None: result += int( decs ) / ( 10**len(decs) )
-    if exp is not None: result *= 10**int(exp)
-    result /= ( { "s" : 1, "ms" : 1000, "us": 1e6 }[time_unit] )
-    return result
-
-TimeoutField = Annotated[str, AfterValidator(_validate_timeout_str)]
-
-class WebhookCfg(BaseModel):
-    model_config = ConfigDict(extra="forbid", 
-                              populate_by_name=True, 
-                              validate_default=True)
-    
-    type_       : NotifType = Field(alias="type")               # The type of the webhook endpoint
-    name        : str                                           # The name given to the webhook
-    url         : HttpUrl                                       # The URL endpoint for the webhook
-    events      : List[EventType] = Field(default_factory=list, min_length=1) # List of subscribed events
-    timeout     : Optional[TimeoutField] = None                 # Optional timeout for receiving the response
-    max_retries : Optional[int] = Field( default=None, ge=0 ) # Maximum number of retries
-    headers     : Optional[Dict[str,Any]] = None                # Optional additional headers for the HTTP request
-
-    @model_validator(mode="after")
-    def validate( self ) -> 'WebhookCfg':
-        """ Validates the webhook notification type """
-        if self.type_.value not in AVAILABLE_WEBHOOKS:
-            raise ValueError(f"Uknown webhook notification type")
-        
-        encoded_url = self.url.encoded_string()
-        expected_prefix = AVAILABLE_WEBHOOKS[self.type_.value]
-        if not encoded_url.startswith( expected_prefix ):
-            raise ValueError(
-                f"For webhook notification type '{self.type_.value}' " + \
-                f"a URL starting with '{expected_prefix}' is expected!"
-            )
-
-        return self
-    
-    @computed_field
-    @property
-    def timeout_s(self) -> Optional[float]:
-        return _get_timeout_float_sec( self.timeout )
+if TYPE_CHECKING:
+    from requests import Request as HttpRequest, Response as HttpResponse
+    from .config import WebhookCfg
 
 @dataclass
 class WebhookNotification(NotificationMeta, DictConfiguration, PrintableConfiguration):
@@ -85,7 +24,7 @@ class WebhookNotification(NotificationMeta, DictConfiguration, PrintableConfigur
     headers: Optional[Dict[str, Any]] = None # Additional headers for the HTTP request
 
     @staticmethod
-    def from_configuration( id_: int, notif: WebhookCfg ) -> 'WebhookNotification':
+    def from_configuration( id_: int, notif: 'WebhookCfg' ) -> 'WebhookNotification':
         """ Creates an object from Webhook user configuration """
         return WebhookNotification(
             id=id_, type=NotificationType.webhook, webhook_type=notif.type_,
@@ -96,7 +35,7 @@ class WebhookNotification(NotificationMeta, DictConfiguration, PrintableConfigur
     
 @dataclass
 class WebhookStatus:
-    response : Optional[HttpResponse] # The most recent HTTP Response
+    response : Optional['HttpResponse'] # The most recent HTTP Response
     error    : Optional[str]          # The error message if any
     
 class Webhook(ABC, WebhookNotification):
@@ -116,9 +55,12 @@ class Webhook(ABC, WebhookNotification):
         """ Creates and sends the requests """
         request = self.format_request( subject, attachments )
         last_error: str | None = None # The error returned by the send function
-        last_response: HttpResponse | None = None # The last returned response
+        last_response: Optional['HttpResponse'] = None # The last returned response
+
+        # requests is slow to import, hence loaded only to send
+        import requests
 
-        session = sessions.Session()
+        session = requests.Session()
         for attempt in range(1, self.max_retries + 1):
             try:
                 prep_req = session.prepare_request( request )
@@ -176,6 +118,6 @@ class Webhook(ABC, WebhookNotification):
     @abstractmethod
     def format_request( 
         self, subject: str, attachments: List[str] 
-    ) -> HttpRequest: 
+    ) -> 'HttpRequest': 
         """ Format and returns the (endpoint specialized) request """
         ...
\ No newline at end of file
@@ -1,33 +1,149 @@
 from __future__ import annotations
 
-import backupctl.models.user_config as user_cfg
 import json
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from datetime import time
 from pathlib import Path
 
-from backupctl.constants import DEFAULT_LOG_FOLDER
-from backupctl.utils.rsync import create_rsync_command
+from backupctl.constants import DEFAULT_LOG_FOLDER, DEFAULT_NOTIFICATION_DEADLINE
+from backupctl.utils.rsync import create_rsync_command, rsync_url
+from backupctl.models.admission import host_key
+from backupctl.models.quorum import QUORUM_ALL
+from backupctl.models.tuning import AUTO
+from backupctl.models.bandwidth import BandwidthSchedule, BandwidthWindow
+from backupctl.models.retry import DEFAULT_PARTIAL_DIR, DEFAULT_RETRY_EXIT_CODES, RetryPolicy
 from backupctl.utils.dataclass import *
 from backupctl.models.notification import NotificationCls
 from backupctl.models.notification.email import EmailNotification
 from backupctl.models.notification.webhook import WebhookNotification
 
+# The user configuration is only read when registering, running a plan
+# needs the JSON file alone and not the validation stack
+if TYPE_CHECKING:
+    import backupctl.models.user_config as user_cfg
+
 @dataclass
 class LogCfg(DictConfiguration, PrintableConfiguration):
     path: str # The root log folder for this job
     max_spare_files: int # Max number of spare files before archiving them
     retention_window: int # Max days before wiping out the least recent log archive
+    archive_format: str = "zip" # The format of the log archives
+    max_total_bytes: Optional[int] = None # Size budget of the log folder
+    global_max_total_bytes: Optional[int] = None # Size budget of all the log folders
+
+@dataclass
+class BandwidthWindowCfg(DictConfiguration, PrintableConfiguration):
+    start: str # When the window opens (HH:MM)
+    end: str # When the window closes (HH:MM)
+    limit: Optional[int] = None # Bytes per second, None for unlimited
+
+@dataclass
+class SnapshotCfg(DictConfiguration, PrintableConfiguration):
+    link_dest: int = 1 # Previous snapshots to hard-link against
+    hourly: int = 0 # Number of hourly snapshots to keep
+    daily: int = 7 # Number of daily snapshots to keep
+    weekly: int = 4 # Number of weekly snapshots to keep
+    monthly: int = 12 # Number of monthly snapshots to keep
+
+@dataclass
+class ManifestCfg(DictConfiguration, PrintableConfiguration):
+    max_changes: int = 1000 # Changed paths above which a full run is done
+    full_run_hours: int = 24 # Hours between two full runs
+
+@dataclass
+class VerifyCfg(DictConfiguration, PrintableConfiguration):
+    sample: int = 100 # Files checked by a sampled verification
+    strategy: str = "stratified" # How the sample is picked: random or stratified
+    after_run: bool = True # Verify a sample after each successful run
+    full_every_days: Optional[int] = 30 # Days between full verifications, None for never
+
+@dataclass
+class RetryCfg(DictConfiguration, PrintableConfiguration):
+    max_attempts: int = 3 # Attempts of each rsync process, the first included
+    backoff: float = 30.0 # Seconds before the second attempt
+    backoff_factor: float = 2.0 # Growth of the backoff at each attempt
+    max_backoff: float = 600.0 # Maximum seconds between two attempts
+    exit_codes: List[int] = field(default_factory=lambda: list(DEFAULT_RETRY_EXIT_CODES)) # Retryable exit codes
+    partial_dir: Optional[str] = DEFAULT_PARTIAL_DIR # Partial files kept to resume, None to restart
+
+@dataclass
+class IoMaxCfg(DictConfiguration, PrintableConfiguration):
+    device: str # Block device, or any path on its filesystem
+    rbps: Optional[int] = None # Bytes read per second, None for unlimited
+    wbps: Optional[int] = None # Bytes written per second, None for unlimited
+    riops: Optional[int] = None # Read operations per second, None for unlimited
+    wiops: Optional[int] = None # Write operations per second, None for unlimited
+
+@dataclass
+class CgroupCfg(DictConfiguration, PrintableConfiguration):
+    parent: str # Delegated cgroup v2 folder the run sub-groups are created into
+    memory_high: Optional[int] = None # memory.high of the sub-group in bytes
+    io_max: List[IoMaxCfg] = field(default_factory=list) # io.max of the sub-group
+
+@dataclass
+class ResourcesCfg(DictConfiguration, PrintableConfiguration):
+    nice: Optional[int] = None # Niceness of rsync, None to inherit it
+    ionice_class: Optional[str] = None # I/O scheduling class: realtime, best-effort or idle
+    ionice_level: Optional[int] = None # Level of the I/O scheduling class
+    cpus: List[int] = field(default_factory=list) # CPU affinity of rsync, all if empty
+    cgroup: Optional[CgroupCfg] = None # cgroup v2 sub-group of the runs, None for none
+    drop_cache: bool = False # Drop the cached pages of the files once sent
+
+@dataclass
+class ReplicaCfg(DictConfiguration, PrintableConfiguration):
+    remote: str # The remote host:port
+    dest: str # The rsync URL of the destination
+    password_file: Optional[str] = None # The password file of the remote
+    max_sessions: Optional[int] = None # Max concurrent rsync sessions on the remote
 
 @dataclass
 class PlanCfg(DictConfiguration, PrintableConfiguration):
     name         : str # The name of the backup plan
     log          : LogCfg # The root log folder for this job
-    compression  : bool # Enable/Disable compression
+    compression  : bool | str # Enable/Disable compression, or auto
     command      : str # rsync command to run
     notification : List[NotificationCls] = \
         field(default_factory=list) # Notification system config
+    workers      : int = 1 # Number of concurrent rsync processes
+    notification_deadline : Optional[float] = \
+        DEFAULT_NOTIFICATION_DEADLINE # Seconds before giving up on notifications
+    overlap      : str = "skip" # What to do when the target is already running
+    remote       : Optional[str] = None # The remote host:port
+    max_sessions : Optional[int] = None # Max concurrent rsync sessions on the remote
+    bwlimit      : Optional[int] = None # Bandwidth limit outside the windows (bytes/s)
+    bandwidth_windows : List[BandwidthWindowCfg] = \
+        field(default_factory=list) # Bandwidth limits by time of day
+    snapshot     : Optional[SnapshotCfg] = None # Hard-link snapshots, None to mirror
+    replicas     : List[ReplicaCfg] = \
+        field(default_factory=list) # Destinations receiving the same delta
+    fanout       : List[ReplicaCfg] = \
+        field(default_factory=list) # Destinations synched concurrently with the remote
+    quorum       : str = QUORUM_ALL # Destinations that must succeed: all, any or N
+    whole_file   : bool | str = AUTO # Enable/Disable the delta transfer, or auto
+    manifest     : Optional[ManifestCfg] = None # Source manifest, None to always synch all
+    verify       : Optional[VerifyCfg] = None # Checksum verification, None to disable
+    retry        : Optional[RetryCfg] = None # Retry policy of the transfers, None to never retry
+    io_timeout   : Optional[int] = 300 # Seconds without data before rsync gives up (--timeout)
+    connect_timeout : Optional[int] = 60 # Seconds to connect to the daemon (--contimeout)
+    stall_timeout : Optional[float] = 900 # Seconds without activity before killing rsync
+    resources    : Optional[ResourcesCfg] = None # CPU, disk and memory settings of rsync
+
+    def bandwidth_schedule( self ) -> Optional[BandwidthSchedule]:
+        """ Returns the bandwidth schedule, None if the bandwidth is unlimited """
+        if not self.bandwidth_windows and self.bwlimit is None: return None
+        windows = [ 
+            BandwidthWindow( time.fromisoformat(w.start), time.fromisoformat(w.end), w.limit )
+            for w in self.bandwidth_windows
+        ]
+        return BandwidthSchedule( windows, self.bwlimit )
+
+    def retry_policy( self ) -> Optional[RetryPolicy]:
+        """ Returns the retry policy of the transfers, None if they are never retried """
+        if self.retry is None: return None
+        return RetryPolicy( self.retry.max_attempts, self.retry.backoff, self.retry.backoff_factor,
+            self.retry.max_backoff, frozenset(self.retry.exit_codes), self.retry.partial_dir )
     
 TYPE_DISCRIMINATOR: Dict[str, Any] = \
 {
@@ -46,6 +162,17 @@ def load_plan_configuration( conf_path: Path | str ) -> PlanCfg:
 
     return dataclass_from_dict( PlanCfg, data, TYPE_DISCRIMINATOR )
 
+def _replica_from_remote( remote: user_cfg.Remote ) -> ReplicaCfg:
+    """ Creates the destination of a replica out of a remote """
+    return ReplicaCfg( 
+        host_key( remote.host, remote.port ),
+        rsync_url( remote.host, remote.port, remote.user, 
+            remote.dest.module, remote.dest.folder ),
+        None if not remote.password_file else \
+            Path(remote.password_file).resolve().__str__(),
+        remote.max_sessions
+    )
+
 def load_from_target( target: user_cfg.Target ) -> PlanCfg:
     """ Creats a plan configuration out of a target. Notification
     systems that will be written into the configuration are filtered
@@ -56,23 +183,55 @@ def load_from_target( target: user_cfg.Target ) -> PlanCfg:
     cfg.log = LogCfg( 
         (DEFAULT_LOG_FOLDER / target.name).__str__(),
         target.log_retention.max_spare_files,
-        target.log_retention.retention_window
+        target.log_retention.retention_window,
+        target.log_retention.archive_format.value,
+        target.log_retention.max_total_bytes,
+        target.log_max_total_bytes
     )
     
     cfg.compression = target.rsync.options.compress
+    cfg.whole_file = target.rsync.options.whole_file
+    cfg.workers = target.rsync.options.workers
+    cfg.overlap = target.schedule.overlap.value
+    main_remote, *fanout = target.remotes()
+    cfg.remote = host_key( main_remote.host, main_remote.port )
+    cfg.max_sessions = main_remote.max_sessions
+    cfg.fanout = [ _replica_from_remote( remote ) for remote in fanout ]
+    cfg.quorum = str( target.quorum )
+    cfg.bwlimit = target.rsync.options.bwlimit
+    cfg.io_timeout = target.rsync.options.io_timeout
+    cfg.connect_timeout = target.rsync.options.connect_timeout
+    cfg.stall_timeout = target.rsync.options.stall_timeout
+    cfg.bandwidth_windows = [
+        BandwidthWindowCfg( w.start, w.end, w.limit ) 
+        for w in target.rsync.options.bandwidth_windows
+    ]
+    if target.snapshot is not None:
+        cfg.snapshot = SnapshotCfg( **target.snapshot.model_dump() )
+
+    cfg.replicas = [ _replica_from_remote( replica ) for replica in target.replicas ]
+    if target.manifest is not None:
+        cfg.manifest = ManifestCfg( **target.manifest.model_dump() )
+    if target.retry is not None:
+        cfg.retry = RetryCfg( **target.retry.model_dump() )
+    if target.verify is not None:
+        cfg.verify = VerifyCfg( **target.verify.model_dump(mode="json") )
+    if target.resources is not None:
+        cfg.resources = dataclass_from_dict( ResourcesCfg, 
+            target.resources.model_dump(mode="json") )
 
     # Create the rsync command
-    password_file = Path(target.remote.password_file).resolve().__str__()
+    password_file = Path(main_remote.password_file).resolve().__str__()
     cfg.command = create_rsync_command(
-        host=target.remote.host, port=target.remote.port, user=target.remote.user,
-        password_file=password_file, module=target.remote.dest.module, 
-        folder=target.remote.dest.folder, list_only=False, 
+        host=main_remote.host, port=main_remote.port, user=main_remote.user,
+        password_file=password_file, module=main_remote.dest.module, 
+        folder=main_remote.dest.folder, list_only=False, 
         progress=target.rsync.options.show_progress, includes=target.rsync.includes,
         verbose=target.rsync.options.verbose, exclude_from=target.rsync.exclude_from, 
         sources=target.rsync.sources, use_flags=True,
         delete=target.rsync.options.delete, itemize_changes=target.rsync.options.itemize_changes,
         keep_specials=target.rsync.options.keep_specials,
-        keep_devices=target.rsync.options.keep_devices
+        keep_devices=target.rsync.options.keep_devices, stats=True
     )
 
     # Now we need to put only those notification system that
@@ -80,6 +239,9 @@ def load_from_target( target: user_cfg.Target ) -> PlanCfg:
     cfg.notification = []
     curr_ns_identifier = 0
 
+    if target.notification.deadline_s is not None:
+        cfg.notification_deadline = target.notification.deadline_s
+
     if target.notification.email is not None:
         curr_ns_identifier += 1
         cfg.notification.append(EmailNotification.from_configuration(
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import threading
+import time
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backupctl.constants import RUN_STATUS_FOLDER
+
+PROGRESS_PUBLISH_INTERVAL = 1.0 # Minimum seconds between two status file updates
+PROGRESS_MAX_PENDING      = 4096 # Maximum characters kept waiting for a line end
+
+# Matches progress2 lines as: 1,234,567  45%  12.34MB/s  0:00:10 (xfr#3, to-chk=10/20)
+PROGRESS2_PATTERN = re.compile(
+    r"^\s*([\d,]+)\s+(\d+)%\s+([\d.]+)([kMGT]?B)/s\s+(\d+):(\d{2}):(\d{2})"
+)
+
+RATE_UNITS = { "B": 1, "kB": 1024, "MB": 1024**2, "GB": 1024**3, "TB": 1024**4 }
+
+@dataclass
+class ProgressUpdate:
+    bytes_done : int   # Bytes transferred so far
+    percent    : int   # Percentage of the whole transfer
+    rate       : float # Instantaneous rate in bytes per second
+    eta_s      : int   # Estimated seconds to completion
+
+    @staticmethod
+    def from_line( line: str ) -> Optional['ProgressUpdate']:
+        """ Parse a single --info=progress2 update """
+        match = PROGRESS2_PATTERN.match( line )
+        if match is None: return None
+        done, percent, rate, unit, hours, minutes, seconds = match.groups()
+        return ProgressUpdate(
+            int(done.replace(",", "")), int(percent), float(rate) * RATE_UNITS[unit],
+            int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        )
+
+@dataclass
+class RunProgress:
+    target  : str      # The name of the running target
+    pid     : int      # The pid of the backupctl process
+    started : str      # When the run has been started (ISO format)
+    updated : str      # When the progress has been updated (ISO format)
+    workers : Dict[str, ProgressUpdate] = \
+        field(default_factory=dict) # Worker id -> last progress update
+
+    def bytes_done( self ) -> int:
+        return sum( w.bytes_done for w in self.workers.values() )
+
+    def rate( self ) -> float:
+        return sum( w.rate for w in self.workers.values() )
+
+    def percent( self ) -> Optional[int]:
+        if not self.workers: return None
+        return min( w.percent for w in self.workers.values() )
+
+    def eta_s( self ) -> Optional[int]:
+        if not self.workers: return None
+        return max( w.eta_s for w in self.workers.values() )
+
+    def is_alive( self ) -> bool:
+        """ Check that the process owning the status file is still running """
+        try:
+            os.kill( self.pid, 0 )
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            ...
+        return True
+
+    @staticmethod
+    def from_dict( data: dict ) -> 'RunProgress':
+        workers = { k: ProgressUpdate(**v) for k, v in data.pop("workers", {}).items() }
+        return RunProgress( **data, workers=workers )
+
+def progress_file( target: str, folder: Path = RUN_STATUS_FOLDER ) -> Path:
+    return folder / f"{target}.json"
+
+def read_progress_files( folder: Path = RUN_STATUS_FOLDER ) -> List[RunProgress]:
+    """ Load the status files of all the running targets """
+    if not folder.exists(): return []
+
+    progresses = []
+    for path in sorted( folder.glob("*.json") ):
+        try:
+            progresses.append( RunProgress.from_dict( json.loads(path.read_text("utf-8")) ) )
+        except ( OSError, ValueError, TypeError ):
+            continue # The file is being replaced or it is corrupted
+
+    return progresses
+
+class ProgressPublisher:
+    """ Collects the progress of the workers of a running target and
+    publishes it, throttled, into the target status file. Files are
+    replaced atomically so readers never see a partial update. """
+    def __init__( self, target: str, folder: Path = RUN_STATUS_FOLDER,
+        interval: float = PROGRESS_PUBLISH_INTERVAL
+    ):
+        now = datetime.now().isoformat()
+        self.path = progress_file( target, folder )
+        self.interval = interval
+        self.progress = RunProgress( target, os.getpid(), now, now )
+        self._lock = threading.Lock()
+        self._last_publish = 0.0
+
+    def start( self ) -> None:
+        self.path.parent.mkdir( parents=True, exist_ok=True )
+        with self._lock: self._write()
+
+    def stop( self ) -> None:
+        self.path.unlink( missing_ok=True )
+
+    def update( self, worker: str, update: ProgressUpdate ) -> None:
+        with self._lock:
+            self.progress.workers[ worker ] = update
+            if time.monotonic() - self._last_publish < self.interval: return
+            self.progress.updated = datetime.now().isoformat()
+            self._write()
+
+    def tracker( self, worker: str = "0" ) -> 'ProgressTracker':
+        return ProgressTracker( self, worker )
+
+    def _write( self ) -> None:
+        tmp_path = self.path.with_name( f".{self.path.name}.{threading.get_ident()}" )
+        tmp_path.write_text( json.dumps( asdict(self.progress) ), encoding="utf-8" )
+        os.replace( tmp_path, self.path )
+        self._last_publish = time.monotonic()
+
+class ProgressScope:
+    """ View of a publisher prefixing the id of the workers, so that the
+    transfers of several destinations of a target do not collide. """
+    def __init__( self, publisher: ProgressPublisher, prefix: str ):
+        self.publisher = publisher
+        self.prefix = prefix
+
+    def tracker( self, worker: str = "0" ) -> 'ProgressTracker':
+        return self.publisher.tracker( f"{self.prefix}/{worker}" )
+
+class ProgressTracker:
+    """ Incrementally parses the stdout of rsync looking for progress2
+    updates, which are separated by carriage returns. """
+    def __init__( self, publisher: ProgressPublisher, worker: str ):
+        self.publisher = publisher
+        self.worker = worker
+        self._pending = ""
+
+    def feed( self, text: str ) -> None:
+        *lines, self._pending = re.split( r"[\r\n]", self._pending + text )
+        self._pending = self._pending[-PROGRESS_MAX_PENDING:]
+        for line in reversed( lines ):
+            update = ProgressUpdate.from_line( line )
+            if update is None: continue
+            self.publisher.update( self.worker, update )
+            return
@@ -0,0 +1,15 @@
+from typing import List
+
+QUORUM_ALL = "all" # Every destination must succeed
+QUORUM_ANY = "any" # At least one destination must succeed
+
+def quorum_size( quorum: str, total: int ) -> int:
+    """ Returns how many of the `total` destinations must succeed for the
+    input quorum, which is either `all`, `any` or a number N (N-of-M). """
+    if quorum == QUORUM_ALL: return total
+    if quorum == QUORUM_ANY: return min( 1, total )
+    return min( int(quorum), total )
+
+def quorum_reached( quorum: str, outcomes: List[bool] ) -> bool:
+    """ Check whether enough destinations succeeded for the quorum """
+    return sum( outcomes ) >= quorum_size( quorum, len(outcomes) )
@@ -27,14 +27,29 @@ class JobStatusType(str, Enum):
     def __str__(self) -> str:
         return self.value
 
+class JobBackend(str, Enum):
+    cron      = "CRON"      # Fired by the crontab entry of the job
+    scheduler = "SCHEDULER" # Fired by the `backupctl scheduler` daemon
+
+    def __str__(self) -> str:
+        return self.value
+
 @dataclass
 class Job:
-    name   : str            # The name of the Job
-    cmd    : str            # The cronjob command (including the time schedule)
-    status : JobStatusType  # The Job status ( enabled/disabled )
+    name    : str            # The name of the Job
+    cmd     : str            # The cronjob command (including the time schedule)
+    status  : JobStatusType  # The Job status ( enabled/disabled )
+    backend : JobBackend = JobBackend.cron # What fires the job
 
     def is_enabled(self) -> bool:
         return self.status == JobStatusType.enabled
+
+    def is_cron(self) -> bool:
+        return self.backend == JobBackend.cron
+
+    def schedule(self) -> str:
+        """ Returns the cron expression of the job """
+        return " ".join( self.cmd.split()[:5] )
     
     def tag(self) -> str:
         """ Returns the TAG to identify this job """
@@ -46,8 +61,20 @@ class Job:
         prefix = "" if self.is_enabled() else "# "
         return f"{prefix}{self.cmd} {suffix}"
     
+    @staticmethod
+    def fromstr(line: str) -> 'Job':
+        """ Parses a registry line, as written by `str` """
+        name, *cmd, status = line.strip().removesuffix("\n").split()
+        backend = JobBackend.cron
+        if status in JobBackend._value2member_map_:
+            backend = JobBackend(status)
+            *cmd, status = cmd
+        return Job(name, (" ".join(cmd)).strip(), JobStatusType.fromstr(status), backend)
+
     def __str__(self) -> str:
-        return f"{self.name} {self.cmd} {self.status.value}"
+        # Cron jobs keep the format written by the versions without backends
+        suffix = "" if self.is_cron() else f" {self.backend.value}"
+        return f"{self.name} {self.cmd} {self.status.value}{suffix}"
     
 Registry: TypeAlias = Dict[str, Job] | None
 
@@ -61,9 +88,8 @@ def load_registry( path: Path ) -> Registry:
     with path.expanduser().open('r', encoding='utf-8') as io:
         registered_jobs = defaultdict(Job)
         while (line := io.readline()):
-            name, *cmd, status = line.strip().removesuffix("\n").split()
-            registered_jobs[name] = Job(name, (" ".join(cmd)).strip(), 
-                JobStatusType.fromstr(status))
+            job = Job.fromstr(line)
+            registered_jobs[job.name] = job
         
         return registered_jobs
     
@@ -78,6 +104,13 @@ def write_registry( path: Path, registry: Registry ) -> None:
     except Exception as e:
         raise RegistryError(f"Registry writing: {e}") from e
 
+def cron_jobs( registry: Registry ) -> Registry:
+    """ Returns the jobs of the registry mirrored into the crontab, or None
+    if there is none """
+    if registry is None: return None
+    jobs = { name: job for name, job in registry.items() if job.is_cron() }
+    return jobs or None
+
 def read_registry() -> Registry:
     """ Load the registry or returns None if the
     registry file does not exists. """
@@ -0,0 +1,61 @@
+import re
+
+from enum import Enum
+from typing import Iterable, List, Optional
+
+# I/O scheduling classes of ioprio_set(2), the level only matters to the
+# realtime and best-effort classes, from 0 (highest) to 7 (lowest)
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_LEVEL_MASK  = 0xff
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_WHO_PGRP    = 2
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# Names printed by rsync: either the bare path or the path preceded by
+# the --itemize-changes flags, as in ">f+++++++++ path"
+ITEMIZED_NAME = re.compile( r"^[<>ch.*][fdLDS][^ ]{7,9} (.+)$" )
+
+class IoniceClass(str, Enum):
+    realtime    = "realtime"    # Served first, needs CAP_SYS_ADMIN
+    best_effort = "best-effort" # The default class of the processes
+    idle        = "idle"        # Served only when the disk has nothing else to do
+
+    def ioprio_class( self ) -> int:
+        return { IoniceClass.realtime: 1, IoniceClass.best_effort: 2, IoniceClass.idle: 3 }[self]
+
+    @staticmethod
+    def from_ioprio( ioprio: int ) -> Optional['IoniceClass']:
+        """ Returns the class of an ioprio_get(2) value, None if the process
+        has no class of its own and follows its CPU niceness """
+        return { 1: IoniceClass.realtime, 2: IoniceClass.best_effort,
+            3: IoniceClass.idle }.get( ioprio >> IOPRIO_CLASS_SHIFT )
+
+def ioprio_value( ionice_class: IoniceClass, level: int ) -> int:
+    return ionice_class.ioprio_class() << IOPRIO_CLASS_SHIFT | level
+
+def cpu_list( cpus: Iterable[int] ) -> str:
+    """ Format the CPUs as a list of ranges, as in 0-3,8 """
+    ranges: List[List[int]] = []
+    for cpu in sorted( set(cpus) ):
+        if ranges and ranges[-1][1] == cpu - 1: ranges[-1][1] = cpu
+        else: ranges.append( [ cpu, cpu ] )
+    return ",".join( str(a) if a == b else f"{a}-{b}" for a, b in ranges )
+
+def io_max_line(
+    device: str, rbps: Optional[int], wbps: Optional[int],
+    riops: Optional[int], wiops: Optional[int]
+) -> str:
+    """ Returns the io.max line of the MAJ:MIN device, unset limits are max """
+    limits = { "rbps": rbps, "wbps": wbps, "riops": riops, "wiops": wiops }
+    return device + "".join(
+        f" {key}={'max' if value is None else value}" for key, value in limits.items() )
+
+def transferred_name( line: str ) -> Optional[str]:
+    """ Returns the path named by a line printed by rsync for an updated
+    file, None if the line names a folder or does not name a path """
+    line = line.strip()
+    match = ITEMIZED_NAME.match( line )
+    if match is not None: line = match.group(1)
+    if not line or line.endswith("/"): return None
+    return line
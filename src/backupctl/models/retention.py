@@ -0,0 +1,174 @@
+import json
+import os
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional, Union
+
+from backupctl.models.rsync import CaseInsensitiveEnum
+from backupctl.utils.lock import file_lock
+
+RETENTION_INDEX_NAME    = ".retention-index.json" # Index file inside the log folder
+RETENTION_LOCK_NAME     = ".retention.lock"       # Lock serializing the index updates
+RETENTION_RUN_LOCK_NAME = ".retention-run.lock"   # Lock serializing the retention passes
+LOG_TIMESTAMP_FORMAT    = "%Y%m%d-%H%M%S"         # Timestamp in the log file names
+ARCHIVE_DATE_FORMAT     = "%Y%m%d"                # Dates in the archive file names
+
+class ArchiveFormat(CaseInsensitiveEnum):
+    zip     = "zip"     # Deflate compressed zip archive
+    tar_zst = "tar.zst" # Zstandard compressed tarball, requires `zstandard`
+
+    @property
+    def suffix( self ) -> str:
+        return f".{self.value}"
+
+@dataclass
+class LogEntry:
+    name    : str      # The name of the log file
+    created : datetime # The timestamp in the log file name
+    size    : Optional[int] = None # Size in bytes, None while it is the most recent log
+
+@dataclass
+class ArchiveEntry:
+    name  : str  # The name of the archive
+    first : date # The date of the least recent archived log
+    last  : date # The date of the most recent archived log
+    size  : Optional[int] = None # Size in bytes, None if not recorded
+
+def parse_log_name( name: str ) -> Optional[LogEntry]:
+    """ Parse a `<target>-YYYYMMDD-HHMMSS.log` file name """
+    if not name.endswith( ".log" ): return None
+    try:
+        date_string = '-'.join( name[:-len(".log")].split('-')[-2:] )
+        return LogEntry( name, datetime.strptime( date_string, LOG_TIMESTAMP_FORMAT ) )
+    except ValueError:
+        return None
+
+def parse_archive_name( name: str ) -> Optional[ArchiveEntry]:
+    """ Parse a `log_archive-YYYYMMDD-YYYYMMDD.<ext>` file name """
+    if not name.startswith( "log_archive-" ): return None
+    try:
+        first, last = name.split( "." )[0].split( '-' )[1:3]
+        return ArchiveEntry( name,
+            datetime.strptime( first, ARCHIVE_DATE_FORMAT ).date(),
+            datetime.strptime( last, ARCHIVE_DATE_FORMAT ).date() )
+    except ValueError:
+        return None
+
+@dataclass
+class RetentionIndex:
+    """ Per-target record of the log files and archives in the log folder,
+    kept up to date as they are created and removed so that the retention
+    policy never needs to scan the folder. The index is rebuilt from the
+    folder content only when it is missing or unreadable. """
+    folder   : Path # The log folder of the target
+    logs     : List[LogEntry] = field(default_factory=list)
+    archives : List[ArchiveEntry] = field(default_factory=list)
+
+    @property
+    def path( self ) -> Path:
+        return self.folder / RETENTION_INDEX_NAME
+
+    @staticmethod
+    def scan( folder: Path ) -> 'RetentionIndex':
+        """ Build the index from the content of the log folder """
+        index = RetentionIndex( folder )
+        if not folder.is_dir(): return index
+
+        with os.scandir( folder ) as entries:
+            for entry in entries:
+                if ( log_entry := parse_log_name( entry.name ) ) is not None:
+                    index.logs.append( log_entry )
+                elif ( archive_entry := parse_archive_name( entry.name ) ) is not None:
+                    index.archives.append( archive_entry )
+
+        index.logs.sort( key=lambda x: x.created )
+        return index
+
+    @staticmethod
+    def load( folder: Path ) -> 'RetentionIndex':
+        """ Load the index of the log folder, building it if needed """
+        try:
+            data = json.loads( ( folder / RETENTION_INDEX_NAME ).read_text( "utf-8" ) )
+            return RetentionIndex( folder,
+                [ LogEntry( name, datetime.fromisoformat(created), *size )
+                  for name, created, *size in data["logs"] ],
+                [ ArchiveEntry( name, date.fromisoformat(first), date.fromisoformat(last), *size )
+                  for name, first, last, *size in data["archives"] ]
+            )
+        except ( OSError, ValueError, KeyError, TypeError ):
+            return RetentionIndex.scan( folder )
+
+    def save( self ) -> None:
+        data = {
+            "logs": [ [ e.name, e.created.isoformat(), e.size ] for e in self.logs ],
+            "archives": [ [ e.name, e.first.isoformat(), e.last.isoformat(), e.size ]
+                          for e in self.archives ]
+        }
+
+        tmp_path = self.path.with_name( f"{self.path.name}.{os.getpid()}" )
+        tmp_path.write_text( json.dumps( data ), encoding="utf-8" )
+        os.replace( tmp_path, self.path )
+
+    def add_log( self, entry: LogEntry ) -> None:
+        if any( e.name == entry.name for e in self.logs ): return
+        self.logs.append( entry )
+        self.logs.sort( key=lambda x: x.created )
+
+    def add_archive( self, entry: ArchiveEntry ) -> None:
+        self.archives = [ e for e in self.archives if e.name != entry.name ]
+        self.archives.append( entry )
+
+    def _stat_size( self, entry: Union[ArchiveEntry, LogEntry] ) -> int:
+        try:
+            return ( self.folder / entry.name ).stat().st_size
+        except OSError:
+            return 0
+
+    def record_sizes( self ) -> None:
+        """ Record the size of the entries that do not have one yet. Each
+        file is inspected only once, since sizes are kept in the index. The
+        most recent log may still be written, hence its size is never kept:
+        it is recorded once a newer log is registered. """
+        for entry in self.logs[-1:]: entry.size = None
+        for entry in [ *self.logs[:-1], *self.archives ]:
+            if entry.size is None: entry.size = self._stat_size( entry )
+
+    def total_size( self ) -> int:
+        """ Total size of the logs and archives in bytes. The size of the
+        most recent log is taken from the file itself. """
+        recorded = sum( e.size or 0 for e in [ *self.logs[:-1], *self.archives ] )
+        return recorded + sum( self._stat_size( e ) for e in self.logs[-1:] )
+
+    def eviction_order( self ) -> List[Union[ArchiveEntry, LogEntry]]:
+        """ Entries in the order they should be evicted to free space:
+        oldest archives first, then the oldest logs. The most recent log
+        is never evicted. """
+        archives = sorted( self.archives, key=lambda x: ( x.last, x.first, x.name ) )
+        return [ *archives, *self.logs[:-1] ]
+
+    def evict( self, entry: Union[ArchiveEntry, LogEntry] ) -> None:
+        """ Remove the entry file and drop it from the index """
+        ( self.folder / entry.name ).unlink( missing_ok=True )
+        entries = self.logs if isinstance( entry, LogEntry ) else self.archives
+        entries.remove( entry )
+
+def retention_lock( folder: Path ):
+    """ Lock serializing all the updates of the index of the log folder """
+    return file_lock( folder / RETENTION_LOCK_NAME )
+
+def retention_run_lock( folder: Path ):
+    """ Lock serializing the retention passes of the log folder, held while
+    the archives are written without holding the lock of the index """
+    return file_lock( folder / RETENTION_RUN_LOCK_NAME )
+
+def register_log_file( log_file: Path ) -> None:
+    """ Record a newly created log file into the index of its folder """
+    entry = parse_log_name( log_file.name )
+    if entry is None: return
+
+    with retention_lock( log_file.parent ):
+        index = RetentionIndex.load( log_file.parent )
+        index.add_log( entry )
+        index.save()
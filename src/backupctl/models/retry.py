@@ -0,0 +1,34 @@
+from dataclasses import dataclass, field
+from typing import FrozenSet
+
+from backupctl.models.rsync import RSyncStatus
+
+# Exit codes of rsync usually caused by transient conditions: socket and
+# protocol errors (10, 12), partial transfers (23), vanished files (24),
+# I/O timeouts (30) and timeouts waiting for the daemon connection (35)
+DEFAULT_RETRY_EXIT_CODES = ( 10, 12, 23, 24, 30, 35 )
+DEFAULT_PARTIAL_DIR = ".rsync-partial"
+
+# Authentication, missing modules and missing folders fail again on retry,
+# while a stalled process is retried whatever exit code the kill produced
+RETRYABLE_STATUSES = frozenset({ RSyncStatus.OTHER_ERROR })
+
+@dataclass
+class RetryPolicy:
+    """ How a failed rsync process is retried. Attempts wait an exponential
+    backoff, capped to `max_backoff` seconds, before starting. """
+    max_attempts   : int           # Attempts including the first one
+    backoff        : float = 30.0  # Seconds before the second attempt
+    backoff_factor : float = 2.0   # Growth of the backoff at each attempt
+    max_backoff    : float = 600.0 # Maximum seconds between two attempts
+    exit_codes     : FrozenSet[int] = \
+        field(default_factory=lambda: frozenset(DEFAULT_RETRY_EXIT_CODES)) # Retryable exit codes
+    partial_dir    : str | None = DEFAULT_PARTIAL_DIR # Where partial files are kept for resuming
+
+    def retryable( self, return_code: int, status: RSyncStatus ) -> bool:
+        if status is RSyncStatus.STALLED: return True
+        return return_code in self.exit_codes and status in RETRYABLE_STATUSES
+
+    def delay( self, attempt: int ) -> float:
+        """ Returns the seconds to wait after the input failed attempt (1-based) """
+        return min( self.max_backoff, self.backoff * self.backoff_factor ** ( attempt - 1 ) )
@@ -1,14 +1,9 @@
-import ipaddress
+import re
 
-from typing import Optional, List, Annotated
+from typing import Optional, List, Dict
 from enum import Enum
-from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from subprocess import CompletedProcess
-from pydantic import (
-    BaseModel, ConfigDict, Field, AfterValidator, 
-    field_validator, model_validator,
-)
 
 class CaseInsensitiveEnum(str, Enum):
     @classmethod
@@ -32,6 +27,7 @@ class RSyncStatus(str, Enum):
     ACCESS_DENIED = "access_denied"
     OTHER_ERROR = "other_error"
     FOLDER_NOT_FOUND = "folder_not_found"
+    STALLED = "stalled" # Killed by the watchdog after no activity
 
     @staticmethod
     def from_output( ok: bool, output: str ) -> 'RSyncStatus':
@@ -42,6 +38,66 @@ class RSyncStatus(str, Enum):
         if "No such file or directory" in output: return RSyncStatus.FOLDER_NOT_FOUND
         return RSyncStatus.OTHER_ERROR
 
+_STATS_PATTERNS: Dict[str, re.Pattern] = {
+    "num_files"                 : re.compile(r"Number of files:\s*([\d,]+)"),
+    "num_files_transferred"     : re.compile(r"Number of (?:regular )?files transferred:\s*([\d,]+)"),
+    "total_file_size"           : re.compile(r"Total file size:\s*([\d,]+)"),
+    "total_transferred_size"    : re.compile(r"Total transferred file size:\s*([\d,]+)"),
+    "literal_data"              : re.compile(r"Literal data:\s*([\d,]+)"),
+    "matched_data"              : re.compile(r"Matched data:\s*([\d,]+)"),
+    "file_list_generation_time" : re.compile(r"File list generation time:\s*([\d.]+)"),
+    "file_list_transfer_time"   : re.compile(r"File list transfer time:\s*([\d.]+)"),
+    "total_bytes_sent"          : re.compile(r"Total bytes sent:\s*([\d,]+)"),
+    "total_bytes_received"      : re.compile(r"Total bytes received:\s*([\d,]+)"),
+    "speedup"                   : re.compile(r"speedup is\s*([\d.,]+)"),
+}
+
+@dataclass
+class RSyncStats:
+    """ Transfer metrics printed by rsync with the --stats option """
+    num_files                 : int   # Number of files in the file list
+    num_files_transferred     : int   # Number of regular files transferred
+    total_file_size           : int   # Total size in bytes of all the files
+    total_transferred_size    : int   # Total size in bytes of the transferred files
+    literal_data              : int   # Bytes sent as literal data
+    matched_data              : int   # Bytes matched against the receiver basis
+    file_list_generation_time : float # Seconds spent building the file list
+    file_list_transfer_time   : float # Seconds spent sending the file list
+    total_bytes_sent          : int   # Bytes sent on the wire
+    total_bytes_received      : int   # Bytes received from the wire
+    speedup                   : float # Total size over the bytes on the wire
+
+    @staticmethod
+    def from_output( output: str ) -> Optional['RSyncStats']:
+        """ Parse the --stats section of the rsync output. Returns None
+        if the output does not contain a complete stats section. """
+        values = dict()
+        for stats_field in fields( RSyncStats ):
+            # Take the last match, the tail may contain multiple sections
+            matches = _STATS_PATTERNS[ stats_field.name ].findall( output )
+            if not matches: return None
+            raw = matches[-1].replace( ",", "" )
+            values[ stats_field.name ] = stats_field.type( raw )
+        
+        return RSyncStats( **values )
+
+    @staticmethod
+    def merge( stats: List['RSyncStats'] ) -> Optional['RSyncStats']:
+        """ Aggregate the stats of multiple concurrent transfers """
+        if not stats: return None
+        total = { 
+            f.name: sum( getattr(s, f.name) for s in stats ) 
+            for f in fields( RSyncStats ) if f.name != "speedup"
+        }
+
+        # Concurrent transfers build their file lists at the same time
+        for name in ( "file_list_generation_time", "file_list_transfer_time" ):
+            total[ name ] = max( getattr(s, name) for s in stats )
+
+        wire_bytes = total["total_bytes_sent"] + total["total_bytes_received"]
+        total["speedup"] = round( total["total_file_size"] / wire_bytes, 2 ) if wire_bytes else 0.0
+        return RSyncStats( **total )
+
 @dataclass
 class RSyncOutput:
     status : RSyncStatus # The status of the rsync command execution
@@ -60,128 +116,3 @@ class RSyncOutput:
         ok = rsync_out.return_code == 0
         rsync_out.status = RSyncStatus.from_output(ok, combined)
         return rsync_out
-    
-def validate_host(v_host: str) -> str:
-    # The host parameter must be non-empty and there
-    # must not be spaces.
-    v_host = v_host.strip()
-    if not v_host: raise ValueError("Host must not be empty")
-    if "://" in v_host: raise ValueError("host must not include a URL scheme")
-    if "/" in v_host: raise ValueError("host must not include '/'")
-    if any(c.isspace() for c in v_host): 
-        raise ValueError("host must not contain spaces")
-
-    # Accept IPv4 / IPv6
-    try:
-        ipaddress.ip_address(v_host.strip("[]"))
-        return v_host
-    except ValueError:
-        pass
-
-    for host_label in v_host.split("."):
-        if not host_label: raise ValueError("invalid hostname label")
-        if host_label.startswith("-") or host_label.endswith("-"):
-            raise ValueError(
-                f"invalid hostname label: {host_label}")
-
-        if not host_label.replace("-", "").isalnum():
-            raise ValueError(
-                f"invalid hostname label: {host_label}")
-
-    return v_host
-
-HostField = Annotated[
-    str,
-    AfterValidator(validate_host),
-    Field(description="IPv4, IPv6 (optionally bracketed), or hostname")
-]
-
-class RSyncOptionsModel(BaseModel):
-    model_config = ConfigDict(extra="forbid")  # catches typos
-
-    host: HostField
-    port: int = Field(ge=1, le=65535)
-
-    user: Optional[str] = None
-    password_file: Optional[str] = None
-
-    list_only: bool = True
-    dry_run: bool = False
-    delete: Optional[DeleteType] = None
-    progress: bool = False
-    prune_empty_dirs: bool = True
-
-    exclude_from: Optional[str] = None
-    excludes: List[str] = Field(default_factory=list)
-    includes: List[str] = Field(default_factory=list)
-
-    numeric_ids: bool = True
-    use_flags: bool = False
-    itemize_changes: bool = False
-    keep_specials: bool = False
-    keep_devices: bool = False
-
-    module: Optional[str] = None
-    folder: Optional[str] = None
-    sources: List[str] = Field(default_factory=list)
-
-    verbose: bool = False
-
-    @field_validator("user", "module", "folder")
-    @classmethod
-    def non_empty_validation(cls, v: str | None) -> str | None:
-        if v is None: return None
-        if not v.strip(): raise ValueError( "must be non-empty" )
-        return v.strip()
-        
-    @field_validator("password_file", "exclude_from")
-    @classmethod
-    def path_must_exist(cls, path: str | None) -> str | None:
-        if path is None: return None
-        if not path.strip(): raise ValueError("must be non-empty")
-        path = Path(path.strip()).expanduser()
-        if not path.is_file(): 
-            raise ValueError(f"{path} must be an existing file")
-        return str(path)
-    
-    @model_validator(mode="after")
-    def validate_user_and_password(self) -> 'RSyncOptionsModel':
-        # If password_file is given and it is not None
-        # then also user must be non-empty or not None.
-        # The other way around does not count, a username
-        # could potentially not require a password I guess
-        if self.password_file is None: return self
-        if self.user is None:
-            raise ValueError("When password file is given, user must be non Null")
-        return self
-    
-    @model_validator(mode="after")
-    def validate_list_only_semantics(self) -> 'RSyncOptionsModel':
-        # If list-only is given, then we need to restore
-        # delete to its default value, as well for sources, 
-        # includes and exclude.
-        if self.list_only:
-            self.prune_empty_dirs = False
-            self.exclude_from = None
-            self.includes.clear()
-            self.excludes.clear()
-            self.sources.clear()
-            self.delete = None
-            self.dry_run = False
-
-            return self
-        
-        # Otherwise, if list only is False, then sources
-        # and module is required.
-        if not self.sources or not self.module:
-            raise ValueError(
-                "Both 'module' and 'sources' are required")
-        
-        return self
-    
-    @model_validator(mode="after")
-    def validate_module_and_folder(self) -> 'RSyncOptionsModel':
-        # If folder is given then also module must exists
-        if self.folder is not None and self.module is None:
-            raise ValueError("If Folder is given then also Module must be present")
-        return self
\ No newline at end of file
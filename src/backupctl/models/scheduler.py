@@ -0,0 +1,102 @@
+import heapq
+import itertools
+import json
+import os
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from croniter import croniter
+
+from backupctl.models.rsync import CaseInsensitiveEnum
+
+MAX_CATCH_UP_RUNS = 100 # Missed firings of a job run at most by the `all` policy
+
+class CatchUpPolicy(CaseInsensitiveEnum):
+    skip = "skip" # Missed firings are dropped, the job waits for the next one
+    once = "once" # A single run makes up for all the missed firings
+    all  = "all"  # Every missed firing is run, one after the other
+
+def next_fire( schedule: str, after: datetime ) -> datetime:
+    """ Returns the first firing of the cron schedule strictly after the input time """
+    return croniter( schedule, after ).get_next( datetime )
+
+def missed_fires( schedule: str, last: datetime, now: datetime ) -> List[datetime]:
+    """ Returns the firings of the cron schedule after `last`, up to `now`
+    included, keeping only the latest MAX_CATCH_UP_RUNS of them. Firings
+    are walked backwards from `now`, so that a long downtime of a job
+    firing every minute does not go through all of its firings. """
+    fires, schedule_iter = [], croniter( schedule, now + timedelta( microseconds=1 ) )
+    while len(fires) < MAX_CATCH_UP_RUNS and \
+            ( fire := schedule_iter.get_prev( datetime ) ) > last:
+        fires.append( fire )
+    return fires[::-1]
+
+def catch_up_fires( policy: CatchUpPolicy, missed: List[datetime] ) -> List[datetime]:
+    """ Returns the missed firings to run according to the policy """
+    if policy is CatchUpPolicy.skip: return []
+    if policy is CatchUpPolicy.once: return missed[-1:]
+    return missed
+
+class TimerQueue:
+    """ Heap of the next firing of each job. Rescheduling a job invalidates
+    its previous entry, which is discarded once it reaches the top. """
+    def __init__( self ):
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._current: Dict[str, int] = dict() # Job name -> sequence of its valid entry
+        self._sequence = itertools.count()
+
+    def __len__( self ) -> int:
+        return len( self._current )
+
+    def schedule( self, name: str, when: datetime ) -> None:
+        sequence = next( self._sequence )
+        self._current[name] = sequence
+        heapq.heappush( self._heap, ( when, sequence, name ) )
+
+    def cancel( self, name: str ) -> None:
+        self._current.pop( name, None )
+
+    def next_time( self ) -> Optional[datetime]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due( self, now: datetime ) -> List[Tuple[str, datetime]]:
+        """ Remove and return the jobs due at the input time, in firing order """
+        due = []
+        while ( when := self.next_time() ) is not None and when <= now:
+            _, _, name = heapq.heappop( self._heap )
+            del self._current[name]
+            due.append( ( name, when ) )
+        return due
+
+    def _discard_stale( self ) -> None:
+        while self._heap and self._current.get( self._heap[0][2] ) != self._heap[0][1]:
+            heapq.heappop( self._heap )
+
+@dataclass
+class SchedulerState:
+    """ The last firing handled for each job, which the missed firings are
+    computed from when the scheduler starts again """
+    last_fires: Dict[str, datetime]
+
+    @staticmethod
+    def load( path: Path ) -> 'SchedulerState':
+        """ Read the state, empty if missing or corrupted """
+        try:
+            data = json.loads( path.read_text( encoding="utf-8" ) )
+            return SchedulerState({
+                name: datetime.fromisoformat( fire ) for name, fire in data["last_fires"].items()
+            })
+        except ( OSError, ValueError, KeyError, TypeError, AttributeError ):
+            return SchedulerState( dict() )
+
+    def save( self, path: Path ) -> None:
+        """ Write the state atomically """
+        data = { "last_fires": { name: fire.isoformat() for name, fire in self.last_fires.items() } }
+        path.parent.mkdir( parents=True, exist_ok=True )
+        tmp_path = path.with_name( f".{path.name}.tmp" )
+        tmp_path.write_text( json.dumps( data, indent=2 ), encoding="utf-8" )
+        os.replace( tmp_path, path )
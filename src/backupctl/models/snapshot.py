@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+
+SNAPSHOT_NAME_FORMAT     = "%Y%m%d-%H%M%S" # Folder name of a snapshot on the remote
+MAX_LINK_DEST            = 20 # rsync accepts at most 20 --link-dest directories
+SNAPSHOT_COMMAND_TIMEOUT = 600 # Seconds before giving up listing or pruning snapshots
+
+# strftime formats identifying the period of a snapshot for each GFS level
+GFS_PERIODS = (
+    ( "hourly",  "%Y%m%d%H" ),
+    ( "daily",   "%Y%m%d" ),
+    ( "weekly",  "%G%V" ),
+    ( "monthly", "%Y%m" ),
+)
+
+def snapshot_name( moment: datetime ) -> str:
+    return moment.strftime( SNAPSHOT_NAME_FORMAT )
+
+def parse_snapshot_name( name: str ) -> Optional[datetime]:
+    """ Returns when the snapshot has been taken, None if the input is
+    not a snapshot folder name. """
+    try:
+        return datetime.strptime( name, SNAPSHOT_NAME_FORMAT )
+    except ValueError:
+        return None
+
+def parse_list_only( output: str ) -> List[str]:
+    """ Returns the snapshot folders, sorted by age, out of the output of
+    `rsync --list-only` listing the destination folder. """
+    names = []
+    for line in output.splitlines():
+        parts = line.split( None, 4 ) # perms, size, date, time, name
+        if len(parts) < 5 or not parts[0].startswith("d"): continue
+        if parse_snapshot_name( parts[4] ) is None: continue
+        names.append( parts[4] )
+    return sorted( names )
+
+def gfs_keep(
+    names: Iterable[str], hourly: int = 0, daily: int = 0, weekly: int = 0, monthly: int = 0
+) -> Set[str]:
+    """ Grandfather-father-son retention: keeps the most recent snapshot
+    of each of the last `hourly` hours, `daily` days, `weekly` ISO weeks
+    and `monthly` months having a snapshot. The most recent snapshot is
+    always kept. """
+    ordered = sorted(
+        ( (parse_snapshot_name(name), name) for name in names
+            if parse_snapshot_name(name) is not None ),
+        reverse=True
+    )
+    if not ordered: return set()
+
+    counts = { "hourly": hourly, "daily": daily, "weekly": weekly, "monthly": monthly }
+    keep = { ordered[0][1] }
+    for level, period in GFS_PERIODS:
+        seen = set()
+        for taken, name in ordered:
+            if len(seen) >= counts[level]: break
+            key = taken.strftime( period )
+            if key in seen: continue
+            seen.add( key )
+            keep.add( name )
+
+    return keep
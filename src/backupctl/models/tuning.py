@@ -0,0 +1,104 @@
+import statistics
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from backupctl.models.journal import read_runs
+from backupctl.utils.units import human_bytes
+
+AUTO = "auto" # The option is decided from the link measures
+
+WAN_RTT_S               = 0.005 # Round trip time above which the remote is not on the LAN
+COMPRESS_MAX_THROUGHPUT = 32 * 1024**2 # Bytes/s above which compressing costs more than it saves
+SLOW_LINK_THROUGHPUT    = 2 * 1024**2 # Bytes/s below which the highest level pays off
+HISTORY_DAYS            = 30 # Days of past runs used to measure the throughput
+HISTORY_RUNS            = 10 # Most recent runs used to measure the throughput
+HISTORY_MIN_BYTES       = 16 * 1024**2 # Runs transferring less are not meaningful
+
+# Compression levels for ( fast, slow ) links of each algorithm
+COMPRESS_LEVELS = { "zstd": ( 3, 9 ), "zlib": ( 6, 9 ) }
+
+# Already compressed formats, which are sent as they are
+SKIP_COMPRESS_SUFFIXES = (
+    "3g2", "3gp", "7z", "aac", "apk", "avi", "bz2", "deb", "docx", "flac", "gif", 
+    "gpg", "gz", "heic", "iso", "jar", "jpeg", "jpg", "lz", "lz4", "lzma", "lzo", 
+    "m4a", "m4v", "mkv", "mov", "mp3", "mp4", "odt", "ogg", "opus", "png", "rar", 
+    "rpm", "tbz", "tgz", "txz", "webm", "webp", "xlsx", "xz", "zip", "zst",
+)
+
+@dataclass
+class LinkProfile:
+    rtt_s           : Optional[float] = None # Round trip time towards the remote
+    throughput      : Optional[float] = None # Effective bytes per second of past runs
+    disk_throughput : Optional[float] = None # Bytes per second read from the sources
+    zstd            : bool = False # True if rsync supports zstd compression
+
+@dataclass
+class TransferTuning:
+    options : List[str] = field(default_factory=list) # rsync options for the run
+    reasons : List[str] = field(default_factory=list) # Why the options have been chosen
+
+def history_throughput( target: str, now: Optional[datetime] = None ) -> Optional[float]:
+    """ Returns the median effective throughput of the most recent successful
+    runs of the target transferring enough data to be meaningful. """
+    since = ( now or datetime.now() ) - timedelta( days=HISTORY_DAYS )
+    throughputs = [ 
+        run.throughput() for run in read_runs( [ target ], since ) 
+        if run.ok() and ( run.bytes_transferred or 0 ) >= HISTORY_MIN_BYTES
+    ]
+    throughputs = [ t for t in throughputs[-HISTORY_RUNS:] if t is not None ]
+    return statistics.median( throughputs ) if throughputs else None
+
+def _rate( value: float ) -> str:
+    return f"{human_bytes(value)}/s"
+
+def _should_compress( profile: LinkProfile ) -> tuple[bool, str]:
+    """ Decide whether compressing pays off on the link, and why """
+    if profile.throughput is not None:
+        slow = profile.throughput < COMPRESS_MAX_THROUGHPUT
+        return slow, f"past runs reached {_rate(profile.throughput)}, " + \
+            ( "below" if slow else "above" ) + f" {_rate(COMPRESS_MAX_THROUGHPUT)}"
+
+    if profile.rtt_s is not None:
+        wan = profile.rtt_s > WAN_RTT_S
+        return wan, f"round trip time is {profile.rtt_s * 1000:.1f}ms, " + \
+            ( "a WAN link" if wan else "a LAN link" )
+
+    return False, "no measure of the link is available"
+
+def tune_transfer( 
+    profile: LinkProfile, compress: bool | str = AUTO, whole_file: bool | str = AUTO
+) -> TransferTuning:
+    """ Choose the compression and the delta-transfer options of a run. Both
+    can be forced by the configuration, otherwise they are decided from the
+    measures of the link and of the source disk. """
+    tuning = TransferTuning()
+
+    if compress == AUTO:
+        compress, reason = _should_compress( profile )
+        tuning.reasons.append( f"{'Compression' if compress else 'No compression'}: {reason}" )
+    else:
+        tuning.reasons.append( f"{'Compression' if compress else 'No compression'}: set by the configuration" )
+
+    if compress:
+        algorithm = "zstd" if profile.zstd else "zlib"
+        slow = profile.throughput is not None and profile.throughput < SLOW_LINK_THROUGHPUT
+        level = COMPRESS_LEVELS[ algorithm ][ 1 if slow else 0 ]
+        tuning.options += [ "--compress", f"--compress-level={level}",
+            f"--skip-compress={'/'.join(SKIP_COMPRESS_SUFFIXES)}" ]
+        if profile.zstd: tuning.options.append( "--compress-choice=zstd" )
+        tuning.reasons.append( f"Compression level {level} ({algorithm})" + 
+            ( ", the link is slow" if slow else "" ) )
+
+    if whole_file == AUTO:
+        known = profile.throughput is not None and profile.disk_throughput is not None
+        whole_file = known and profile.throughput >= profile.disk_throughput
+        reason = "the link or the source disk has not been measured" if not known else \
+            f"link at {_rate(profile.throughput)}, source disk at {_rate(profile.disk_throughput)}"
+        tuning.reasons.append( f"{'Whole files' if whole_file else 'Delta transfer'}: {reason}" )
+    else:
+        tuning.reasons.append( f"{'Whole files' if whole_file else 'Delta transfer'}: set by the configuration" )
+
+    tuning.options.append( "--whole-file" if whole_file else "--no-whole-file" )
+    return tuning
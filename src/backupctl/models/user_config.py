@@ -6,11 +6,21 @@ import os
 import re
 
 from backupctl.models.rsync import DeleteType
-from backupctl.models.notification.webhook import WebhookCfg
-from backupctl.models.notification.email import EmailCfg
+from backupctl.models.retention import ArchiveFormat
+from backupctl.models.admission import OverlapPolicy
+from backupctl.models.snapshot import MAX_LINK_DEST
+from backupctl.models.quorum import QUORUM_ALL
+from backupctl.models.tuning import AUTO
+from backupctl.models.verify import VerifyStrategy
+from backupctl.models.retry import DEFAULT_PARTIAL_DIR, DEFAULT_RETRY_EXIT_CODES
+from backupctl.models.resources import IoniceClass
+from backupctl.models.notification.config import EmailCfg, WebhookCfg, TimeoutField
+from backupctl.utils.units import timeout_seconds
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Union, Dict
-from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
+from typing import Optional, List, Union, Dict, Literal
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator, \
+    computed_field, ByteSize
 
 CronField = Optional[Union[int,str]]
 
@@ -24,6 +34,7 @@ class Remote(BaseModel):
     user: Optional[str] = None # The remote username
     password_file: Optional[str] = None # The password file for non-interactive mode
     dest: RemoteDest # Remote Destination
+    max_sessions: Optional[int] = Field(default=None, ge=1) # Max concurrent rsync sessions
 
     @field_validator("password_file", mode="before")
     @classmethod
@@ -31,14 +42,40 @@ class Remote(BaseModel):
         """ Expand the environment variable if present """
         return os.path.expandvars( path )
 
+class BandwidthWindowCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    start: str # When the window opens (HH:MM, local time)
+    end: str # When the window closes (HH:MM), before start to cross midnight
+    limit: Optional[ByteSize] = None # Bandwidth limit per second, unlimited if null
+
+    @field_validator("start", "end")
+    @classmethod
+    def validate_time( cls, value: str ) -> str:
+        """ Validates the HH:MM format of the window boundaries """
+        try:
+            return datetime.strptime( value.strip(), "%H:%M" ).strftime("%H:%M")
+        except ValueError:
+            raise ValueError(f"'{value}' is not a valid time of day (HH:MM)")
+
+AutoBool = Union[bool, Literal["auto"]]
+
 class RsyncOptions(BaseModel):
-    compress: bool = False # Enable or disable compression before transmitting
+    compress: AutoBool = AUTO # Compression before transmitting, auto from the link measures
+    whole_file: AutoBool = AUTO # Send whole files, auto from the link and disk measures
     verbose: bool = True # Enable/Disable verbosity
     show_progress: bool = True # Show progress while synching
     itemize_changes: bool = False # Show change-summary on all updates
     delete: Optional[DeleteType] = None # Delete mode
     keep_specials: bool=False # Keep specials files
     keep_devices: bool=False # Keep device files
+    workers: int = Field(default=1, ge=1) # Number of concurrent rsync processes
+    bwlimit: Optional[ByteSize] = None # Bandwidth limit per second outside the windows
+    bandwidth_windows: List[BandwidthWindowCfg] = \
+        Field(default_factory=list) # Bandwidth limits by time of day
+    io_timeout: Optional[int] = Field(default=300, ge=1) # Seconds without data before rsync gives up
+    connect_timeout: Optional[int] = Field(default=60, ge=1) # Seconds to connect to the rsync daemon
+    stall_timeout: Optional[int] = Field(default=900, ge=1) # Seconds without activity before killing rsync
 
 class RsyncCfg(BaseModel):
     model_config = ConfigDict(extra="forbid", validate_default=True)
@@ -86,6 +123,7 @@ class Schedule(BaseModel):
     day     : CronField = None # Day of the month Range 1-31
     hour    : CronField = None # Range 0-23
     minute  : CronField = None # Range 0-59
+    overlap : OverlapPolicy = OverlapPolicy.skip # What to do if the previous run is active
 
     @field_validator("weekday", "month", "day", "hour", "minute", mode="before")
     @classmethod
@@ -115,32 +153,181 @@ class Schedule(BaseModel):
 class NotificationCfg(BaseModel):
     email: Optional[EmailCfg] = None # Optional email notification system
     webhooks: Optional[List[WebhookCfg]] = None # Optional list of webhooks endpoints
+    deadline: Optional[TimeoutField] = None # Overall deadline for sending all notifications
+
+    @computed_field
+    @property
+    def deadline_s(self) -> Optional[float]:
+        return timeout_seconds( self.deadline )
 
 class LogRetentionCfg(BaseModel):
     max_spare_files  : int = Field( ge=1 ) # Maximum number of spare files before being archived
     retention_window : int = Field( ge=1 ) # Retention window in days for compressed batch of files.
+    archive_format   : ArchiveFormat = ArchiveFormat.zip # The format of the log archives
+    max_total_bytes  : Optional[ByteSize] = None # Size budget of the logs and archives (e.g. 500MB)
+
+class SnapshotCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    link_dest : int = Field(default=1, ge=1, le=MAX_LINK_DEST) # Previous snapshots to hard-link against
+    hourly    : int = Field(default=0, ge=0) # Number of hourly snapshots to keep
+    daily     : int = Field(default=7, ge=0) # Number of daily snapshots to keep
+    weekly    : int = Field(default=4, ge=0) # Number of weekly snapshots to keep
+    monthly   : int = Field(default=12, ge=0) # Number of monthly snapshots to keep
+
+QuorumField = Union[Literal["all", "any"], int]
+
+class ManifestCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    max_changes    : int = Field(default=1000, ge=1) # Changed paths above which all is synched
+    full_run_hours : int = Field(default=24, ge=1) # Hours between two full runs
+
+class VerifyCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    sample          : int = Field(default=100, ge=1) # Files checked by a sampled verification
+    strategy        : VerifyStrategy = VerifyStrategy.stratified # How the sample is picked
+    after_run       : bool = True # Verify a sample after each successful run
+    full_every_days : Optional[int] = Field(default=30, ge=1) # Days between full verifications
+
+class RetryCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    max_attempts   : int = Field(default=3, ge=1) # Attempts of each rsync process, the first included
+    backoff        : float = Field(default=30.0, ge=0) # Seconds before the second attempt
+    backoff_factor : float = Field(default=2.0, ge=1) # Growth of the backoff at each attempt
+    max_backoff    : float = Field(default=600.0, ge=0) # Maximum seconds between two attempts
+    exit_codes     : List[int] = \
+        Field(default_factory=lambda: list(DEFAULT_RETRY_EXIT_CODES)) # Retryable rsync exit codes
+    partial_dir    : Optional[str] = DEFAULT_PARTIAL_DIR # Partial files kept to resume, null to restart
+
+    @field_validator("partial_dir")
+    @classmethod
+    def relative_partial_dir(cls, value: Optional[str]) -> Optional[str]:
+        """ A relative folder is created, and protected from deletions, in
+        each folder of the destination holding a partial file """
+        if value is not None and ( not value.strip() or value.startswith("/") ):
+            raise ValueError("partial_dir must be a relative folder name")
+        return value
+
+class IoMaxCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    device : str # Block device, or any path on its filesystem, to throttle
+    rbps   : Optional[ByteSize] = None # Bytes read per second, unlimited if null
+    wbps   : Optional[ByteSize] = None # Bytes written per second, unlimited if null
+    riops  : Optional[int] = Field(default=None, ge=1) # Read operations per second
+    wiops  : Optional[int] = Field(default=None, ge=1) # Write operations per second
+
+class CgroupCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    parent      : str # Delegated cgroup v2 folder the sub-group of each run is created into
+    memory_high : Optional[ByteSize] = None # Memory, page cache included, above which rsync is throttled
+    io_max      : List[IoMaxCfg] = Field(default_factory=list) # Disk throughput and IOPS limits
+
+    @field_validator("parent")
+    @classmethod
+    def absolute_parent(cls, value: str) -> str:
+        if not value.startswith("/"):
+            raise ValueError("parent must be an absolute path, e.g. /sys/fs/cgroup/backup.slice")
+        return value
+
+class ResourcesCfg(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    nice         : Optional[int] = Field(default=None, ge=-20, le=19) # Niceness of rsync
+    ionice_class : Optional[IoniceClass] = None # I/O scheduling class of rsync
+    ionice_level : Optional[int] = Field(default=None, ge=0, le=7) # Level of the class, 0 is the highest
+    cpus         : List[int] = Field(default_factory=list) # CPUs rsync may run on, all if empty
+    cgroup       : Optional[CgroupCfg] = None # cgroup v2 limits, on hosts with a delegated cgroup
+    drop_cache   : bool = False # Drop the cached pages of the files once sent
+
+    @field_validator("cpus")
+    @classmethod
+    def validate_cpus(cls, value: List[int]) -> List[int]:
+        if any( cpu < 0 for cpu in value ): raise ValueError("cpus must be CPU numbers")
+        return value
+
+    @model_validator(mode="after")
+    def validate_ionice(self) -> 'ResourcesCfg':
+        """ The level only applies to the realtime and best-effort classes """
+        if self.ionice_level is not None and self.ionice_class in ( None, IoniceClass.idle ):
+            raise ValueError("ionice_level needs the realtime or best-effort ionice_class")
+        return self
 
 class Target(BaseModel):
     model_config = ConfigDict(extra="forbid")
     
-    remote: Remote # The remote rsync host
+    remote: Union[Remote, List[Remote]] # The remote rsync host, or hosts synched concurrently
+    quorum: QuorumField = QUORUM_ALL # Remotes that must succeed: all, any or N
     rsync: RsyncCfg # rsync configuration
     schedule: Schedule # Schedule configuration
     notification: Optional[NotificationCfg]=None # The optional notification system
     log_retention: Optional[LogRetentionCfg] = LogRetentionCfg(
         max_spare_files=10, retention_window=7
     )
+    snapshot: Optional[SnapshotCfg] = None # Hard-link snapshots instead of a mirror
+    replicas: List[Remote] = Field(default_factory=list) # Remotes receiving the same delta
+    manifest: Optional[ManifestCfg] = None # Skip or shrink runs whose sources barely changed
+    verify: Optional[VerifyCfg] = None # Checksum verification of the remote copy
+    retry: Optional[RetryCfg] = None # Retry policy of the rsync processes failing transiently
+    resources: Optional[ResourcesCfg] = None # CPU, disk and memory settings of the rsync processes
+
+    @model_validator(mode="after")
+    def validate_remotes(self) -> 'Target':
+        """ Checks the quorum against the remotes. Snapshots are prepared and
+        pruned against a single remote, hence they need a single remote. The
+        remotes sharing a host:port are synched concurrently, hence the host
+        must allow a session for each of them. """
+        remotes = self.remotes()
+        if not remotes: raise ValueError("at least one remote is required")
+        for remote in remotes:
+            shared = sum( ( r.host, r.port ) == ( remote.host, remote.port ) for r in remotes )
+            if remote.max_sessions is not None and shared > remote.max_sessions:
+                raise ValueError(f"{remote.host}:{remote.port} receives {shared} remotes " +\
+                    f"concurrently, max_sessions must be at least {shared}")
+        if isinstance(self.quorum, int) and not 1 <= self.quorum <= len(remotes):
+            raise ValueError(f"quorum must be between 1 and {len(remotes)}, the number of remotes")
+        if len(remotes) > 1 and self.snapshot is not None:
+            raise ValueError("snapshot cannot be used with more than one remote")
+        return self
+
+    @model_validator(mode="after")
+    def validate_manifest(self) -> 'Target':
+        """ Each snapshot must hold all the sources, not only the changed ones """
+        if self.manifest is not None and self.snapshot is not None:
+            raise ValueError("manifest cannot be used together with snapshot")
+        return self
+
+    @model_validator(mode="after")
+    def validate_replicas(self) -> 'Target':
+        """ Snapshots are written into a new folder at each run, whose link
+        references differ among the remotes, hence they cannot be replayed """
+        if self.replicas and self.snapshot is not None:
+            raise ValueError("replicas cannot be used together with snapshot")
+        return self
+
+    def remotes(self) -> List[Remote]:
+        """ Returns the remotes synched concurrently, the first is the main one """
+        return self.remote if isinstance(self.remote, list) else [ self.remote ]
 
 class NamedTarget(Target):
     """ Just a wrapper around target that also includes the name """
     name: str
+    log_max_total_bytes: Optional[int] = None # The size budget of all the log folders
 
     @classmethod
-    def from_target(cls, name: str, target: Target) -> 'NamedTarget':
-        return cls.model_construct( **target.__dict__, name=name )
+    def from_target(
+        cls, name: str, target: Target, log_max_total_bytes: Optional[int] = None
+    ) -> 'NamedTarget':
+        return cls.model_construct( **target.__dict__, name=name,
+            log_max_total_bytes=log_max_total_bytes )
 
 class BackupCfg(BaseModel):
     exclude_output: Optional[str] = None
+    log_max_total_bytes: Optional[ByteSize] = None # Size budget of the logs of all the targets
     targets: Optional[Dict[str, Target]] = None
 
 class YAML_Conf(BaseModel):
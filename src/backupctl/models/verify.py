@@ -0,0 +1,98 @@
+import random
+import re
+import stat
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Optional
+
+from backupctl.utils.scan import ScanEntry
+
+# Lines of --itemize-changes for regular files that would be sent, i.e.
+# missing on the destination or whose checksum differs from the source one
+ITEMIZED_FILE = re.compile( r"^[<>]f\S{7,9} (.+)$" )
+MAX_REPORTED_MISMATCHES = 20 # Mismatched paths written in the summary
+
+class VerifyStrategy(str, Enum):
+    random     = "random"     # Uniform sample of the files
+    stratified = "stratified" # Proportional sample of each size class
+
+@dataclass
+class VerifyResult:
+    started    : datetime # When the verification has been started
+    finished   : datetime # When the verification has finished
+    full       : bool     # True if all the files have been verified
+    candidates : int      # Files not verified since they last changed
+    checked    : int      # Files compared against the destination
+    mismatched : List[str] = field(default_factory=list) # Files differing on the destination
+    error      : Optional[str] = None # Why the comparison could not complete
+
+    def ok( self ) -> bool:
+        return self.error is None and not self.mismatched
+
+    def summary( self, log_file: Optional[str] = None ) -> str:
+        kind = "full" if self.full else "sampled"
+        status = "✅ VERIFIED" if self.ok() else "❌ VERIFICATION FAILED"
+        lines = [
+            f"{status} ({kind})",
+            f"Checked : {self.checked:,} of {self.candidates:,} unverified files",
+            f"Mismatch: {len(self.mismatched):,}",
+        ]
+        if self.error is not None: lines.append( f"Error   : {self.error}" )
+        lines.extend( f"  - {path}" for path in self.mismatched[:MAX_REPORTED_MISMATCHES] )
+        if len(self.mismatched) > MAX_REPORTED_MISMATCHES:
+            lines.append( f"  ... and {len(self.mismatched) - MAX_REPORTED_MISMATCHES:,} more" )
+        lines.extend([
+            f"Started : {self.started}",
+            f"Finished: {self.finished}",
+        ])
+        if log_file is not None: lines.append( f"Log file: {log_file}" )
+        return "\n".join( lines )
+
+def regular_files( entries: List[ScanEntry] ) -> List[ScanEntry]:
+    return [ e for e in entries if stat.S_ISREG( e.mode ) ]
+
+def size_class( size: int ) -> int:
+    """ Size classes grow by a factor of four: <4B, <16B, <64B and so on """
+    return size.bit_length() // 2
+
+def sample_entries(
+    entries: List[ScanEntry], count: int, strategy: VerifyStrategy,
+    rng: random.Random | None = None
+) -> List[ScanEntry]:
+    """ Pick `count` entries. The stratified strategy splits the entries by
+    size class and samples each class proportionally, with at least one
+    entry per class, so that the few large files and the many small ones
+    are both verified. Returns the sample sorted by path. """
+    rng = rng or random.Random()
+    if count >= len(entries): return sorted( entries )
+    if strategy is VerifyStrategy.random:
+        return sorted( rng.sample( entries, count ) )
+
+    strata: Dict[int, List[ScanEntry]] = dict()
+    for entry in entries:
+        strata.setdefault( size_class(entry.size), [] ).append( entry )
+
+    sample = []
+    for stratum in strata.values():
+        share = max( 1, round( count * len(stratum) / len(entries) ) )
+        sample.extend( rng.sample( stratum, min( share, len(stratum) ) ) )
+
+    # Rounding and the minimum share may overshoot the requested count
+    if len(sample) > count: sample = rng.sample( sample, count )
+    return sorted( sample )
+
+def parse_mismatches( output: str ) -> List[str]:
+    """ Returns the files listed by a --checksum --dry-run --itemize-changes run """
+    return [
+        match.group(1) for line in output.splitlines()
+        if ( match := ITEMIZED_FILE.match( line ) ) is not None
+    ]
+
+def full_verification_due(
+    last_full: Optional[datetime], full_every_days: Optional[int], now: datetime
+) -> bool:
+    """ Check whether the cadence of the full verifications has expired """
+    if full_every_days is None: return False
+    return last_full is None or now - last_full >= timedelta( days=full_every_days )
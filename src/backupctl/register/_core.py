@@ -37,7 +37,7 @@ def parse_input_arguments( args: argparse.Namespace ) -> Args:
         InputValidationError,
     )
 
-    return Args( Path(args.config).absolute(), args.verbose )
+    return Args( Path(args.config).absolute(), args.verbose, JobBackend(args.backend.upper()) )
 
 def preprocess_excludes_includes( rsync: RsyncCfg ) -> None:
     """ Preprocess all excludes and includes by flattening all the excludes
@@ -100,14 +100,17 @@ def generate_exclude_file( exclude_out_folder: str | None, target_name: str, rsy
         raise PermissionDeniedError("Permission Error")
 
 def create_cronjob( name: str, backup_conf_path: Path, schedule: Schedule, args: Args ) -> None:
-    """ Registers a new cronjobs if it does not exists yet """
+    """ Registers a new cronjobs if it does not exists yet. Jobs fired by the
+    scheduler daemon are registered with the same command, which the daemon
+    reads the schedule and the flags from, while their crontab entry, if
+    any, is removed. """
     # Format the correct cron command
     cron_command = f"{schedule.to_cron()} {BACKUPCTL_RUN_COMMAND} run --log --notify {name}"
 
     registered = load_registry( REGISTERED_JOBS_FILE ) # Get all registered jobs
     curr_crontab_list = get_crontab_list() # Read the current crontab. Empty is OK
 
-    current_job = Job( name, cron_command, JobStatusType.enabled )
+    current_job = Job( name, cron_command, JobStatusType.enabled, args.backend )
 
     if name in registered:
         registered_job = registered[name]
@@ -115,11 +118,13 @@ def create_cronjob( name: str, backup_conf_path: Path, schedule: Schedule, args:
             cinfo(f"[*] Automation Task {name} already registered")
             cinfo(f"    Registry Command: {registered_job.cmd}")
             cinfo(f"    Registry Status : {registered_job.status.value}")
+            cinfo(f"    Registry Backend: {registered_job.backend.value}")
             cinfo(f"\n[*] Checking consistency with the crontab list")
     else:
         if args.verbose:
             cinfo(f"[*] Registering for {name}")
             cinfo(f"    Command: {cron_command}")
+            cinfo(f"    Backend: {args.backend.value}")
 
     make_job_consistent(current_job, curr_crontab_list)
     registered[name] = current_job
@@ -152,9 +157,11 @@ def generate_automation( target: NamedTarget, args: Args ) -> None:
     create_automation_task( target.name, plan_conf_path, target.schedule, args )
 
 @assertion_wrapper
-def consume_backup_target( name: str, target: Target, args: Args ) -> bool:
+def consume_backup_target( 
+    name: str, target: Target, args: Args, log_max_total_bytes: Optional[int] = None
+) -> bool:
     cinfo("\n" + "-" * 20 + f" TARGET: {name} " + "-" * 20)
-    target = NamedTarget.from_target(name, target)
+    target = NamedTarget.from_target(name, target, log_max_total_bytes)
 
     # First we need to validate the remaining part of the configuration
     # which does not depend on the YAML structure
@@ -185,7 +192,8 @@ def create_backups( conf: YAML_Conf, args: Args ) -> None:
         if not target.rsync.exclude_output_folder:
             target.rsync.exclude_output_folder = exclude_out_folder
 
-        result = consume_backup_target( target_name, target, args )
+        result = consume_backup_target( target_name, target, args, 
+            conf.backup.log_max_total_bytes )
         if not result:
             cerror("[*] FAILED ... Skipping to the next one")
             continue
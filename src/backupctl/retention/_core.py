@@ -0,0 +1,262 @@
+import os
+import subprocess
+import sys
+import tarfile
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from backupctl.constants import DEFAULT_LOG_FOLDER, DEFAULT_PLAN_CONF_FOLDER, \
+    DEFAULT_PLAN_SUFFIX
+from backupctl.models.plan_config import LogCfg, load_plan_configuration
+from backupctl.models.retention import ARCHIVE_DATE_FORMAT, ArchiveEntry, \
+    ArchiveFormat, LogEntry, RetentionIndex, retention_lock, retention_run_lock
+from backupctl.utils.console import cinfo, cwarn
+from backupctl.utils.units import human_bytes
+
+try:
+    import zstandard
+except ImportError: # Optional dependency, installed with the `zstd` extra
+    zstandard = None
+
+RETENTION_OUTPUT_NAME = ".retention.out" # Output of the detached retention process
+ZSTD_LEVEL            = 3                # Zstandard compression level of the archives
+
+def archive_name( group: List[LogEntry], archive_format: ArchiveFormat, taken: Set[str] ) -> str:
+    """ Returns the name of the archive of the input group of logs, named
+    after the date range of the group. A counter is appended to the name
+    when an archive with the same range already exists. """
+    first_datetime = group[0].created.strftime( ARCHIVE_DATE_FORMAT )
+    last_datetime  = group[-1].created.strftime( ARCHIVE_DATE_FORMAT )
+    stem, counter = f"log_archive-{first_datetime}-{last_datetime}", 1
+    name = f"{stem}{archive_format.suffix}"
+    while name in taken:
+        counter += 1
+        name = f"{stem}-{counter}{archive_format.suffix}"
+
+    return name
+
+def write_archive(
+    log_folder: Path, log_names: List[str], name: str, 
+    archive_format: ArchiveFormat, threads: int = 0
+) -> int:
+    """ Write the log files into the archive and returns its size. Data is
+    written into a hidden temporary file, synced and then renamed, so that
+    an interrupted run never leaves a partial archive. Logs are not removed
+    by this function. Threads is the number of zstd compression threads
+    (-1 for all cores). """
+    tmp_file = log_folder / f".{name}.tmp"
+    log_files = [ log_folder / n for n in log_names if ( log_folder / n ).exists() ]
+
+    try:
+        with open( tmp_file, "wb" ) as raw:
+            if archive_format is ArchiveFormat.zip:
+                with ZipFile( raw, "w", compression=ZIP_DEFLATED ) as zipf:
+                    for log_file in log_files: zipf.write( log_file )
+            else:
+                compressor = zstandard.ZstdCompressor( level=ZSTD_LEVEL, threads=threads )
+                with compressor.stream_writer( raw, closefd=False ) as zstf, \
+                     tarfile.open( fileobj=zstf, mode="w|" ) as tarf:
+                    for log_file in log_files: tarf.add( log_file )
+
+            raw.flush()
+            os.fsync( raw.fileno() )
+            size = os.fstat( raw.fileno() ).st_size
+
+        os.replace( tmp_file, log_folder / name )
+        return size
+    except BaseException:
+        tmp_file.unlink( missing_ok=True )
+        raise
+
+def _write_archives(
+    log_folder: Path, groups: List[List[LogEntry]], names: List[str],
+    archive_format: ArchiveFormat
+) -> List[Optional[int]]:
+    """ Write all the archives, in parallel among processes if more than
+    one. Returns for each group the size of its archive, or None if the
+    archive has not been written. """
+    jobs = [ [ e.name for e in group ] for group in groups ]
+    if len( groups ) == 1:
+        try:
+            return [ write_archive( log_folder, jobs[0], names[0], archive_format, threads=-1 ) ]
+        except Exception as e:
+            cwarn(f"[*] Cannot write the archive {names[0]}: {e}")
+            return [ None ]
+
+    written = []
+    max_workers = min( len( groups ), os.cpu_count() or 1 )
+    with ProcessPoolExecutor( max_workers=max_workers ) as executor:
+        futures = [ 
+            executor.submit( write_archive, log_folder, log_names, name, archive_format )
+            for log_names, name in zip( jobs, names )
+        ]
+
+        for future, name in zip( futures, names ):
+            try:
+                written.append( future.result() )
+            except Exception as e:
+                cwarn(f"[*] Cannot write the archive {name}: {e}")
+                written.append( None )
+
+    return written
+
+def _archive_format( value: str ) -> ArchiveFormat:
+    archive_format = ArchiveFormat( value )
+    if archive_format is ArchiveFormat.tar_zst and zstandard is None:
+        cwarn("[*] zstandard is not installed, archiving logs as zip")
+        return ArchiveFormat.zip
+    return archive_format
+
+def _archive_names(
+    index: RetentionIndex, groups: List[List[LogEntry]], archive_format: ArchiveFormat
+) -> List[str]:
+    """ Returns the name of the archive of each group of logs """
+    taken, names = { e.name for e in index.archives }, []
+    for group in groups:
+        names.append( archive_name( group, archive_format, taken ) )
+        taken.add( names[-1] )
+    return names
+
+def _record_archives(
+    index: RetentionIndex, groups: List[List[LogEntry]], names: List[str],
+    written: List[Optional[int]]
+) -> None:
+    """ Replace the logs of the written archives with the archives into the
+    index. Logs evicted meanwhile, e.g. by the global budget, are skipped. """
+    logs = { e.name: e for e in index.logs }
+    for group, name, size in zip( groups, names, written ):
+        if size is None: continue
+        for log_entry in group:
+            if log_entry.name in logs: index.evict( logs[log_entry.name] )
+        index.add_archive( ArchiveEntry( name,
+            group[0].created.date(), group[-1].created.date(), size ) )
+
+def _enforce_budget( index: RetentionIndex, max_total_bytes: int ) -> None:
+    """ Evict the oldest entries of the index until its total size fits
+    into the budget """
+    total = index.total_size()
+    for entry in index.eviction_order():
+        if total <= max_total_bytes: break
+        index.evict( entry )
+        total -= entry.size or 0
+
+    if total > max_total_bytes:
+        cwarn(f"[*] The latest log of {index.folder} alone exceeds the size " +\
+            f"budget ({human_bytes(total)} > {human_bytes(max_total_bytes)})")
+
+def apply_global_log_budget( root: Path, max_total_bytes: int ) -> None:
+    """ Enforce a size budget over the log folders of all the targets under
+    the root folder. The oldest archives are evicted first, then the oldest
+    logs, regardless of the target they belong to. The most recent log of
+    each target is always kept. Sizes are taken from the indexes, except
+    for the most recent logs which may still be written. """
+    if not root.is_dir(): return
+
+    total, candidates = 0, []
+    for folder in ( p for p in root.iterdir() if p.is_dir() ):
+        with retention_lock( folder ):
+            index = RetentionIndex.load( folder )
+            index.record_sizes()
+            index.save()
+
+        total += index.total_size()
+        for entry in index.eviction_order():
+            is_log = isinstance( entry, LogEntry )
+            timestamp = entry.created if is_log else datetime.combine( entry.last, time.max )
+            candidates.append( ( is_log, timestamp, folder, entry ) )
+
+    # Select the entries to evict, then remove them folder by folder
+    evictions: Dict[Path, Set[str]] = {}
+    for _, _, folder, entry in sorted( candidates, key=lambda x: x[:2] ):
+        if total <= max_total_bytes: break
+        evictions.setdefault( folder, set() ).add( entry.name )
+        total -= entry.size or 0
+
+    for folder, names in evictions.items():
+        with retention_lock( folder ):
+            index = RetentionIndex.load( folder )
+            for entry in index.eviction_order():
+                if entry.name in names: index.evict( entry )
+            index.save()
+
+def _update_index(
+    log_folder: Path, retention_cfg: LogCfg, groups: List[List[LogEntry]],
+    names: List[str], written: List[Optional[int]]
+) -> None:
+    """ Record the written archives, then remove the expired archives and
+    the entries exceeding the size budget. Must hold the lock of the index. """
+    index = RetentionIndex.load( log_folder )
+    _record_archives( index, groups, names, written )
+
+    # Next step of the retention policy is to remove archives
+    # that has exceeded the maximum retention time
+    now = date.today() # Take the current time for computing delta days
+    for archive in list( index.archives ):
+        days_passed = ( now - archive.last ).days
+        if days_passed >= retention_cfg.retention_window:
+            index.evict( archive )
+
+    # Finally, evict the oldest archives and logs exceeding the size budget
+    index.record_sizes()
+    if retention_cfg.max_total_bytes is not None:
+        _enforce_budget( index, retention_cfg.max_total_bytes )
+
+    index.save()
+
+def apply_log_retention( log_folder: Path, retention_cfg: LogCfg ) -> None:
+    """ Apply the log retention policy to the log folder of a target. The
+    decisions are taken on the retention index, hence the folder content
+    is never listed except when the index is built the first time. The
+    lock of the index is not held while the archives are written, so that
+    the next runs of the target register their logs without waiting. """
+    with retention_run_lock( log_folder ):
+        with retention_lock( log_folder ):
+            index = RetentionIndex.load( log_folder )
+
+            # The most recent log file is always kept. For each group of the 
+            # previous ones ( which dimension is defined by the retention
+            # policy ) creates a corresponding archive.
+            previous_log_files, groups = index.logs[:-1], []
+            while len( previous_log_files ) >= retention_cfg.max_spare_files:
+                groups.append( previous_log_files[:retention_cfg.max_spare_files] )
+                previous_log_files = previous_log_files[retention_cfg.max_spare_files:]
+
+            archive_format = _archive_format( retention_cfg.archive_format ) if groups else None
+            names = _archive_names( index, groups, archive_format ) if groups else []
+
+        # Logs are removed only once their archive has been written
+        written = _write_archives( log_folder, groups, names, archive_format ) if groups else []
+        with retention_lock( log_folder ):
+            _update_index( log_folder, retention_cfg, groups, names, written )
+
+def apply_target_log_retention( target: str ) -> None:
+    """ Apply the log retention policy of the input target """
+    target_conf_path = DEFAULT_PLAN_CONF_FOLDER / f"{target}{DEFAULT_PLAN_SUFFIX}"
+    plan_configuration = load_plan_configuration( target_conf_path )
+    cinfo(f"[*] Applying log retention policy of {target}")
+    apply_log_retention( Path( plan_configuration.log.path ), plan_configuration.log )
+
+    global_budget = plan_configuration.log.global_max_total_bytes
+    if global_budget is not None:
+        apply_global_log_budget( DEFAULT_LOG_FOLDER, global_budget )
+
+def spawn_log_retention( target: str, log_folder: Path ) -> int:
+    """ Apply the log retention policy of the target into a detached
+    process, so that the caller does not wait for it. The output of the
+    process is written into the log folder. Returns its pid. """
+    # The PyInstaller bundle is the backupctl executable itself
+    command = [ sys.executable ] if getattr( sys, "frozen", False ) \
+        else [ sys.executable, "-m", "backupctl" ]
+
+    with open( log_folder / RETENTION_OUTPUT_NAME, "w" ) as output:
+        process = subprocess.Popen(
+            command + [ "retention", target ],
+            stdin=subprocess.DEVNULL, stdout=output, stderr=subprocess.STDOUT,
+            start_new_session=True, env={ **os.environ, "BACKUPCTL_RICH": "0" }
+        )
+
+    return process.pid
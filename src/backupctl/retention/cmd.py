@@ -0,0 +1,9 @@
+import argparse
+
+from backupctl.utils.exceptions import assertion_wrapper
+from ._core import apply_target_log_retention
+
+
+@assertion_wrapper
+def run(args: argparse.Namespace) -> None:
+    apply_target_log_retention(args.target)
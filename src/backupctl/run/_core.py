@@ -1,19 +1,53 @@
+import shutil
 import subprocess
+import tempfile
+import time
 import sys
 import os
 
-from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import List, Tuple
-from zipfile import ZipFile, ZIP_DEFLATED
+from typing import Dict, Iterator, List, Optional, Tuple, TextIO
 
-from backupctl.models.plan_config import PlanCfg, load_plan_configuration, LogCfg
-from backupctl.constants import DEFAULT_PLAN_CONF_FOLDER, DEFAULT_PLAN_SUFFIX
+from backupctl.models.plan_config import PlanCfg, ReplicaCfg, load_plan_configuration
+from backupctl.constants import DEFAULT_PLAN_CONF_FOLDER, DEFAULT_PLAN_SUFFIX, \
+    DEFAULT_NOTIFICATION_DEADLINE, RUN_LOCK_FOLDER
 from backupctl.models.notification import NotificationCls, Event, EventType
 from backupctl.models.notification.email import EmailNotification, Emailer
-from backupctl.models.notification.webhook import WebhookNotification
-from backupctl.models.notification.wh_dispatcher import WebhookDispatcher
-from backupctl.utils.console import cinfo
+from backupctl.models.notification.webhook import WebhookNotification, WebhookStatus
+from backupctl.models.rsync import RSyncStatus, RSyncStats
+from backupctl.models.admission import OverlapPolicy
+from backupctl.models.bandwidth import BandwidthSchedule, bwlimit_option
+from backupctl.models.journal import RunRecord, append_run, failed_snapshots
+from backupctl.models.progress import ProgressPublisher, ProgressScope, ProgressTracker
+from backupctl.models.quorum import quorum_reached, quorum_size
+from backupctl.models.tuning import AUTO, LinkProfile, TransferTuning, \
+    history_throughput, tune_transfer
+from backupctl.models.manifest import SourceManifest, TransferMode, diff_manifests, \
+    manifest_file
+from backupctl.models.retention import register_log_file
+from backupctl.models.retry import RetryPolicy
+from backupctl.models.verify import VerifyResult
+from backupctl.models.snapshot import SNAPSHOT_COMMAND_TIMEOUT, gfs_keep, \
+    parse_list_only, snapshot_name
+from backupctl.retention._core import spawn_log_retention
+from backupctl.utils.process import StreamResult, stream_command
+from backupctl.utils.resources import ResourceGovernor
+from backupctl.utils.partition import balanced_partition, tree_size
+from backupctl.utils.rsync import set_rsync_options, split_rsync_command, \
+    snapshot_command, list_dest_command, delete_dest_folders_command, \
+    remove_rsync_options, replica_command, read_batch_command, source_base, source_roots, \
+    files_from_command, timeout_options, lists_names, deletes_extraneous
+from backupctl.utils.concurrency import TaskResult, run_with_deadline
+from backupctl.utils.lock import SlotPool
+from backupctl.utils.probe import disk_read_throughput, rsync_compress_choices, tcp_rtt
+from backupctl.utils.scan import scan_sources
+from backupctl.utils.console import cinfo, cwarn
+from backupctl.utils.units import human_bytes
 
 def make_log_file(conf: PlanCfg, suffix: str = ".log") -> Path:
     """ Create the log file into the input base folder """
@@ -22,179 +56,1007 @@ def make_log_file(conf: PlanCfg, suffix: str = ".log") -> Path:
     log_file = base_dir / f"{conf.name}-{ts}{suffix}"
     base_dir.mkdir(parents=True, exist_ok=True)
     log_file.touch(exist_ok=True)
+    register_log_file(log_file)
     return log_file
 
-def run_backup_command( command: List[str], log_file: Path | None ) -> Tuple[bool, str]:
+@dataclass
+class CommandRun:
+    command  : List[str]    # The executed command
+    started  : datetime     # When the command has been started
+    finished : datetime     # When the command has finished
+    output   : StreamResult # Return code and last part of the output
+    status   : RSyncStatus  # The status inferred from the output
+    stats    : Optional[RSyncStats] = None # The transfer metrics if printed
+    attempts : int = 1 # Attempts needed by the command, restarts excluded
+
+    def ok(self) -> bool:
+        return self.output.return_code == 0
+    
+    def duration(self) -> timedelta:
+        return self.finished - self.started
+
+@dataclass
+class BackupResult:
+    ok          : bool          # True if the backup succeeded
+    summary     : str           # Human readable summary of the run
+    started     : datetime      # When the backup has been started
+    finished    : datetime      # When the backup has finished
+    return_code : int           # The (aggregated) exit code of rsync
+    status      : RSyncStatus   # The (aggregated) rsync status
+    error       : Optional[str] = None # The last error line printed by rsync
+    stats       : Optional[RSyncStats] = None # The (aggregated) transfer metrics
+
+@dataclass
+class SnapshotRun:
+    name     : str       # The snapshot written by the run
+    existing : List[str] # The snapshots already on the remote, by age
+    complete : List[str] # The existing snapshots written by successful runs
+
+@dataclass
+class ReplicaRun:
+    replica  : ReplicaCfg # The destination of the replica
+    run      : CommandRun # The last command run towards the replica
+    replayed : bool       # True if the batch has been replayed
+
+@dataclass
+class SourceScan:
+    manifest  : SourceManifest | None # The sources as scanned before the run, if scanned
+    mode      : TransferMode   # How the sources are going to be transferred
+    reason    : str            # Why the mode has been chosen
+    base      : str | None = None # The folder the changed paths are relative to
+    changed   : List[str] = field(default_factory=list) # The paths of an incremental run
+    recursive : bool = False   # Changed folders are sent with all their content
+
+@dataclass
+class Transfer:
+    command     : List[str] # The rsync command run by a single worker
+    description : str       # What the worker is going to transfer
+
+def _restart_command( command: List[str] ) -> List[str]:
+    """ Returns the command restarting an interrupted transfer, keeping the
+    partial files. A restarted transfer does not write its batch, which
+    would only hold the delta of the last attempt, and the batch file is
+    removed. """
+    if not any( arg.startswith("--partial-dir=") for arg in command ):
+        command = set_rsync_options( command, "--partial" )
+    batch = next( ( arg.split("=", 1)[1] for arg in command 
+        if arg.startswith("--write-batch=") ), None )
+    if batch is not None:
+        Path( batch ).unlink( missing_ok=True )
+        command = remove_rsync_options( command, "--write-batch" )
+    return command
+
+def execute_command( 
+    command: List[str], log: TextIO, progress: ProgressTracker | None = None,
+    bandwidth: BandwidthSchedule | None = None, retry: RetryPolicy | None = None,
+    stall_timeout: float | None = None, resources: ResourceGovernor | None = None
+) -> CommandRun:
+    """ Run the command and write its output into the log stream. Progress
+    updates printed by rsync are forwarded to the tracker if given. With a
+    bandwidth schedule, rsync runs with the limit of the current window and
+    it is restarted with --partial, at the new limit, when the limit changes.
+    With a retry policy, the partial files are kept into its --partial-dir
+    and a transient failure is retried after the backoff of the policy, so
+    that large files are resumed. Every attempt is written into the log,
+    only the last one is returned. A process with no activity for the
+    stall timeout is killed and reported as stalled. The resource governor,
+    if given, applies the resource settings of the plan to each process. """
+    started, attempt, attempts = None, command, 1
+    if retry is not None and retry.partial_dir is not None:
+        attempt = set_rsync_options( attempt, f"--partial-dir={retry.partial_dir}" )
+
+    while True:
+        now, deadline = datetime.now(), None
+        if bandwidth is not None:
+            attempt = set_rsync_options( attempt, bwlimit_option( bandwidth.limit_at(now) ) )
+            change = bandwidth.next_change( now )
+            if change is not None:
+                deadline = time.monotonic() + ( change - now ).total_seconds()
+
+        run = _execute_once( attempt, log, progress, deadline, stall_timeout, resources )
+        started = started or run.started
+        if run.ok(): break
+
+        if run.output.interrupted:
+            log.write("\n===== BANDWIDTH WINDOW CHANGED: RESTARTING THE TRANSFER =====\n\n")
+        elif retry is not None and attempts < retry.max_attempts and \
+                retry.retryable( run.output.return_code, run.status ):
+            delay = retry.delay( attempts )
+            attempts += 1
+            log.write(f"\n===== EXIT CODE {run.output.return_code} ({run.status.value}): "
+                f"ATTEMPT {attempts}/{retry.max_attempts} IN {delay:.0f}s =====\n\n")
+            log.flush()
+            time.sleep( delay )
+        else:
+            break
+
+        attempt = _restart_command( attempt )
+
+    run.started = started
+    run.attempts = attempts
+    return run
+
+def _execute_once( 
+    command: List[str], log: TextIO, progress: ProgressTracker | None, 
+    deadline: float | None, stall_timeout: float | None = None,
+    resources: ResourceGovernor | None = None
+) -> CommandRun:
+    """ Run the command once, terminating it at the deadline if given """
     started = datetime.now()
+    log.write(f"Started : {started.isoformat()}\n")
+    log.write(f"Command : {" ".join(command)}\n")
+    log.flush()
 
-    try:
+    # The resource settings are applied to the started process, then read back
+    def on_start( pid: int ) -> None:
+        if resources is not None:
+            resources.apply( pid )
+            log.write(f"Resources: {resources.describe(pid)}\n")
+        log.write("\n----- STDOUT -----\n")
+        log.flush()
 
-        log = sys.stdout if not log_file else log_file.open("w", encoding="utf-8")
-        log.write(f"Started : {started.isoformat()}\n")
-        log.write(f"Command : {" ".join(command)}\n\n")
+    dropper = None if resources is None else \
+        resources.page_cache_dropper( list( source_roots(command) ) )
+    feeds = [ sink.feed for sink in ( progress, dropper ) if sink is not None ]
+    def on_stdout( text: str ) -> None:
+        for feed in feeds: feed( text )
 
-        out = subprocess.run(command, capture_output=True, text=True, check=False)
-        log.write("----- STDOUT -----\n")
-        log.write(str(out.stdout))
+    # The stdout goes straight into the log while the process runs. The
+    # stderr is spooled on disk and copied afterwards into its own section
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as stderr_spool:
+        out = stream_command(command, log, stderr_spool, on_stdout=on_stdout if feeds else None, 
+            deadline=deadline, stall_timeout=stall_timeout, on_start=on_start)
         log.write("\n")
         log.write("----- STDERR -----\n")
-        log.write(str(out.stderr))
+        stderr_spool.seek(0)
+        shutil.copyfileobj(stderr_spool, log)
         log.write("\n")
         log.write("----- END STDERR -----\n")
-        
-        return_code = out.returncode
-        finished = datetime.now()
-        duration = finished - started
 
-        log.write(f"Finished : {datetime.now().isoformat()}\n")
-        log.write(f"Duration : {duration}\n")
-        log.write(f"Exit code: {return_code}\n")
-        log.flush()
+    finished = datetime.now()
+    log.write(f"Finished : {finished.isoformat()}\n")
+    log.write(f"Duration : {finished - started}\n")
+    log.write(f"Exit code: {out.return_code}\n")
+    if out.stalled: log.write(f"Stalled  : no activity for {stall_timeout:.0f}s, killed\n")
+    if dropper is not None:
+        dropper.close()
+        log.write(f"Page cache: {dropper.summary()}\n")
+    log.flush()
+
+    ok = out.return_code == 0
+    status = RSyncStatus.STALLED if out.stalled else \
+        RSyncStatus.from_output(ok, out.stdout_tail + "\n" + out.stderr_tail)
+    stats = RSyncStats.from_output(out.stdout_tail)
+    return CommandRun(command, started, finished, out, status, stats)
+
+def _format_stats( stats: RSyncStats | None ) -> str:
+    """ Format the transfer metrics to be appended to the summary """
+    if stats is None: return ""
+    return (
+        "\n\n--- TRANSFER STATS ---\n"
+        f"Files     : {stats.num_files:,} ({stats.num_files_transferred:,} transferred)\n"
+        f"Size      : {human_bytes(stats.total_file_size)} "
+        f"({human_bytes(stats.total_transferred_size)} transferred)\n"
+        f"Data      : {human_bytes(stats.literal_data)} literal, "
+        f"{human_bytes(stats.matched_data)} matched\n"
+        f"File list : {stats.file_list_generation_time:.3f}s generation, "
+        f"{stats.file_list_transfer_time:.3f}s transfer\n"
+        f"Wire      : {human_bytes(stats.total_bytes_sent)} sent, "
+        f"{human_bytes(stats.total_bytes_received)} received\n"
+        f"Speedup   : {stats.speedup:.2f}"
+    )
+
+def _format_stderr_tail( out: StreamResult, title: str = "STDERR" ) -> str:
+    """ Format the stderr tail to be appended to the summary """
+    if not out.stderr_tail.strip(): return ""
+    section = f"\n\n--- {title} ---\n"
+    if out.stderr_truncated: section += "[...]\n"
+    return section + out.stderr_tail.strip()
+
+def _last_error_line( out: StreamResult ) -> str | None:
+    """ Returns the last non-empty line printed on the stderr """
+    lines = [ line.strip() for line in out.stderr_tail.splitlines() if line.strip() ]
+    return lines[-1] if lines else None
+
+def _exception_result( command: List[str], started: datetime, e: Exception ) -> BackupResult:
+    """ Creates the result of a backup that raised an exception """
+    summary = (
+        "❌ BACKUP ERROR (exception)\n"
+        f"Command  : {command}\n"
+        f"Error    : {type(e).__name__}: {e}"
+    )
+
+    return BackupResult( False, summary, started, datetime.now(), -1, 
+        RSyncStatus.OTHER_ERROR, f"{type(e).__name__}: {e}" )
 
+def run_backup_command( 
+    command: List[str], log_file: Path | None, progress: ProgressPublisher | None = None,
+    bandwidth: BandwidthSchedule | None = None, retry: RetryPolicy | None = None,
+    stall_timeout: float | None = None, resources: ResourceGovernor | None = None
+) -> BackupResult:
+    started = datetime.now()
+
+    try:
+
+        log = sys.stdout if not log_file else log_file.open("a", encoding="utf-8")
+        tracker = None if progress is None else progress.tracker()
+        run = execute_command(command, log, tracker, bandwidth, retry, stall_timeout, resources)
         if log_file is not None: log.close()
 
-        ok = out.returncode == 0
+        summary = (
+            f"{'✅ SUCCESS' if run.ok() else '❌ FAILED'}\n"
+            f"Command : {" ".join(command)}\n"
+            f"Started : {run.started}\n"
+            f"Finished: {run.finished}\n"
+            f"Duration: {run.duration()}\n"
+            f"Attempts: {run.attempts}\n"
+            f"Exit    : {run.output.return_code}\n"
+            f"Status  : {run.status.value}\n"
+            f"Log file: {log_file}"
+        )
+
+        summary += _format_stats(run.stats)
+        summary += _format_stderr_tail(run.output)
+        return BackupResult( run.ok(), summary, run.started, run.finished, 
+            run.output.return_code, run.status, _last_error_line(run.output), run.stats )
+        
+    except Exception as e:
+        return _exception_result( command, started, e )
+
+def _source_chunks( source: str, n_chunks: int ) -> Tuple[str, List[List[str]]] | None:
+    """ Split the top-level entries of a source folder into size-balanced
+    chunks. Returns the base folder the entries are relative to and the
+    chunks, or None if the source cannot be split. """
+    source_path = Path(source)
+    if n_chunks <= 1 or not source_path.is_dir(): return None
 
+    base, prefix = source_base( source )
+    if prefix: prefix += "/"
+
+    entries = []
+    with os.scandir(source_path) as it:
+        for entry in it:
+            # Names are newline separated in the --files-from list
+            if "\n" in entry.name: return None
+            entries.append(( prefix + entry.name, tree_size(Path(entry.path)) ))
+
+    if len(entries) < 2: return None
+    return base, balanced_partition(entries, n_chunks)
+
+def plan_parallel_transfers( command: List[str], workers: int, work_dir: Path ) -> List[Transfer]:
+    """ Partition the rsync command into transfers for concurrent workers.
+    If there are at least as many sources as workers, each source is a
+    transfer on its own. Otherwise, remaining workers are used to split
+    source folders into size-balanced chunks passed with --files-from.
+    Deletions apply to every folder a transfer writes into: a source
+    copying the content of its folder would delete the files of the other
+    workers, and chunks never delete the top-level entries removed from
+    the source. Deleting commands are then split only by source, and only
+    if no source copies the content of its folder. """
+    options, sources, dest = split_rsync_command(command)
+    deleting = deletes_extraneous(command)
+    if workers <= 1 or not sources or \
+            ( deleting and any( source.endswith("/") for source in sources ) ):
+        return [ Transfer(command, ", ".join(sources)) ]
+
+    if len(sources) >= workers or deleting:
+        return [ Transfer(options + [source, dest], source) for source in sources ]
+
+    transfers = []
+    for idx, source in enumerate(sources):
+        n_chunks = workers // len(sources) + (1 if idx < workers % len(sources) else 0)
+        chunks = _source_chunks(source, n_chunks)
+        if chunks is None:
+            transfers.append(Transfer(options + [source, dest], source))
+            continue
+
+        base, groups = chunks
+        for chunk_idx, group in enumerate(groups):
+            files_from = work_dir / f"transfer-{idx}-{chunk_idx}.list"
+            files_from.write_text("\n".join(group) + "\n", encoding="utf-8")
+            transfers.append(Transfer(
+                options + ["--recursive", f"--files-from={files_from}", base, dest],
+                f"{source} (chunk {chunk_idx + 1}/{len(groups)}, {len(group)} entries)"
+            ))
+
+    return transfers
+
+def _run_transfer( 
+    transfer: Transfer, segment: Path, progress: ProgressTracker | None,
+    bandwidth: BandwidthSchedule | None = None, retry: RetryPolicy | None = None,
+    stall_timeout: float | None = None, resources: ResourceGovernor | None = None
+) -> CommandRun:
+    """ Run a single transfer logging into its own log segment """
+    with segment.open("w", encoding="utf-8") as log:
+        try:
+            return execute_command(transfer.command, log, progress, bandwidth, retry, 
+                stall_timeout, resources)
+        except Exception as e:
+            # Make the failure visible as a regular failed transfer
+            now = datetime.now()
+            error = f"{type(e).__name__}: {e}"
+            log.write(f"Error : {error}\n")
+            out = StreamResult(-1, "", error, False)
+            return CommandRun(transfer.command, now, now, out, RSyncStatus.OTHER_ERROR)
+
+def run_parallel_backup( 
+    command: List[str], workers: int, log_file: Path | None,
+    progress: ProgressPublisher | None = None, bandwidth: BandwidthSchedule | None = None,
+    retry: RetryPolicy | None = None, stall_timeout: float | None = None,
+    resources: ResourceGovernor | None = None
+) -> BackupResult:
+    """ Run the backup command splitting the work among concurrent rsync
+    processes. Each worker logs into its own segment, segments are merged
+    into the run log once all the workers have finished. The bandwidth
+    limits, if any, are shared among the workers, while each worker retries
+    its own transfer according to the retry policy. """
+    started = datetime.now()
+
+    try:
+
+        with tempfile.TemporaryDirectory(prefix="backupctl-") as work_dir:
+            work_dir = Path(work_dir)
+            transfers = plan_parallel_transfers(command, workers, work_dir)
+            segments = [ work_dir / f"worker-{idx}.log" for idx in range(len(transfers)) ]
+            trackers = [ 
+                None if progress is None else progress.tracker(str(idx)) 
+                for idx in range(len(transfers)) 
+            ]
+
+            worker_bandwidth = None if bandwidth is None else bandwidth.shared(len(transfers))
+            run_transfer = partial(_run_transfer, bandwidth=worker_bandwidth, retry=retry,
+                stall_timeout=stall_timeout, resources=resources)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                runs: List[CommandRun] = list(pool.map(run_transfer, transfers, segments, trackers))
+
+            finished = datetime.now()
+            failed = [ run for run in runs if not run.ok() ]
+            return_code = failed[0].output.return_code if failed else 0
+            status = failed[0].status if failed else RSyncStatus.OK
+
+            log = sys.stdout if not log_file else log_file.open("a", encoding="utf-8")
+            log.write(f"Started : {started.isoformat()}\n")
+            log.write(f"Command : {" ".join(command)}\n")
+            log.write(f"Workers : {workers} ({len(transfers)} transfers)\n\n")
+
+            for idx, (transfer, segment) in enumerate(zip(transfers, segments), 1):
+                log.write(f"========== WORKER {idx}/{len(transfers)}: {transfer.description} ==========\n")
+                with segment.open("r", encoding="utf-8") as io:
+                    shutil.copyfileobj(io, log)
+                log.write("\n")
+
+            log.write(f"Finished : {finished.isoformat()}\n")
+            log.write(f"Duration : {finished - started}\n")
+            log.write(f"Exit code: {return_code}\n")
+            log.flush()
+
+            if log_file is not None: log.close()
+
+        ok = return_code == 0
         summary = (
             f"{'✅ SUCCESS' if ok else '❌ FAILED'}\n"
             f"Command : {" ".join(command)}\n"
+            f"Workers : {workers} ({len(transfers)} transfers, {len(failed)} failed)\n"
             f"Started : {started}\n"
             f"Finished: {finished}\n"
-            f"Duration: {duration}\n"
+            f"Duration: {finished - started}\n"
             f"Exit    : {return_code}\n"
-            f"Log file: {log_file}"
+            f"Status  : {status.value}\n"
+            f"Log file: {log_file}\n"
+            "\n--- TRANSFERS ---"
         )
 
-        if out.stderr:
-            summary += "\n\n--- STDERR ---\n"
-            summary += out.stderr.strip()
-        
-        return ok, summary
-        
-    except Exception as e:
-        return False, (
-                "❌ BACKUP ERROR (exception)\n"
-                f"Command  : {command}\n"
-                f"Error    : {type(e).__name__}: {e}"
+        for idx, (transfer, run) in enumerate(zip(transfers, runs), 1):
+            summary += (
+                f"\n[{idx}] {transfer.description}: exit {run.output.return_code}"
+                f" ({run.status.value}) in {run.duration()}"
             )
+            if run.attempts > 1: summary += f", {run.attempts} attempts"
+
+        # Metrics are aggregated only when all the workers printed them
+        stats = None
+        if all( run.stats is not None for run in runs ):
+            stats = RSyncStats.merge([ run.stats for run in runs ])
+
+        summary += _format_stats(stats)
+        for idx, run in enumerate(runs, 1):
+            summary += _format_stderr_tail(run.output, f"STDERR (worker {idx})")
+
+        error = _last_error_line(failed[0].output) if failed else None
+        return BackupResult( ok, summary, started, finished, return_code, status, error, stats )
     
+    except Exception as e:
+        return _exception_result( command, started, e )
+    
+def _run_destination( 
+    command: List[str], workers: int, bandwidth: BandwidthSchedule | None,
+    retry: RetryPolicy | None, stall_timeout: float | None, resources: ResourceGovernor | None,
+    destination: ReplicaCfg | None, segment: Path, progress: ProgressScope | None
+) -> BackupResult:
+    """ Run the transfer towards a single destination of a fan-out, the
+    main remote of the plan if the destination is None. """
+    if destination is None:
+        if workers > 1:
+            return run_parallel_backup( command, workers, segment, progress, bandwidth, 
+                retry, stall_timeout, resources )
+        return run_backup_command( command, segment, progress, bandwidth, retry, 
+            stall_timeout, resources )
+
+    # The sessions of the destination are held by `remote_sessions`
+    command = replica_command( command, destination.dest, destination.password_file )
+    return run_backup_command( command, segment, progress, bandwidth, retry, 
+        stall_timeout, resources )
+
+def run_fanout_backup( 
+    command: List[str], workers: int, destinations: List[ReplicaCfg], quorum: str,
+    log_file: Path | None, progress: ProgressPublisher | None = None, 
+    bandwidth: BandwidthSchedule | None = None, retry: RetryPolicy | None = None,
+    stall_timeout: float | None = None, resources: ResourceGovernor | None = None
+) -> BackupResult:
+    """ Synchronise the main remote of the command and the fan-out destinations
+    concurrently, each with its own rsync process (the main remote keeps its
+    workers). Each destination logs into its own segment, merged into the run
+    log at the end. The run succeeds if the quorum of destinations succeeded,
+    the bandwidth limits, if any, are shared among the destinations. """
+    started = datetime.now()
+
+    try:
+
+        with tempfile.TemporaryDirectory(prefix="backupctl-") as work_dir:
+            targets = [ None, *destinations ]
+            dests = [ split_rsync_command(command).dest, *( d.dest for d in destinations ) ]
+            segments = [ Path(work_dir) / f"destination-{idx}.log" for idx in range(len(targets)) ]
+            scopes = [ 
+                None if progress is None else ProgressScope(progress, f"dest-{idx}")
+                for idx in range(len(targets))
+            ]
+
+            dest_bandwidth = None if bandwidth is None else bandwidth.shared(len(targets))
+            run_destination = partial(_run_destination, command, workers, dest_bandwidth, 
+                retry, stall_timeout, resources)
+            with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+                results: List[BackupResult] = list(pool.map(run_destination, targets, segments, scopes))
+
+            finished = datetime.now()
+            ok = quorum_reached( quorum, [ result.ok for result in results ] )
+            failed = [ result for result in results if not result.ok ]
+            first_failure = None if ok or not failed else failed[0]
+
+            log = sys.stdout if not log_file else log_file.open("a", encoding="utf-8")
+            log.write(f"Started : {started.isoformat()}\n")
+            log.write(f"Command : {" ".join(command)}\n")
+            log.write(f"Quorum  : {quorum_size(quorum, len(targets))} of {len(targets)} destinations\n\n")
+
+            for idx, (dest, segment) in enumerate(zip(dests, segments), 1):
+                log.write(f"========== DESTINATION {idx}/{len(targets)}: {dest} ==========\n")
+                with segment.open("r", encoding="utf-8") as io:
+                    shutil.copyfileobj(io, log)
+                log.write("\n")
+
+            log.write(f"Finished : {finished.isoformat()}\n")
+            log.write(f"Duration : {finished - started}\n")
+            log.write(f"Succeeded: {len(results) - len(failed)}/{len(results)}\n")
+            log.flush()
+
+            if log_file is not None: log.close()
+
+        summary = (
+            f"{'✅ SUCCESS' if ok else '❌ FAILED'}\n"
+            f"Command : {" ".join(command)}\n"
+            f"Quorum  : {quorum} ({len(results) - len(failed)}/{len(results)} destinations succeeded)\n"
+            f"Started : {started}\n"
+            f"Finished: {finished}\n"
+            f"Duration: {finished - started}\n"
+            f"Log file: {log_file}\n"
+            "\n--- DESTINATIONS ---"
+        )
+
+        for idx, (dest, result) in enumerate(zip(dests, results), 1):
+            summary += (
+                f"\n[{idx}] {dest}: exit {result.return_code}"
+                f" ({result.status.value}) in {result.finished - result.started}"
+            )
+            if result.error is not None: summary += f"\n    {result.error}"
+
+        # Metrics are the ones of the first destination which succeeded
+        stats = next( ( result.stats for result in results if result.ok ), None )
+        summary += _format_stats(stats)
+
+        return BackupResult( ok, summary, started, finished, 
+            0 if first_failure is None else first_failure.return_code,
+            RSyncStatus.OK if first_failure is None else first_failure.status,
+            None if first_failure is None else first_failure.error, stats )
+
+    except Exception as e:
+        return _exception_result( command, started, e )
+
+def replicate_backup( 
+    command: List[str], replicas: List[ReplicaCfg], batch_file: Path | None, 
+    log: TextIO, progress: ProgressPublisher | None = None, 
+    bandwidth: BandwidthSchedule | None = None, retry: RetryPolicy | None = None,
+    stall_timeout: float | None = None, resources: ResourceGovernor | None = None
+) -> List[ReplicaRun]:
+    """ Send the sources of the command to each replica, one after the other.
+    If the batch file written by the command is given, it is replayed with
+    --read-batch so that the sources are not scanned again. A replica whose
+    content diverged from the one of the primary destination fails the
+    replay, then an independent rsync, retried by the policy, is run against
+    it. """
+    replica_runs = []
+    for idx, replica in enumerate(replicas, 1):
+        tracker = None if progress is None else progress.tracker(f"replica-{idx}")
+        log.write(f"\n========== REPLICA {idx}/{len(replicas)}: {replica.dest} ==========\n")
+
+        # The sessions of the replica are held by `remote_sessions`
+        run = None
+        if batch_file is not None and batch_file.exists():
+            replay = read_batch_command( command, str(batch_file), 
+                replica.dest, replica.password_file )
+            run = execute_command( replay, log, tracker, bandwidth, 
+                stall_timeout=stall_timeout, resources=resources )
+            if run.ok():
+                replica_runs.append( ReplicaRun(replica, run, True) )
+                continue
+
+            log.write("\n===== BATCH REPLAY FAILED: RUNNING AN INDEPENDENT TRANSFER =====\n\n")
+
+        independent = replica_command( command, replica.dest, replica.password_file )
+        run = execute_command( independent, log, tracker, bandwidth, retry, 
+            stall_timeout, resources )
+        replica_runs.append( ReplicaRun(replica, run, False) )
+
+    return replica_runs
+
+def run_replicas( 
+    result: BackupResult, command: List[str], replicas: List[ReplicaCfg], 
+    batch_file: Path | None, log_file: Path | None, 
+    progress: ProgressPublisher | None = None, bandwidth: BandwidthSchedule | None = None,
+    retry: RetryPolicy | None = None, stall_timeout: float | None = None,
+    resources: ResourceGovernor | None = None
+) -> BackupResult:
+    """ Run the replicas after the primary transfer, appending their output
+    to the run log. The batch is replayed only if the primary transfer
+    succeeded. The run fails if any of the replicas failed. """
+    try:
+
+        if not result.ok: batch_file = None
+        log = sys.stdout if not log_file else log_file.open("a", encoding="utf-8")
+        replica_runs = replicate_backup( command, replicas, batch_file, log, progress, 
+            bandwidth, retry, stall_timeout, resources )
+        if log_file is not None: log.close()
+
+    except Exception as e:
+        failure = _exception_result( command, result.started, e )
+        return replace( failure, summary=result.summary + "\n\n" + failure.summary )
+
+    summary = result.summary + "\n\n--- REPLICAS ---"
+    for idx, replica_run in enumerate(replica_runs, 1):
+        run = replica_run.run
+        mode = "batch replayed" if replica_run.replayed else "independent transfer"
+        summary += (
+            f"\n[{idx}] {replica_run.replica.dest}: {mode}, exit {run.output.return_code}"
+            f" ({run.status.value}) in {run.duration()}"
+        )
+
+    for idx, replica_run in enumerate(replica_runs, 1):
+        summary += _format_stderr_tail(replica_run.run.output, f"STDERR (replica {idx})")
+
+    failed = [ replica_run.run for replica_run in replica_runs if not replica_run.run.ok() ]
+    if result.ok and failed:
+        return replace( result, ok=False, summary=summary, finished=datetime.now(),
+            return_code=failed[0].output.return_code, status=failed[0].status,
+            error=_last_error_line(failed[0].output) )
+
+    return replace( result, summary=summary, finished=datetime.now() )
+
+def _format_notification_failures( notification_failures: Dict[str, str] ) -> str:
+    """ Format the report of all failed notification systems """
+    report = "\n---------- NOTIFICATION SYSTEM FAILURES ----------\n"
+    for name, message in notification_failures.items():
+        report += f"[NOTIFICATION SYS: {name}] Failed with message: {message}\n"
+    return report
+
+def _task_error( result: TaskResult, timeout: float | None ) -> str | None:
+    """ Returns the error message of a notification task if any """
+    if not result.done: return f"Still pending after {timeout}s, notification deadline expired"
+    if result.error is not None: return f"{type(result.error).__name__}: {result.error}"
+    if isinstance(result.value, WebhookStatus): return result.value.error
+    return None
+
 def send_notification( 
-    notification_cfg: List[NotificationCls], event: Event, log_file: Path | None
-) -> None:
-    """ Sends notifications """
+    notification_cfg: List[NotificationCls], event: Event, log_file: Path | None,
+    deadline_s: float | None = DEFAULT_NOTIFICATION_DEADLINE
+) -> Dict[str, str | None]:
+    """ Sends notifications. Webhooks are sent concurrently and the email
+    goes out as soon as they are all done, or when half of the deadline
+    has expired, so that it can report webhooks failures. Nothing is
+    waited for after the overall deadline. Returns the outcome of each
+    notification system, i.e., its error or None if delivered. """
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
     subject = f"[Backup: {event.name}] {'OK' if event.ok() else 'FAILED'} ({now})"
     attachments=[log_file] if log_file is not None else []
 
-    emailer_ = None
-    notification_failures = dict()
+    started = time.monotonic()
+    deadline = None if deadline_s is None else started + deadline_s
+    webhooks_deadline = None if deadline_s is None else started + deadline_s / 2
+
+    # The webhooks pull in requests, imported only when there is something to send
+    from backupctl.models.notification.wh_dispatcher import WebhookDispatcher
+
+    email_cfg = None
+    webhooks, webhook_names = dict(), dict()
+    notification_failures, outcomes = dict(), dict()
 
     for notification_system in notification_cfg:
         if isinstance(notification_system, WebhookNotification):
             if event.event not in notification_system.events: continue
             
-            ntfy_name = notification_system.name
-            status = WebhookDispatcher.dispatch( notification_system, event ) \
-                                      .send( subject, attachments )
-            
-            # Save the error only if it is an actual string
-            if status.error is not None:
-                notification_failures[ ntfy_name ] = status.error
+            webhook = WebhookDispatcher.dispatch( notification_system, event )
+            webhooks[ notification_system.id ] = partial( webhook.send, subject, attachments )
+            webhook_names[ notification_system.id ] = notification_system.name
 
         if isinstance(notification_system, EmailNotification):
-            emailer_ = Emailer.new(notification_system, event)
+            email_cfg = notification_system
+
+    # Save the error only if it is an actual string
+    for ntfy_id, result in run_with_deadline( webhooks, webhooks_deadline ).items():
+        error = _task_error( result, None if deadline_s is None else deadline_s / 2 )
+        outcomes[ webhook_names[ntfy_id] ] = error
+        if error is not None: notification_failures[ webhook_names[ntfy_id] ] = error
 
     # If the dictionary is not empty we need to report notification
     # failures into the log file
     if log_file is not None and len(notification_failures) > 0:
-        log = sys.stdout if not log_file else log_file.open("+a", encoding="utf-8")
-        log.write("\n---------- NOTIFICATION SYSTEM FAILURES ----------\n")
-        
-        # Log all the notification errors
-        for name, message in notification_failures.items():
-            log.write(f"[NOTIFICATION SYS: {name}] Failed with message: {message}")
-        
-        log.flush()
+        with log_file.open("+a", encoding="utf-8") as log:
+            log.write( _format_notification_failures(notification_failures) )
 
-        # Close the stream if the iostream was a file
-        if log_file is not None: log.close()
+    if email_cfg is None: return outcomes
     
     # Emails are sent at the end also reporting errors in the log
     # file with any previous notification system failed
-    if emailer_ is not None: 
-        emailer_.send( subject, attachments )
-
-def make_zip_archive( log_file_group: List[Tuple[Path, datetime]] ) -> None:
-    """ Create a .zip archive composed of the files gave as a input
-    to this function. The name of the zip archive is the start and stop
-    range datetime of the most recent and least recent file. """
-    first_datetime = log_file_group[0][-1].strftime("%Y%m%d")
-    last_datetime  = log_file_group[-1][-1].strftime("%Y%m%d")
-    log_folder = log_file_group[0][0].parent
-    archive_file = log_folder / f"log_archive-{first_datetime}-{last_datetime}.zip"
+    if len(notification_failures) > 0:
+        event = Event( event.name, event.event, 
+            event.summary + "\n" + _format_notification_failures(notification_failures) )
+
+    emailer_ = Emailer.new( email_cfg, event )
+    tasks = { email_cfg.id: partial( emailer_.send, subject, attachments ) }
+    result = run_with_deadline( tasks, deadline )[ email_cfg.id ]
+    outcomes[ "email" ] = error = _task_error( result, deadline_s )
+    if error is None: return outcomes
+
+    if log_file is not None:
+        with log_file.open("+a", encoding="utf-8") as log:
+            log.write( _format_notification_failures({ "email": error }) )
+
+    cwarn(f"[*] Email notification failed: {error}")
+    return outcomes
+
+def record_run(
+    target: str, result: BackupResult, dry_run: bool, log_file: Path | None,
+    notification_outcomes: Dict[str, str | None], snapshot: str | None = None,
+    transfer: str | None = None
+) -> None:
+    """ Append the outcome of the run into the run journal. Failing to
+    write the journal never fails the backup itself. """
+    record = RunRecord(
+        target=target, started=result.started, finished=result.finished,
+        exit_code=result.return_code, status=result.status, dry_run=dry_run,
+        error=result.error, log_file=None if log_file is None else str(log_file),
+        notifications=notification_outcomes, stats=result.stats, snapshot=snapshot,
+        transfer=transfer
+    )
+
+    try:
+        append_run( record )
+    except Exception as e:
+        cwarn(f"[*] Cannot write the run journal: {e}")
+
+def _run_remote_command( command: List[str] ) -> subprocess.CompletedProcess | None:
+    """ Run a short rsync command against the remote, None if it cannot run """
+    try:
+        return subprocess.run( command, capture_output=True, text=True, 
+            timeout=SNAPSHOT_COMMAND_TIMEOUT, check=False )
+    except ( OSError, subprocess.TimeoutExpired ) as e:
+        cwarn(f"[*] Cannot run {command[0]} on the remote: {e}")
+        return None
+
+def prepare_snapshot( plan: PlanCfg, started: datetime ) -> SnapshotRun:
+    """ List the snapshots already on the remote and point the command of the
+    plan to a new snapshot, hard-linked against the most recent complete ones.
+    Snapshots written by failed runs are never used as a link reference. """
+    existing = []
+    listing = _run_remote_command( list_dest_command(plan.command) )
+    if listing is not None and listing.returncode == 0:
+        existing = parse_list_only( listing.stdout )
+    elif listing is not None and "No such file or directory" not in listing.stderr:
+        cwarn(f"[*] Cannot list the snapshots on the remote: {listing.stderr.strip()}")
+
+    try:
+        failed = failed_snapshots( plan.name )
+    except Exception as e:
+        cwarn(f"[*] Cannot read the run journal: {e}")
+        failed = set()
+
+    snapshot = SnapshotRun( 
+        snapshot_name(started), existing, [ n for n in existing if n not in failed ] 
+    )
+    links = snapshot.complete[::-1][:plan.snapshot.link_dest]
+    plan.command = snapshot_command( plan.command, snapshot.name, links )
+    return snapshot
+
+def prune_snapshots( plan: PlanCfg, snapshot: SnapshotRun, log_file: Path | None ) -> None:
+    """ Delete, in a single rsync session, the snapshots falling out of the
+    GFS retention of the plan. Must be called after a successful run. """
+    policy = plan.snapshot
+    keep = gfs_keep( snapshot.complete + [ snapshot.name ], policy.hourly, policy.daily, 
+        policy.weekly, policy.monthly )
+    expired = [ name for name in snapshot.existing if name not in keep ]
+    if not expired: return
+
+    cinfo(f"[*] Removing {len(expired)} expired snapshot(s)")
+    with tempfile.TemporaryDirectory() as empty_dir:
+        command = delete_dest_folders_command( plan.command, expired, empty_dir )
+        out = _run_remote_command( command )
+    if out is None: return
+    if out.returncode != 0:
+        cwarn(f"[*] Cannot remove the expired snapshots: {out.stderr.strip()}")
+
+    if log_file is None: return
+    with log_file.open("a", encoding="utf-8") as log:
+        log.write("\n===== SNAPSHOT RETENTION =====\n")
+        log.write(f"Expired: {', '.join(expired)}\n")
+        log.write(f"Exit code: {out.returncode}\n{out.stdout}{out.stderr}")
+
+def measure_link( plan: PlanCfg ) -> LinkProfile:
+    """ Measure the link towards the main remote of the plan and the source
+    disk, only as much as needed by the options set to auto """
+    profile = LinkProfile()
+    if plan.compression is not False:
+        profile.zstd = "zstd" in rsync_compress_choices( plan.command[0] )
+    if plan.compression != AUTO and plan.whole_file != AUTO: return profile
+
+    try:
+        profile.throughput = history_throughput( plan.name )
+    except Exception as e:
+        cwarn(f"[*] Cannot read the run journal: {e}")
+
+    if plan.compression == AUTO and profile.throughput is None and plan.remote is not None:
+        host, port = plan.remote.rsplit( ":", 1 )
+        profile.rtt_s = tcp_rtt( host.strip("[]"), int(port) )
+
+    if plan.whole_file == AUTO and profile.throughput is not None:
+        profile.disk_throughput = disk_read_throughput( split_rsync_command(plan.command).sources )
+
+    return profile
+
+def tune_plan( plan: PlanCfg, log_file: Path | None ) -> TransferTuning:
+    """ Choose the transfer options of the run out of the measures of the
+    link, set them into the plan command and explain them into the log. """
+    tuning = tune_transfer( measure_link( plan ), plan.compression, plan.whole_file )
+    plan.command = set_rsync_options( plan.command, *tuning.options )
+
+    log = sys.stdout if not log_file else log_file.open("a", encoding="utf-8")
+    log.write("===== TRANSFER TUNING =====\n")
+    log.write(f"Options: {" ".join(tuning.options)}\n")
+    for reason in tuning.reasons: log.write(f"- {reason}\n")
+    log.write("\n")
+    log.flush()
+
+    if log_file is not None: log.close()
+    return tuning
+
+def scan_plan_sources( plan: PlanCfg, now: datetime ) -> SourceScan | None:
+    """ Scan the sources of the plan and compare them against the manifest
+    saved by the last successful run to decide whether the run can be
+    skipped, or only send the changed paths. Removed paths, too many
+    changes and the periodic safety net require a full run. Returns None
+    if the sources cannot be scanned. """
+    roots = source_roots( plan.command )
+    try:
+        entries = [
+            entry._replace( path=os.path.join(base, entry.path) )
+            for base, base_roots in roots.items() for entry in scan_sources( base, base_roots )
+        ]
+    except OSError as e:
+        cwarn(f"[*] Cannot scan the sources: {e}")
+        return None
+
+    manifest = SourceManifest.from_entries( sorted(entries), now )
+    previous = SourceManifest.load( manifest_file(plan.name) )
+    if previous is None:
+        return SourceScan( manifest, TransferMode.full, "no manifest of a previous run" )
+
+    if now - previous.full_run >= timedelta( hours=plan.manifest.full_run_hours ):
+        return SourceScan( manifest, TransferMode.full, 
+            f"the last full run is older than {plan.manifest.full_run_hours} hours" )
+
+    manifest.full_run = previous.full_run
+    diff = diff_manifests( previous, manifest )
+    if diff.empty():
+        return SourceScan( manifest, TransferMode.noop, 
+            f"none of the {len(manifest):,} source entries changed" )
+    
+    if diff.removed:
+        manifest.full_run = now
+        return SourceScan( manifest, TransferMode.full, f"{len(diff.removed):,} paths removed" )
     
-    with ZipFile( archive_file, "w", compression=ZIP_DEFLATED ) as zipf:
-        for ( log_file, _ ) in log_file_group:
-            zipf.write( log_file )
-            log_file.unlink( missing_ok=True )
+    if len(diff.changed) > plan.manifest.max_changes or len(roots) != 1:
+        manifest.full_run = now
+        reason = f"{len(diff.changed):,} paths changed, more than {plan.manifest.max_changes:,}" \
+            if len(roots) == 1 else "the sources have different parent folders"
+        return SourceScan( manifest, TransferMode.full, reason )
 
-def apply_log_retention( logging_en: bool, log_file: Path | None, retention_cfg: LogCfg ) -> None:
-    """ Apply log retention policy if necessary """
-    if not logging_en: return # do no perform anything if log was not enabled
-    cinfo("[*] Applying log retention policy")
+    base, = roots
+    return SourceScan( manifest, TransferMode.incremental, 
+        f"{len(diff.changed):,} paths changed", base, 
+        [ path[len(base):] for path in diff.changed ] )
 
-    log_folder_path = log_file.parent
-    previous_log_files, log_archives = [], []
+def _log_source_scan( scan: SourceScan, log_file: Path | None ) -> None:
+    """ Write the transfer mode chosen by the source scan into the log """
+    log = sys.stdout if not log_file else log_file.open("a", encoding="utf-8")
+    log.write("===== SOURCE MANIFEST =====\n")
+    log.write(f"Transfer: {scan.mode.value} ({scan.reason})\n\n")
+    log.flush()
+    if log_file is not None: log.close()
 
-    for curr_log_file in os.listdir( log_folder_path ):
-        path = log_folder_path / curr_log_file
-        
-        # Search only for log files created previously. Ignore
-        # the one that has been created with the most recent run
-        if path.stem == log_file.stem: continue
-        if path.name.endswith( '.zip' ): log_archives.append( path )
-        elif path.name.endswith( '.log' ):
-            date_string = '-'.join( path.stem.split('-')[-2:] )
-            log_file_date = datetime.strptime( date_string, "%Y%m%d-%H%M%S" )
-            previous_log_files.append( ( path, log_file_date ) )
-
-    # Sort all log the logfiles in ascending order based on their timestamp.
-    # For each group of files ( which dimension is defined by the retention
-    # policy ) creates a corresponding zip archive.
-    if len( previous_log_files ) >= retention_cfg.max_spare_files:
-        previous_log_files = sorted(previous_log_files, key=lambda x: x[-1])
-        previous_index, curr_size = 0, len( previous_log_files )
-        while curr_size >= retention_cfg.max_spare_files:
-            next_index = previous_index + retention_cfg.max_spare_files
-            log_file_group = previous_log_files[previous_index:next_index]
-            make_zip_archive( log_file_group )
-            previous_index = next_index
-            curr_size -= retention_cfg.max_spare_files
-
-    # Next step of the retention policy is to remove zip archives
-    # that has exceeded the maximum retention time
-    if len(log_archives) == 0: return
-
-    now = date.today() # Take the current time for computing delta days
-    for archive_file in log_archives:
-        archive_last_date_str = archive_file.stem.split('-')[-1]
-        archive_last_date = datetime.strptime(archive_last_date_str, "%Y%m%d").date()
-        days_passed = ( now - archive_last_date ).days
-        if days_passed >= retention_cfg.retention_window:
-            archive_file.unlink(missing_ok=True)
+def noop_result( scan: SourceScan, started: datetime, log_file: Path | None ) -> BackupResult:
+    """ Creates the result of a run skipped since its sources did not change """
+    finished = datetime.now()
+    summary = (
+        "✅ SUCCESS (no changes)\n"
+        f"Transfer: skipped, {scan.reason}\n"
+        f"Started : {started}\n"
+        f"Finished: {finished}\n"
+        f"Log file: {log_file}"
+    )
+    return BackupResult( True, summary, started, finished, 0, RSyncStatus.OK )
+
+def save_manifest( plan: PlanCfg, scan: SourceScan ) -> None:
+    """ Save the manifest of the sources once they have been synchronised.
+    Failing to save it only makes the next run a full one. """
+    if scan.manifest is None: return
+    try:
+        scan.manifest.save( manifest_file(plan.name) )
+    except OSError as e:
+        cwarn(f"[*] Cannot save the source manifest: {e}")
+
+def verify_after_run( plan: PlanCfg, log_file: Path | None ) -> VerifyResult:
+    """ Verify a sample of the files just sent, see `verify_plan` """
+    from backupctl.verify._core import verify_plan # Imports this module
+    cinfo("[*] Verifying a sample of the remote copy")
+    return verify_plan( plan, False, log_file )
+
+def resource_governor( plan: PlanCfg ) -> ResourceGovernor | None:
+    """ Returns the governor of the resource settings of the plan, if any """
+    if plan.resources is None: return None
+    return ResourceGovernor( plan.resources, plan.name )
+
+@contextmanager
+def target_admission( plan: PlanCfg ) -> Iterator[bool]:
+    """ Admit at most one active run of the target, according to the overlap
+    policy of the plan. Yields False if the run must be skipped. """
+    policy = OverlapPolicy( plan.overlap )
+    with SlotPool( RUN_LOCK_FOLDER, f"target-{plan.name}", 1 ) as pool:
+        # The target is busy as well while previous runs are queued, so
+        # that a new run never overtakes them
+        if pool.acquire( max_waiting=0 ):
+            yield True
+            return
+
+        if policy is OverlapPolicy.skip:
+            yield False
+            return
+
+        cinfo(f"[*] Target {plan.name} is already running, waiting for it to finish")
+        yield pool.acquire( max_waiting=1 if policy is OverlapPolicy.queue else None )
+
+@contextmanager
+def remote_sessions( plan: PlanCfg, workers: int ) -> Iterator[int]:
+    """ Hold the rsync sessions of the whole run, waiting in FIFO order for
+    the hosts with no free session. The sessions of the main remote, of the
+    fan-out destinations and of the replicas are reserved up front, with one
+    acquisition per host:port taken in name order: a run asking for more
+    sessions of a host while holding some would wait for itself. Yields the
+    number of workers of the main remote, capped to the sessions left by the
+    fan-out destinations on its host. """
+    limits: Dict[str, int] = {}  # host:port -> sessions allowed
+    demands: Dict[str, int] = {} # host:port -> sessions used at the same time
+    # Replicas run one after the other once the transfers are over, hence
+    # each of them needs a single session of its host
+    fanout = [ ( d.remote, d.max_sessions, 1 ) for d in plan.fanout ]
+    replicas = [ ( r.remote, r.max_sessions, 0 ) for r in plan.replicas ]
+    for remote, max_sessions, count in [ ( plan.remote, plan.max_sessions, 0 ), *fanout, *replicas ]:
+        if remote is None: continue
+        demands[ remote ] = demands.get( remote, 0 ) + count
+        if max_sessions is not None:
+            limits[ remote ] = min( limits.get( remote, max_sessions ), max_sessions )
+
+    if plan.remote in limits:
+        workers = max( 1, min( workers, limits[ plan.remote ] - demands[ plan.remote ] ) )
+    if plan.remote is not None:
+        demands[ plan.remote ] += workers
+
+    with ExitStack() as stack:
+        for remote in sorted( limits ):
+            name = f"host-{remote.replace(':', '_')}"
+            pool = stack.enter_context( SlotPool( RUN_LOCK_FOLDER, name, limits[ remote ] ) )
+            pool.acquire( min( max( demands[ remote ], 1 ), limits[ remote ] ) )
+        yield workers
 
 def run_job( 
-    target: str, dry_run: bool, notification_en: bool, logging_en: bool 
-) -> None:
+    target: str, dry_run: bool, notification_en: bool, logging_en: bool,
+    workers: int | None = None, source_scan: SourceScan | None = None
+) -> bool:
     """ Run the job associated to the input target. If notifications
     are enabled then the notification system is triggered. The
     dry-run flag performes a local uneffective run, meaning that
-    files are not copied to the remote location. """
+    files are not copied to the remote location. The number of
+    workers, if given, overrides the one of the plan. The source
+    scan, if given, replaces the one of the plan manifest. Returns
+    False if the run has been skipped by the overlap policy. """
 
     # First we need to load the configuration file into the Plan
     target_conf_path = DEFAULT_PLAN_CONF_FOLDER / f"{target}{DEFAULT_PLAN_SUFFIX}"
     plan_configuration = load_plan_configuration( target_conf_path )
 
+    with target_admission( plan_configuration ) as admitted:
+        if not admitted:
+            cwarn(f"[*] Target {target} is already running or queued, skipping")
+            return False
+
+        _run_admitted_job( plan_configuration, dry_run, notification_en, 
+            logging_en, workers or plan_configuration.workers, source_scan )
+        return True
+
+def _run_transfers( 
+    plan_configuration: PlanCfg, workers: int, dry_run: bool, snapshot: SnapshotRun | None,
+    work_dir: Path, file_log_path: Path | None, progress: ProgressPublisher
+) -> BackupResult:
+    """ Run the transfers of the plan towards all its destinations """
+    bandwidth = plan_configuration.bandwidth_schedule()
+    retry = plan_configuration.retry_policy()
+    stall_timeout = plan_configuration.stall_timeout
+    resources = resource_governor( plan_configuration )
+
+    # The single transfer of the primary remote writes the batch replayed
+    # on the replicas. Parallel transfers would write one batch each.
+    command, batch_file = plan_configuration.command, None
+    if plan_configuration.replicas and workers == 1 and not dry_run:
+        batch_file = work_dir / "replica.batch"
+        command = set_rsync_options( command, f"--write-batch={batch_file}" )
+
+    # All the rsync processes of the run share the cgroup of the governor
+    with remote_sessions( plan_configuration, workers ) as workers, \
+            resources or nullcontext():
+        if plan_configuration.fanout:
+            cinfo(f"[*] Running the job on {len(plan_configuration.fanout) + 1} remotes ...")
+            result = run_fanout_backup( command, workers, plan_configuration.fanout,
+                plan_configuration.quorum, file_log_path, progress, bandwidth, retry, 
+                stall_timeout, resources )
+        elif workers > 1:
+            cinfo(f"[*] Running the job with {workers} workers ...")
+            result = run_parallel_backup( command, workers, 
+                file_log_path, progress, bandwidth, retry, stall_timeout, resources )
+        else:
+            cinfo("[*] Running the job ...")
+            result = run_backup_command( command, file_log_path, 
+                progress, bandwidth, retry, stall_timeout, resources )
+
+        if snapshot is not None and result.ok and not dry_run:
+            prune_snapshots( plan_configuration, snapshot, file_log_path )
+
+        if plan_configuration.replicas:
+            cinfo(f"[*] Sending the backup to {len(plan_configuration.replicas)} replica(s) ...")
+            result = run_replicas( result, command, plan_configuration.replicas, 
+                batch_file, file_log_path, progress, bandwidth, retry, stall_timeout, resources )
+
+    return result
+
+def _run_admitted_job( 
+    plan_configuration: PlanCfg, dry_run: bool, notification_en: bool, 
+    logging_en: bool, workers: int, source_scan: SourceScan | None = None
+) -> None:
+    """ Run the job once it has been admitted, see `run_job` """
     # Create the log file if logging is enabled
     file_log_path = None if not logging_en else \
         make_log_file(plan_configuration)
@@ -202,19 +1064,98 @@ def run_job(
     # Run the backup command, or the generic task If the dry-run flag is used then 
     # we need to add the corresponding option into the list of commands
     if dry_run: plan_configuration.command.insert(-2, "--dry-run")
+
+    # Plans created by older versions do not request the transfer metrics
+    if "--stats" not in plan_configuration.command:
+        plan_configuration.command.insert(1, "--stats")
+
+    # rsync gives up on a silent connection by itself, the stall watchdog
+    # covers the processes hanging where the rsync timeouts do not apply
+    plan_configuration.command = set_rsync_options( plan_configuration.command,
+        *timeout_options( plan_configuration.io_timeout, plan_configuration.connect_timeout ) )
+
+    # Dropping the cached pages of the files sent needs their names
+    resources = plan_configuration.resources
+    if resources is not None and resources.drop_cache and \
+            not lists_names( plan_configuration.command ):
+        plan_configuration.command = set_rsync_options( plan_configuration.command, 
+            "--out-format=%n" )
+
+    # Snapshot plans write each run into a new folder of the destination
+    snapshot = None if plan_configuration.snapshot is None else \
+        prepare_snapshot( plan_configuration, datetime.now() )
     
-    cinfo("[*] Running the job ...")
-    ok, summary = run_backup_command( plan_configuration.command, file_log_path )
-    apply_log_retention( logging_en, file_log_path, plan_configuration.log )
-    
+    # Targets with a manifest skip the runs whose sources did not change,
+    # and only send the changed paths when they are a few
+    started = datetime.now()
+    if source_scan is None and plan_configuration.manifest is not None and not dry_run:
+        source_scan = scan_plan_sources( plan_configuration, started )
+    if source_scan is not None:
+        cinfo(f"[*] Source scan: {source_scan.mode.value} transfer, {source_scan.reason}")
+        _log_source_scan( source_scan, file_log_path )
+
+    noop = source_scan is not None and source_scan.mode is TransferMode.noop
+
+    # The verification compares all the sources with the destination of the run
+    verification = None if plan_configuration.verify is None or dry_run or noop \
+        or not plan_configuration.verify.after_run \
+        else replace( plan_configuration, command=list(plan_configuration.command) )
+
+    # Compression and delta transfer are chosen according to the link
+    if not noop: tune_plan( plan_configuration, file_log_path )
+
+    # Progress is published into the status file read by `backupctl top`
+    progress = ProgressPublisher( plan_configuration.name )
+    progress.start()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="backupctl-") as work_dir:
+            if noop:
+                result = noop_result( source_scan, started, file_log_path )
+            else:
+                if source_scan is not None and source_scan.mode is TransferMode.incremental:
+                    files_from = Path(work_dir) / "changed.list"
+                    files_from.write_bytes( "\0".join( source_scan.changed )
+                        .encode("utf-8", "surrogateescape") )
+                    plan_configuration.command = files_from_command( plan_configuration.command, 
+                        str(files_from), source_scan.base, source_scan.recursive )
+                    workers = 1
+
+                result = _run_transfers( plan_configuration, workers, dry_run, snapshot, 
+                    Path(work_dir), file_log_path, progress )
+    finally:
+        progress.stop()
+
+    if source_scan is not None and result.ok and not noop:
+        save_manifest( plan_configuration, source_scan )
+
+    # Mismatches found by the verification are notified as a failure
+    verified = None
+    if verification is not None and result.ok:
+        verified = verify_after_run( verification, file_log_path )
+        result.summary += "\n\n" + verified.summary()
+
+    ok = result.ok and ( verified is None or verified.ok() )
     event_type = EventType.on_success if ok else EventType.on_failure
-    event = Event( plan_configuration.name, event_type, summary )
+    event = Event( plan_configuration.name, event_type, result.summary )
+    notification_outcomes = dict()
 
     if notification_en:
         cinfo("[*] Sending notifications")
         notification_list = plan_configuration.notification
-        send_notification(notification_list, event, file_log_path)
-        return
+        notification_outcomes = send_notification(notification_list, event, 
+            file_log_path, plan_configuration.notification_deadline)
+    
+    record_run( plan_configuration.name, result, dry_run, file_log_path, notification_outcomes,
+        None if snapshot is None or dry_run else snapshot.name,
+        None if source_scan is None else source_scan.mode.value )
+
+    # The retention policy is applied out of the exit path of the job
+    if logging_en:
+        pid = spawn_log_retention( plan_configuration.name, file_log_path.parent )
+        cinfo(f"[*] Applying log retention policy in background (pid {pid})")
+
+    if notification_en: return
     
     # If notifications are disabled then printout content on screeen
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
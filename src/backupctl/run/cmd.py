@@ -11,7 +11,7 @@ def run( args: argparse.Namespace ) -> None:
         notifications_en = args.notify
         logging_en = args.log
         dry_run_en = args.dry_run
-        
+        workers = args.workers
 
         # Performs a first check that the target is in the registry
         registry = read_registry()
@@ -20,7 +20,7 @@ def run( args: argparse.Namespace ) -> None:
             return 0
         
         # Otherwise, run the job
-        run_job( target, dry_run_en, notifications_en, logging_en )
+        run_job( target, dry_run_en, notifications_en, logging_en, workers )
         return 0
         
     except Exception as e:
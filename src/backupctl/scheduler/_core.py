@@ -0,0 +1,230 @@
+import signal
+import threading
+import time
+
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, Optional
+
+from backupctl.constants import DEFAULT_PLAN_CONF_FOLDER, DEFAULT_PLAN_SUFFIX, \
+    REGISTERED_JOBS_FILE, RUN_LOCK_FOLDER, SCHEDULER_STATE_FILE
+from backupctl.models.admission import OverlapPolicy
+from backupctl.models.plan_config import load_plan_configuration
+from backupctl.models.registry import Job, JobBackend, read_registry
+from backupctl.models.scheduler import CatchUpPolicy, SchedulerState, TimerQueue, \
+    catch_up_fires, missed_fires, next_fire
+from backupctl.run._core import run_job
+from backupctl.utils.lock import SlotPool
+from backupctl.utils.console import cerror, cinfo, cwarn
+
+REGISTRY_CHECK_INTERVAL = 30.0 # Seconds between two checks of the registry for changes
+
+JobRunner = Callable[[str, bool, bool, bool], bool]
+
+@dataclass
+class ScheduledJob:
+    name     : str  # The name of the job
+    schedule : str  # The cron expression of the job
+    notify   : bool # Run with notifications, as the registry command does
+    log      : bool # Run with file logging, as the registry command does
+    host     : Optional[str] # The host:port of the main remote of the plan
+    overlap  : OverlapPolicy # What to do when the job fires while it is active
+
+    @staticmethod
+    def from_job( job: Job ) -> 'ScheduledJob':
+        """ Creates the scheduled job out of the registry entry and its plan """
+        plan = load_plan_configuration(
+            DEFAULT_PLAN_CONF_FOLDER / f"{job.name}{DEFAULT_PLAN_SUFFIX}" )
+        args = job.cmd.split()[5:]
+        return ScheduledJob( job.name, job.schedule(), "--notify" in args, "--log" in args,
+            plan.remote, OverlapPolicy( plan.overlap ) )
+
+@dataclass
+class PendingRun:
+    job      : ScheduledJob # The job to run
+    fire     : datetime     # The firing the run is for
+    catch_up : bool = False # True if the firing has been missed while down
+
+class Scheduler:
+    """ Fires the jobs of the scheduler backend and runs them in-process. At
+    most `max_jobs` jobs run at once, and at most `max_per_host` of them
+    towards the same remote: the runs exceeding the limits wait in FIFO
+    order. A job firing while it is running or waiting follows the overlap
+    policy of its plan, as its cron runs would. """
+    def __init__(
+        self, max_jobs: int, max_per_host: int, catch_up: CatchUpPolicy,
+        state_path: Path = SCHEDULER_STATE_FILE, runner: JobRunner = run_job
+    ):
+        self.max_jobs, self.max_per_host, self.catch_up = max_jobs, max_per_host, catch_up
+        self.state_path, self.runner = state_path, runner
+        self.state = SchedulerState.load( state_path )
+        self.jobs: Dict[str, ScheduledJob] = dict()
+        self.timers = TimerQueue()
+        self.pending: Deque[PendingRun] = deque()
+        self.running: Dict[str, ScheduledJob] = dict()
+        self.wake = threading.Event() # Set when a run finishes or the daemon must stop
+        self._lock = threading.Lock() # Guards the running jobs, released by the workers
+        self._executor = ThreadPoolExecutor( max_workers=max_jobs, thread_name_prefix="job" )
+        self._registry_mtime: Optional[float] = None
+
+    def __enter__( self ) -> 'Scheduler':
+        return self
+
+    def __exit__( self, *exc_info ) -> None:
+        """ Wait for the running jobs, dropping the waiting ones """
+        self.pending.clear()
+        if self.running: cinfo(f"[*] Waiting for {len(self.running)} running job(s)")
+        self._executor.shutdown( wait=True )
+
+    def reload( self, now: datetime, startup: bool = False ) -> None:
+        """ Read the registry again if it changed since the last reading """
+        try:
+            mtime = REGISTERED_JOBS_FILE.stat().st_mtime
+        except OSError:
+            mtime = None
+        if not startup and mtime == self._registry_mtime: return
+        self._registry_mtime = mtime
+
+        jobs = dict()
+        for name, job in ( read_registry() or dict() ).items():
+            if job.backend is not JobBackend.scheduler or not job.is_enabled(): continue
+            try:
+                jobs[name] = ScheduledJob.from_job( job )
+            except Exception as e:
+                cerror(f"[*] Cannot schedule job {name}: {e}")
+        self.update_jobs( jobs, now, startup )
+
+    def update_jobs( self, jobs: Dict[str, ScheduledJob], now: datetime, startup: bool ) -> None:
+        """ Replace the scheduled jobs. New jobs, and jobs whose schedule
+        changed, fire next after the input time. At startup, the firings
+        missed since the last one handled are run as per the catch-up
+        policy. """
+        for name in [ name for name in self.jobs if name not in jobs ]:
+            cinfo(f"[*] Job {name} is no longer scheduled")
+            del self.jobs[name]
+            self.timers.cancel( name )
+            self.pending = deque( run for run in self.pending if run.job.name != name )
+
+        for name, job in jobs.items():
+            previous = self.jobs.get( name )
+            self.jobs[name] = job
+            if previous is not None and previous.schedule == job.schedule: continue
+
+            last = self.state.last_fires.get( name )
+            if startup and last is not None:
+                missed = missed_fires( job.schedule, last, now )
+                for fire in catch_up_fires( self.catch_up, missed ):
+                    self._enqueue( PendingRun( job, fire, catch_up=True ) )
+                if missed:
+                    cinfo(f"[*] Job {name} missed {len(missed)} firing(s), "
+                        f"catch-up policy {self.catch_up.value}")
+                    self.state.last_fires[name] = missed[-1]
+
+            self.timers.schedule( name, next_fire( job.schedule, now ) )
+            cinfo(f"[*] Job {name} scheduled at {next_fire( job.schedule, now )}")
+        self._save_state()
+
+    def fire( self, now: datetime ) -> None:
+        """ Queue the runs of the jobs due at the input time """
+        due = self.timers.pop_due( now )
+        for name, when in due:
+            job = self.jobs[name]
+            self.timers.schedule( name, next_fire( job.schedule, now ) )
+            self.state.last_fires[name] = when
+            self._enqueue( PendingRun( job, when ) )
+        if due: self._save_state()
+
+    def _enqueue( self, run: PendingRun ) -> None:
+        """ Queue the run, unless the overlap policy of the job drops it """
+        name = run.job.name
+        with self._lock: running = name in self.running
+        waiting = any( pending.job.name == name for pending in self.pending )
+        if not run.catch_up and ( running or waiting ):
+            if run.job.overlap is OverlapPolicy.skip:
+                cwarn(f"[*] Job {name} is already running or queued, skipping")
+                return
+            if run.job.overlap is OverlapPolicy.queue and waiting:
+                cwarn(f"[*] Job {name} is already queued, skipping")
+                return
+        self.pending.append( run )
+
+    def dispatch( self ) -> None:
+        """ Start the waiting runs allowed by the concurrency limits """
+        with self._lock:
+            running = dict( self.running )
+        hosts = Counter( job.host for job in running.values() if job.host is not None )
+
+        for run in list( self.pending ):
+            if len( running ) >= self.max_jobs: break
+            job = run.job
+            if job.name in running: continue
+            if job.host is not None and hosts[job.host] >= self.max_per_host: continue
+
+            self.pending.remove( run )
+            running[job.name] = job
+            if job.host is not None: hosts[job.host] += 1
+            with self._lock: self.running[job.name] = job
+
+            kind = "catch-up run" if run.catch_up else "run"
+            cinfo(f"[*] {datetime.now():%Y-%m-%d %H:%M:%S} Starting the {kind} of job "
+                f"{job.name} fired at {run.fire:%Y-%m-%d %H:%M}")
+            future = self._executor.submit( self.runner, job.name, False, job.notify, job.log )
+            future.add_done_callback( lambda f, name=job.name: self._finished( name, f ) )
+
+    def _finished( self, name: str, future: Future ) -> None:
+        with self._lock: self.running.pop( name, None )
+        if future.exception() is not None:
+            cerror(f"[*] Job {name} failed: {future.exception()}")
+        self.wake.set()
+
+    def wait_time( self, now: datetime, limit: float ) -> float:
+        """ Returns the seconds before the next firing, at most `limit` """
+        when = self.timers.next_time()
+        if when is None: return limit
+        return max( 0.0, min( limit, ( when - now ).total_seconds() ) )
+
+    def serve( self, stop: threading.Event ) -> None:
+        """ Fire and run the jobs until the stop event is set """
+        self.reload( datetime.now(), startup=True )
+        next_check = time.monotonic() + REGISTRY_CHECK_INTERVAL
+        while not stop.is_set():
+            now = datetime.now()
+            if time.monotonic() >= next_check:
+                self.reload( now )
+                next_check = time.monotonic() + REGISTRY_CHECK_INTERVAL
+
+            self.fire( now )
+            self.dispatch()
+            self.wake.wait( self.wait_time( now, max( 0.0, next_check - time.monotonic() ) ) )
+            self.wake.clear()
+
+    def _save_state( self ) -> None:
+        try:
+            self.state.save( self.state_path )
+        except OSError as e:
+            cwarn(f"[*] Cannot save the scheduler state: {e}")
+
+def run_scheduler( max_jobs: int, max_per_host: int, catch_up: CatchUpPolicy ) -> bool:
+    """ Run the scheduler daemon until SIGTERM or SIGINT, then wait for the
+    running jobs. Returns False if another scheduler is already running. """
+    with SlotPool( RUN_LOCK_FOLDER, "scheduler", 1 ) as pool:
+        if not pool.try_acquire():
+            cerror("[*] Another scheduler is already running")
+            return False
+
+        stop = threading.Event()
+        with Scheduler( max_jobs, max_per_host, catch_up ) as scheduler:
+            def request_stop( signum: int, frame ) -> None:
+                cinfo(f"\n[*] {signal.Signals(signum).name} received, stopping the scheduler")
+                stop.set()
+                scheduler.wake.set()
+
+            signal.signal( signal.SIGTERM, request_stop )
+            signal.signal( signal.SIGINT, request_stop )
+            cinfo(f"[*] Scheduler started: {max_jobs} job(s) at most, {max_per_host} per host")
+            scheduler.serve( stop )
+
+    return True
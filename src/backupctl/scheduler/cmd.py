@@ -0,0 +1,21 @@
+import argparse
+
+from ._core import run_scheduler
+from backupctl.models.scheduler import CatchUpPolicy
+from backupctl.utils.console import cerror, cwarn
+
+def run( args: argparse.Namespace ) -> None:
+    try:
+        if args.max_jobs < 1 or args.max_per_host < 1:
+            cerror("[ERROR] --max-jobs and --max-per-host must be at least 1")
+            return 1
+
+        ok = run_scheduler( args.max_jobs, args.max_per_host, CatchUpPolicy( args.catch_up ) )
+        return 0 if ok else 1
+
+    except KeyboardInterrupt:
+        cwarn("\n[*] CTRL+C - Exiting")
+        return 0
+    except Exception as e:
+        cerror(f"[ERROR] {e}")
+        return 1
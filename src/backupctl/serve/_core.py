@@ -0,0 +1,169 @@
+import os
+import pwd
+import signal
+import socketserver
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from backupctl.constants import CONTROL_SOCKET_FILE, DEFAULT_PLAN_CONF_FOLDER, \
+    DEFAULT_PLAN_SUFFIX, REGISTERED_JOBS_FILE, RUN_JOURNAL_FILE, RUN_LOCK_FOLDER
+from backupctl.inspect._core import inspect_block, load_target_plan, select_jobs
+from backupctl.models.plan_config import PlanCfg
+from backupctl.models.registry import Registry, read_registry
+from backupctl.utils.control import read_message, registry_lines, write_message
+from backupctl.utils.cron import CronList, read_cronlist_jobs
+from backupctl.utils.exceptions import BackupCtlError, InputValidationError
+from backupctl.utils.lock import SlotPool
+from backupctl.utils.console import cerror, cinfo
+
+CRONTAB_CACHE_TTL     = 10.0 # Seconds the crontab is cached when its file cannot be read
+CRONTAB_SPOOL_FOLDERS = ( "/var/spool/cron/crontabs", "/var/spool/cron" )
+
+FileKey = Optional[Tuple[int, int]]
+
+def file_keys( *paths: Path | str ) -> Tuple[FileKey, ...]:
+    """ Returns the modification time and the size of the files, which
+    change when they are written, None for the missing ones """
+    keys = []
+    for path in paths:
+        try:
+            st = os.stat( path )
+            keys.append( ( st.st_mtime_ns, st.st_size ) )
+        except OSError:
+            keys.append( None )
+    return tuple( keys )
+
+def plan_path( name: str ) -> Path:
+    return DEFAULT_PLAN_CONF_FOLDER / f"{name}{DEFAULT_PLAN_SUFFIX}"
+
+class ControlState:
+    """ The registry, the crontab, the plans and the last runs held in memory.
+    Each entry is loaded again when the files it was read from change. The
+    crontab spool file can usually be checked only by root: otherwise the
+    output of `crontab -l` is kept for CRONTAB_CACHE_TTL seconds. """
+    def __init__( self, crontab_ttl: float = CRONTAB_CACHE_TTL ):
+        self.crontab_ttl = crontab_ttl
+        self.hits, self.misses = 0, 0
+        self._entries: Dict[Hashable, Tuple[Hashable, Any]] = dict()
+        self._lock = threading.Lock()
+
+    def _cached( self, name: Hashable, key: Hashable, load: Callable[[], Any] ) -> Any:
+        with self._lock:
+            entry = self._entries.get( name )
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = load()
+        with self._lock: self._entries[name] = ( key, value )
+        return value
+
+    def registry( self ) -> Registry:
+        return self._cached( "registry", file_keys( REGISTERED_JOBS_FILE ), read_registry )
+
+    def cronlist( self ) -> CronList:
+        return self._cached( "cronlist", self._crontab_key(), read_cronlist_jobs )
+
+    def plan( self, name: str ) -> PlanCfg:
+        return self._cached( ( "plan", name ), file_keys( plan_path( name ) ),
+            lambda: load_target_plan( name ) )
+
+    def inspect( self, targets: Optional[List[str]] ) -> List[str]:
+        """ Returns the inspect blocks of the targets. A block depends on the
+        registry entry, the plan, the run journal and the log folder. """
+        if not REGISTERED_JOBS_FILE.exists():
+            raise InputValidationError("Registry file not found")
+
+        blocks = []
+        for job in select_jobs( self.registry(), targets ):
+            plan = self.plan( job.name )
+            key = ( str(job), file_keys( plan_path( job.name ), RUN_JOURNAL_FILE, plan.log.path ) )
+            blocks.append( self._cached( ( "inspect", job.name ), key,
+                lambda: inspect_block( job, plan ) ) )
+        return blocks
+
+    def _crontab_key( self ) -> Tuple[str, Any]:
+        user = pwd.getpwuid( os.getuid() ).pw_name
+        for folder in CRONTAB_SPOOL_FOLDERS:
+            key, = file_keys( os.path.join( folder, user ) )
+            if key is not None: return ( "file", key )
+        return ( "ttl", time.monotonic() // self.crontab_ttl )
+
+    def answer( self, request: Dict[str, Any] ) -> Dict[str, Any]:
+        """ Returns the reply to a request of the control protocol """
+        query = request.get("query")
+        try:
+            if query == "ping":
+                result = { "pid": os.getpid(), "hits": self.hits, "misses": self.misses }
+            elif query == "registry":
+                result = registry_lines( self.registry() )
+            elif query == "cronlist":
+                cronlist = self.cronlist()
+                result = None if cronlist is None else \
+                    { name: list( entry ) for name, entry in cronlist.items() }
+            elif query == "inspect":
+                result = self.inspect( request.get("targets") )
+            else:
+                return { "ok": False, "error": f"unknown query {query}" }
+        except BackupCtlError as e:
+            return { "ok": False, "error": str(e), "kind": type(e).__name__ }
+        except Exception as e:
+            return { "ok": False, "error": str(e) }
+        return { "ok": True, "result": result }
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    """ Answers a single request per connection """
+    def handle( self ) -> None:
+        try:
+            request = read_message( self.rfile )
+        except ValueError as e:
+            write_message( self.wfile, { "ok": False, "error": f"bad request: {e}" } )
+            return
+        write_message( self.wfile, self.server.state.answer( request ) )
+
+class ControlServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__( self, path: Path, state: ControlState ):
+        self.state = state
+        # Only the owner can connect, as the replies show the jobs and their errors
+        umask = os.umask( 0o177 )
+        try:
+            super().__init__( str(path), ControlHandler )
+        finally:
+            os.umask( umask )
+
+def serve_control( path: Path = CONTROL_SOCKET_FILE ) -> bool:
+    """ Serve the control socket until SIGTERM or SIGINT. Returns False if
+    another control server is already running. """
+    with SlotPool( RUN_LOCK_FOLDER, "control", 1 ) as pool:
+        if not pool.try_acquire():
+            cerror("[*] Another control server is already running")
+            return False
+
+        # Holding the lock, a socket left behind is one of a dead server
+        path.parent.mkdir( parents=True, exist_ok=True )
+        path.unlink( missing_ok=True )
+        server = ControlServer( path, ControlState() )
+        stop = threading.Event()
+        def request_stop( signum: int, frame ) -> None:
+            cinfo(f"\n[*] {signal.Signals(signum).name} received, stopping the control server")
+            stop.set()
+
+        signal.signal( signal.SIGTERM, request_stop )
+        signal.signal( signal.SIGINT, request_stop )
+        thread = threading.Thread( target=server.serve_forever, name="control", daemon=True )
+        thread.start()
+        cinfo(f"[*] Control server listening on {path}")
+        try:
+            while not stop.wait( 1.0 ): ...
+        finally:
+            server.shutdown()
+            server.server_close()
+            path.unlink( missing_ok=True )
+
+    return True
@@ -0,0 +1,15 @@
+import argparse
+
+from ._core import serve_control
+from backupctl.utils.console import cerror, cwarn
+
+def run( args: argparse.Namespace ) -> None:
+    try:
+        return 0 if serve_control() else 1
+
+    except KeyboardInterrupt:
+        cwarn("\n[*] CTRL+C - Exiting")
+        return 0
+    except Exception as e:
+        cerror(f"[ERROR] {e}")
+        return 1
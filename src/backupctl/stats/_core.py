@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from statistics import median
+from typing import Dict, List, Optional
+
+from tabulate import tabulate
+
+from backupctl.models.journal import RunRecord, read_runs
+from backupctl.utils.exceptions import InputValidationError, ensure
+from backupctl.utils.units import human_bytes, human_duration
+
+PERCENTILES = (50, 90, 99)
+TREND_WINDOW = 5 # Number of recent runs compared against the previous ones
+
+
+@dataclass
+class TargetStats:
+    name: str
+    runs: int
+    success_rate: float
+    durations: Dict[int, float]
+    throughputs: Optional[Dict[int, float]]
+    trend: Optional[float]
+    last_run: datetime
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """ Nearest-rank percentile of a non-empty list of values """
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _trend(durations: List[float]) -> Optional[float]:
+    """ Relative change of the median duration of the most recent runs
+    with respect to the runs before them, None if not enough runs. """
+    window = min(TREND_WINDOW, len(durations) // 2)
+    if window == 0:
+        return None
+    recent = median(durations[-window:])
+    previous = median(durations[-2 * window:-window])
+    if previous <= 0:
+        return None
+    return recent / previous - 1
+
+
+def compute_target_stats(name: str, records: List[RunRecord]) -> TargetStats:
+    durations = [r.duration_s for r in records]
+    throughputs = [t for r in records if r.ok() and (t := r.throughput()) is not None]
+    return TargetStats(
+        name=name,
+        runs=len(records),
+        success_rate=sum(r.ok() for r in records) / len(records),
+        durations={p: percentile(durations, p) for p in PERCENTILES},
+        throughputs={p: percentile(throughputs, p) for p in PERCENTILES} if throughputs else None,
+        trend=_trend(durations),
+        last_run=records[-1].started,
+    )
+
+
+def collect_stats(targets: Optional[List[str]], days: int) -> List[TargetStats]:
+    ensure(days >= 1, "The number of days must be at least 1", InputValidationError)
+    since = datetime.now() - timedelta(days=days)
+    by_target: Dict[str, List[RunRecord]] = {}
+    for record in read_runs(targets, since):
+        by_target.setdefault(record.target, []).append(record)
+
+    ensure(bool(by_target), f"No runs recorded in the last {days} days", InputValidationError)
+    return [compute_target_stats(name, records) for name, records in sorted(by_target.items())]
+
+
+def _format_percentiles(values: Optional[Dict[int, float]], fmt) -> str:
+    if values is None:
+        return "-"
+    return " / ".join(fmt(values[p]) for p in PERCENTILES)
+
+
+def _format_trend(trend: Optional[float]) -> str:
+    if trend is None:
+        return "-"
+    mark = "▲" if trend > 0.1 else "▼" if trend < -0.1 else "="
+    return f"{mark} {trend:+.0%}"
+
+
+def format_stats(stats: List[TargetStats]) -> str:
+    pct = "/".join(f"p{p}" for p in PERCENTILES)
+    headers = ["Target", "Runs", "Success", f"Duration ({pct})",
+               f"Throughput ({pct})", "Duration Trend", "Last Run"]
+    rows = [
+        [
+            s.name,
+            s.runs,
+            f"{s.success_rate:.0%}",
+            _format_percentiles(s.durations, human_duration),
+            _format_percentiles(s.throughputs, lambda v: f"{human_bytes(v)}/s"),
+            _format_trend(s.trend),
+            s.last_run.strftime("%Y-%m-%d %H:%M"),
+        ]
+        for s in stats
+    ]
+    return tabulate(rows, headers=headers, tablefmt="grid")
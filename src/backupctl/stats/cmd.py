@@ -0,0 +1,11 @@
+import argparse
+
+from backupctl.utils.exceptions import assertion_wrapper
+from ._core import collect_stats, format_stats
+from backupctl.utils.console import cinfo
+
+
+@assertion_wrapper
+def run(args: argparse.Namespace) -> None:
+    stats = collect_stats(args.target, args.days)
+    cinfo(format_stats(stats))
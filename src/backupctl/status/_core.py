@@ -1,4 +1,4 @@
-from backupctl.models.registry import Registry, Job
+from backupctl.models.registry import Registry, Job, cron_jobs
 from backupctl.constants import *
 from backupctl.utils.cron import *
 from typing import Optional
@@ -11,8 +11,10 @@ def check_consistency( registry: Registry, cronlist: CronList ) -> bool:
     mirror jobs registered into the cronlist. Each missed job
     is an error and should be solved using the `apply` command.
     Other consistency errors includes enabled jobs that are
-    disabled in the other list, command mismatch and so on. """
+    disabled in the other list, command mismatch and so on. Jobs
+    fired by the scheduler daemon have no crontab entry. """
     start_print = False
+    registry = cron_jobs( registry )
 
     # First check that if registry is empty also the cronlist shall be empty
     if ( (registry is None) ^ (cronlist is None) ):
@@ -102,8 +104,9 @@ def check_consistency( registry: Registry, cronlist: CronList ) -> bool:
     return return_status
 
 def make_job_consistent( job: Job, cronout: Optional[List[str]] = None ) -> None:
-    """ Makes the crontab entry releated to a job consistent with the registry """
-    wanted_cmd = job.to_cron(with_tag=True)
+    """ Makes the crontab entry releated to a job consistent with the registry,
+    removing it if the job is fired by the scheduler daemon """
+    wanted_cmd = job.to_cron(with_tag=True) if job.is_cron() else None
 
     # Get the cron output if not passed as input
     if cronout is None: cronout = get_crontab_list()
@@ -129,7 +132,7 @@ def make_registry_consistent( registry: Registry ) -> None:
         
         for _, registry_job in registry.items():
             _cron_match_line = partial( cron_match_line, registry_job )
-            wanted_cmd = registry_job.to_cron(with_tag=True)
+            wanted_cmd = registry_job.to_cron(with_tag=True) if registry_job.is_cron() else None
             insert_cron_command(cronout, wanted_cmd, _cron_match_line)
 
     def not_registry_job( cronline: str ) -> bool:
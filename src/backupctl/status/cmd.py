@@ -11,7 +11,7 @@ kind of check the REGISTRY file is the source of truth.
 
 import argparse
 
-from backupctl.models.registry import read_registry
+from backupctl.utils.control import served_cronlist, served_registry
 from ._core import *
 from backupctl.utils.console import cerror, cinfo, csuccess, cwarn
 
@@ -20,12 +20,12 @@ def run( args: argparse.Namespace ) -> None:
         cinfo("[*] Starting helthcheck")
 
         # Load the registry with all jobs
-        registry = read_registry()
+        registry = served_registry()
         registry_size = 0 if registry is None else len(registry)
         cinfo(f"[*] Registry loaded from {REGISTERED_JOBS_FILE} ({registry_size})")
 
         # Load the cronlist
-        cronlist = read_cronlist_jobs()
+        cronlist = served_cronlist()
         cronlist_len = 0 if cronlist is None else len(cronlist)
         cinfo(f"[*] Cronlist loaded ({cronlist_len})")
 
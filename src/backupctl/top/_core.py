@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+
+from datetime import datetime
+from typing import List, Optional
+
+from tabulate import tabulate
+
+from backupctl.models.progress import RunProgress, read_progress_files
+from backupctl.utils.console import cinfo, cprint, cwarn, get_console
+from backupctl.utils.exceptions import InputValidationError, ensure
+from backupctl.utils.units import human_bytes, human_duration
+
+STALLED_AFTER_S = 60 # Seconds without progress updates before flagging a job
+
+
+def _elapsed_s(iso_timestamp: str, now: datetime) -> float:
+    return (now - datetime.fromisoformat(iso_timestamp)).total_seconds()
+
+
+def _state(progress: RunProgress, now: datetime) -> str:
+    if not progress.workers:
+        return "starting"
+    if _elapsed_s(progress.updated, now) > STALLED_AFTER_S:
+        return "⚠ stalled"
+    return "running"
+
+
+def _format_row(progress: RunProgress, now: datetime) -> List[str]:
+    percent, eta_s = progress.percent(), progress.eta_s()
+    return [
+        progress.target,
+        str(progress.pid),
+        _state(progress, now),
+        human_duration(_elapsed_s(progress.started, now)),
+        human_bytes(progress.bytes_done()),
+        "-" if percent is None else f"{percent}%",
+        f"{human_bytes(progress.rate())}/s",
+        "-" if eta_s is None else human_duration(eta_s),
+        str(len(progress.workers)),
+        human_duration(_elapsed_s(progress.updated, now)) + " ago",
+    ]
+
+
+def running_jobs() -> List[RunProgress]:
+    """ Returns the progress of all the jobs whose process is alive """
+    return [p for p in read_progress_files() if p.is_alive()]
+
+
+def format_running_jobs(progresses: List[RunProgress]) -> str:
+    now = datetime.now()
+    headers = ["Target", "PID", "State", "Elapsed", "Done", "Progress",
+               "Rate", "ETA", "Workers", "Updated"]
+    rows = [_format_row(p, now) for p in progresses]
+    return tabulate(rows, headers=headers, tablefmt="grid")
+
+
+def _show_once() -> None:
+    progresses = running_jobs()
+    if not progresses:
+        cwarn("[*] No running jobs")
+        return
+    cinfo(format_running_jobs(progresses))
+
+
+def _clear_screen() -> None:
+    console = get_console()
+    if hasattr(console, "clear"):
+        console.clear()
+    else:
+        cprint("\033[2J\033[H", end="", flush=True)
+
+
+def show_running_jobs(interval: Optional[float]) -> None:
+    """ Show all the in-flight jobs once, or every `interval` seconds """
+    if interval is None:
+        _show_once()
+        return
+
+    ensure(interval > 0, "The refresh interval must be positive", InputValidationError)
+    while True:
+        _clear_screen()
+        cinfo(f"backupctl top - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        _show_once()
+        time.sleep(interval)
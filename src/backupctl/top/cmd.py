@@ -0,0 +1,13 @@
+import argparse
+
+from backupctl.utils.exceptions import assertion_wrapper
+from backupctl.utils.console import cwarn
+from ._core import show_running_jobs
+
+
+@assertion_wrapper
+def run(args: argparse.Namespace) -> None:
+    try:
+        show_running_jobs(args.interval)
+    except KeyboardInterrupt:
+        cwarn("\n[*] CTRL+C - Exiting")
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Hashable, Optional
+
+@dataclass
+class TaskResult:
+    value : Any = None                     # The value returned by the task
+    error : Optional[BaseException] = None # The exception raised by the task
+    done  : bool = False                   # False if the task missed the deadline
+
+def run_with_deadline(
+    tasks: Dict[Hashable, Callable[[], Any]], deadline: Optional[float]
+) -> Dict[Hashable, TaskResult]:
+    """ Run all the tasks concurrently and wait for them until the deadline,
+    a `time.monotonic()` timestamp, expires. Tasks run into daemon threads,
+    hence those still running after the deadline are abandoned and do not
+    keep the process alive. A None deadline waits for all the tasks. """
+    results = { key: TaskResult() for key in tasks }
+
+    def _worker( key: Hashable, task: Callable[[], Any] ) -> None:
+        try:
+            results[key].value = task()
+        except Exception as e:
+            results[key].error = e
+        finally:
+            results[key].done = True
+
+    threads = [
+        threading.Thread( target=_worker, args=(key, task), daemon=True )
+        for key, task in tasks.items()
+    ]
+
+    for thread in threads: thread.start()
+    for thread in threads:
+        timeout = None if deadline is None else max( 0.0, deadline - time.monotonic() )
+        thread.join( timeout )
+
+    # Return a snapshot, abandoned tasks might still update their result
+    return { key: replace( result ) for key, result in results.items() }
@@ -0,0 +1,67 @@
+import json
+import socket
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backupctl.constants import CONTROL_SOCKET_FILE
+from backupctl.models.registry import Job, Registry, read_registry
+from backupctl.utils.cron import CronList, read_cronlist_jobs
+from backupctl.utils.exceptions import BackupCtlError
+
+CONTROL_TIMEOUT   = 2.0 # Seconds before giving up on the control server
+MAX_MESSAGE_SIZE  = 16 * 1024 * 1024 # Bytes of a request or a reply
+
+# Errors raised by the server, raised again by the client as they are
+SERVED_ERRORS = { cls.__name__: cls for cls in BackupCtlError.__subclasses__() }
+
+def read_message( io ) -> Dict[str, Any]:
+    """ Read a JSON message, one per line """
+    line = io.readline( MAX_MESSAGE_SIZE )
+    if not line.endswith( b"\n" ): raise ValueError("truncated message")
+    return json.loads( line )
+
+def write_message( io, message: Dict[str, Any] ) -> None:
+    io.write( json.dumps( message ).encode( "utf-8" ) + b"\n" )
+    io.flush()
+
+def control_query(
+    request: Dict[str, Any], path: Path = CONTROL_SOCKET_FILE
+) -> Optional[Dict[str, Any]]:
+    """ Send the request to the control server and returns its reply,
+    holding the `result`. Returns None if no server is running or it
+    cannot answer, and the caller reads the files itself. The expected
+    errors of the server, such as a missing target, are raised again. """
+    if not path.exists(): return None
+    try:
+        with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as sock:
+            sock.settimeout( CONTROL_TIMEOUT )
+            sock.connect( str(path) )
+            with sock.makefile( "rwb" ) as io:
+                write_message( io, request )
+                reply = read_message( io )
+    except ( OSError, ValueError ):
+        return None
+
+    if reply.get("ok"): return reply
+    error = SERVED_ERRORS.get( reply.get("kind") )
+    if error is not None: raise error( reply.get("error") )
+    return None
+
+def registry_lines( registry: Registry ) -> Optional[List[str]]:
+    """ Returns the registry as sent by the server """
+    return None if registry is None else [ str(job) for job in registry.values() ]
+
+def served_registry( path: Path = CONTROL_SOCKET_FILE ) -> Registry:
+    """ Returns the registry, from the control server if running """
+    reply = control_query( { "query": "registry" }, path )
+    if reply is None: return read_registry()
+    if reply["result"] is None: return None
+    return { job.name: job for job in map( Job.fromstr, reply["result"] ) }
+
+def served_cronlist( path: Path = CONTROL_SOCKET_FILE ) -> CronList:
+    """ Returns the backupctl jobs of the crontab, from the control server if running """
+    reply = control_query( { "query": "cronlist" }, path )
+    if reply is None: return read_cronlist_jobs()
+    if reply["result"] is None: return None
+    return { name: ( enabled, cmd ) for name, ( enabled, cmd ) in reply["result"].items() }
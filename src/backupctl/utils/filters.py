@@ -0,0 +1,51 @@
+import fnmatch
+import os
+
+from typing import List
+
+class ExcludeFilter:
+    """ Approximation of the rsync include/exclude rules of a command, used
+    to avoid watching and listing excluded paths. rsync still applies its
+    own filters to every path it receives. """
+    def __init__( self, excludes: List[str], includes: List[str] ):
+        self.excludes = [ p for p in excludes if p.strip() ]
+        self.includes = [ p for p in includes if p.strip() ]
+
+    @staticmethod
+    def from_command( command: List[str] ) -> 'ExcludeFilter':
+        """ Collects the --exclude, --include and --exclude-from rules """
+        excludes, includes = [], []
+        for arg in command[1:]:
+            if arg.startswith("--exclude="): excludes.append( arg.split("=", 1)[1] )
+            if arg.startswith("--include="): includes.append( arg.split("=", 1)[1] )
+            if not arg.startswith("--exclude-from="): continue
+            try:
+                with open( arg.split("=", 1)[1], encoding="utf-8" ) as io:
+                    excludes.extend( line.strip() for line in io 
+                        if line.strip() and not line.startswith("#") )
+            except OSError:
+                continue
+        return ExcludeFilter( excludes, includes )
+
+    @staticmethod
+    def _match( pattern: str, rel_path: str, abs_path: str ) -> bool:
+        pattern = pattern.rstrip("/")
+        if pattern.endswith("/***"):
+            folder = pattern[:-4]
+            return ExcludeFilter._match( folder, rel_path, abs_path ) or \
+                ExcludeFilter._match( folder + "/*", rel_path, abs_path )
+
+        # Anchored patterns match from the root of the transfer, or from the
+        # root of the filesystem as the configuration uses absolute paths
+        if pattern.startswith("/"):
+            return fnmatch.fnmatchcase( "/" + rel_path, pattern ) or \
+                fnmatch.fnmatchcase( abs_path, pattern )
+        if "/" in pattern:
+            return fnmatch.fnmatchcase( rel_path, pattern ) or \
+                fnmatch.fnmatchcase( rel_path, "*/" + pattern )
+        return fnmatch.fnmatchcase( os.path.basename(rel_path), pattern )
+
+    def excluded( self, rel_path: str, abs_path: str ) -> bool:
+        """ Check whether the path, relative to the transfer root, is excluded """
+        if any( self._match( p, rel_path, abs_path ) for p in self.includes ): return False
+        return any( self._match( p, rel_path, abs_path ) for p in self.excludes )
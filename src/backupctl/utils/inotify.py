@@ -0,0 +1,90 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+
+from typing import List, NamedTuple, Optional
+
+IN_ACCESS        = 0x00000001
+IN_MODIFY        = 0x00000002
+IN_ATTRIB        = 0x00000004
+IN_CLOSE_WRITE   = 0x00000008
+IN_MOVED_FROM    = 0x00000040
+IN_MOVED_TO      = 0x00000080
+IN_CREATE        = 0x00000100
+IN_DELETE        = 0x00000200
+IN_DELETE_SELF   = 0x00000400
+IN_MOVE_SELF     = 0x00000800
+IN_Q_OVERFLOW    = 0x00004000
+IN_IGNORED       = 0x00008000
+IN_ONLYDIR       = 0x01000000
+IN_DONT_FOLLOW   = 0x02000000
+IN_EXCL_UNLINK   = 0x04000000
+IN_ISDIR         = 0x40000000
+IN_NONBLOCK      = os.O_NONBLOCK
+IN_CLOEXEC       = os.O_CLOEXEC
+
+EVENT_HEADER     = struct.Struct("iIII") # wd, mask, cookie, len
+EVENT_BUFFER     = 256 * 1024 # Bytes read from the inotify descriptor at once
+
+class InotifyEvent(NamedTuple):
+    wd     : int # The watch descriptor, -1 for queue overflows
+    mask   : int # The IN_* flags of the event
+    cookie : int # Links the IN_MOVED_FROM and IN_MOVED_TO of a rename
+    name   : str # The entry name inside the watched folder, empty for the folder itself
+
+def _libc() -> ctypes.CDLL:
+    libc = ctypes.CDLL( ctypes.util.find_library("c") or "libc.so.6", use_errno=True )
+    libc.inotify_add_watch.argtypes = [ ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32 ]
+    return libc
+
+def _check( result: int, what: str ) -> int:
+    if result >= 0: return result
+    errno = ctypes.get_errno()
+    raise OSError( errno, f"{what}: {os.strerror(errno)}" )
+
+def parse_events( data: bytes ) -> List[InotifyEvent]:
+    """ Decode the `struct inotify_event` records read from the descriptor """
+    events, offset = [], 0
+    while offset + EVENT_HEADER.size <= len(data):
+        wd, mask, cookie, length = EVENT_HEADER.unpack_from( data, offset )
+        offset += EVENT_HEADER.size
+        name = data[offset:offset + length].split(b"\0", 1)[0]
+        events.append( InotifyEvent( wd, mask, cookie, os.fsdecode(name) ) )
+        offset += length
+    return events
+
+class Inotify:
+    """ Thin ctypes binding of the Linux inotify API """
+    def __init__( self ):
+        self._libc = _libc()
+        self.fd = _check( self._libc.inotify_init1( IN_NONBLOCK | IN_CLOEXEC ), "inotify_init1" )
+
+    def add_watch( self, path: str, mask: int ) -> int:
+        """ Watch the input path, returns its watch descriptor """
+        return _check( self._libc.inotify_add_watch( self.fd, os.fsencode(path), mask ), 
+            f"inotify_add_watch({path})" )
+
+    def rm_watch( self, wd: int ) -> None:
+        self._libc.inotify_rm_watch( self.fd, wd ) # Fails if already removed
+
+    def read_events( self, timeout: Optional[float] = None ) -> List[InotifyEvent]:
+        """ Wait up to `timeout` seconds (forever if None) for events """
+        ready, _, _ = select.select( [ self.fd ], [], [], timeout )
+        if not ready: return []
+        try:
+            return parse_events( os.read( self.fd, EVENT_BUFFER ) )
+        except BlockingIOError:
+            return []
+
+    def close( self ) -> None:
+        if self.fd < 0: return
+        os.close( self.fd )
+        self.fd = -1
+
+    def __enter__( self ) -> 'Inotify':
+        return self
+
+    def __exit__( self, *_ ) -> None:
+        self.close()
@@ -0,0 +1,142 @@
+import fcntl
+import os
+import time
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+@contextmanager
+def file_lock( path: Path, blocking: bool = True ) -> Iterator[bool]:
+    """ Hold an exclusive flock on the input file, creating it if needed.
+    The context yields False, without holding the lock, when it is not
+    blocking and the lock is already held by another process. The lock
+    is released by the kernel as well if the process dies. """
+    path.parent.mkdir( parents=True, exist_ok=True )
+    fd = os.open( path, os.O_RDWR | os.O_CREAT, 0o644 )
+    try:
+        try:
+            fcntl.flock( fd, fcntl.LOCK_EX | ( 0 if blocking else fcntl.LOCK_NB ) )
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock( fd, fcntl.LOCK_UN )
+    finally:
+        os.close( fd )
+
+def _pid_alive( pid: int ) -> bool:
+    try:
+        os.kill( pid, 0 )
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        ...
+    return True
+
+class SlotPool:
+    """ A fixed number of slots shared among processes. Each slot is a lock
+    file held with flock, hence slots of crashed processes are released by
+    the kernel. Processes waiting for a slot are served in FIFO order by
+    means of ticket files, named after their creation time and holding the
+    pid of their owner so that stale tickets can be discarded. """
+    def __init__( self, folder: Path, name: str, slots: int, poll_interval: float = 0.5 ):
+        if slots < 1: raise ValueError("the number of slots must be at least 1")
+        self.folder = folder
+        self.name = name
+        self.slots = slots
+        self.poll_interval = poll_interval
+        self.queue_folder = folder / f"{name}.queue"
+        self._held: Dict[int, int] = {} # Slot index -> file descriptor
+
+    def _slot_path( self, idx: int ) -> Path:
+        return self.folder / f"{self.name}.{idx}.lock"
+
+    def try_acquire( self, count: int = 1 ) -> bool:
+        """ Try to hold `count` slots without waiting. Either all of them
+        are held or none: a process holding a part of the slots it needs
+        while waiting for the others could deadlock with another one doing
+        the same. Returns True if the slots are held. """
+        self.folder.mkdir( parents=True, exist_ok=True )
+        for idx in range( self.slots ):
+            if len( self._held ) >= count: break
+            if idx in self._held: continue
+
+            fd = os.open( self._slot_path( idx ), os.O_RDWR | os.O_CREAT, 0o644 )
+            try:
+                fcntl.flock( fd, fcntl.LOCK_EX | fcntl.LOCK_NB )
+                self._held[ idx ] = fd
+            except BlockingIOError:
+                os.close( fd )
+
+        if len( self._held ) >= count: return True
+        self.release()
+        return False
+
+    def _queue_lock( self ):
+        return file_lock( self.folder / f"{self.name}.queue.lock" )
+
+    def _live_tickets( self ) -> List[Path]:
+        """ Returns the tickets in the queue, removing the stale ones """
+        tickets = []
+        for ticket in sorted( self.queue_folder.glob("*.ticket") ):
+            try:
+                if _pid_alive( int( ticket.read_text() ) ):
+                    tickets.append( ticket )
+                    continue
+            except ( OSError, ValueError ):
+                pass
+            ticket.unlink( missing_ok=True )
+
+        return tickets
+
+    def waiting( self ) -> int:
+        """ Returns the number of processes waiting for a slot """
+        with self._queue_lock():
+            return len( self._live_tickets() )
+
+    def acquire( self, count: int = 1, max_waiting: Optional[int] = None ) -> bool:
+        """ Hold `count` slots, waiting in FIFO order for them if needed.
+        Returns False without waiting when `max_waiting` processes are
+        already queued. """
+        count = min( count, self.slots )
+        self.queue_folder.mkdir( parents=True, exist_ok=True )
+
+        # Slots are taken right away only if nobody is waiting for them,
+        # otherwise a new ticket is enqueued if the queue is not full.
+        with self._queue_lock():
+            tickets = self._live_tickets()
+            if not tickets and self.try_acquire( count ): return True
+            # Nothing is held while waiting, see `try_acquire`
+            self.release()
+            if max_waiting is not None and len( tickets ) >= max_waiting: return False
+            
+            ticket = self.queue_folder / f"{time.time_ns():020d}-{os.getpid()}.ticket"
+            ticket.write_text( str( os.getpid() ) )
+
+        try:
+            while True:
+                # Only the process at the head of the queue takes the slots
+                with self._queue_lock():
+                    tickets = self._live_tickets()
+                    if tickets and tickets[0] == ticket and self.try_acquire( count ):
+                        return True
+
+                time.sleep( self.poll_interval )
+        finally:
+            ticket.unlink( missing_ok=True )
+
+    def release( self ) -> None:
+        for fd in self._held.values():
+            fcntl.flock( fd, fcntl.LOCK_UN )
+            os.close( fd )
+        self._held.clear()
+
+    def __enter__( self ) -> 'SlotPool':
+        return self
+
+    def __exit__( self, *_ ) -> None:
+        self.release()
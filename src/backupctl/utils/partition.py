@@ -0,0 +1,48 @@
+import heapq
+import os
+
+from pathlib import Path
+from typing import List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+def tree_size( path: Path ) -> int:
+    """ Returns the apparent size in bytes of a file or a directory tree.
+    Symbolic links are not followed and unreadable entries are ignored. """
+    try:
+        if not path.is_dir() or path.is_symlink():
+            return path.lstat().st_size
+    except OSError:
+        return 0
+
+    total, stack = 0, [ path ]
+    while stack:
+        try:
+            with os.scandir( stack.pop() ) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir( follow_symlinks=False ):
+                            stack.append( entry.path )
+                            continue
+                        total += entry.stat( follow_symlinks=False ).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+    return total
+
+def balanced_partition( items: List[Tuple[T, int]], n: int ) -> List[List[T]]:
+    """ Split the weighted items into at most `n` groups of similar total
+    weight, using the greedy longest-processing-time heuristic. Empty
+    groups are dropped from the result. """
+    if n < 1: raise ValueError("the number of groups must be at least 1")
+
+    groups: List[List[T]] = [ [] for _ in range(n) ]
+    heap = [ (0, idx) for idx in range(n) ] # ( group weight, group index )
+    for item, weight in sorted( items, key=lambda x: x[1], reverse=True ):
+        group_weight, group_idx = heapq.heappop( heap )
+        groups[group_idx].append( item )
+        heapq.heappush( heap, (group_weight + weight, group_idx) )
+
+    return [ group for group in groups if group ]
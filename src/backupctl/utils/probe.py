@@ -0,0 +1,87 @@
+import os
+import socket
+import subprocess
+import time
+
+from pathlib import Path
+from typing import List, Optional, Set
+
+PROBE_TIMEOUT   = 2.0 # Seconds before giving up a single probe
+RTT_ATTEMPTS    = 3 # TCP connections opened to measure the round trip time
+DISK_PROBE_SIZE = 16 * 1024**2 # Bytes read from the sources to measure the disk
+DISK_PROBE_MIN  = 1024**2 # Minimum bytes read for a meaningful disk measure
+
+def tcp_rtt( host: str, port: int, attempts: int = RTT_ATTEMPTS, 
+    timeout: float = PROBE_TIMEOUT 
+) -> Optional[float]:
+    """ Returns the round trip time in seconds towards the input host, as
+    the fastest TCP handshake out of a few attempts. None if unreachable. """
+    rtts = []
+    for _ in range( attempts ):
+        started = time.perf_counter()
+        try:
+            with socket.create_connection( (host, port), timeout=timeout ):
+                rtts.append( time.perf_counter() - started )
+        except OSError:
+            continue
+    return min( rtts ) if rtts else None
+
+def _probe_files( sources: List[str] ) -> List[Path]:
+    """ Returns regular files out of the sources, breadth first, enough to
+    read `DISK_PROBE_SIZE` bytes from them """
+    files, size, queue = [], 0, [ Path(source) for source in sources ]
+    while queue and size < DISK_PROBE_SIZE:
+        path = queue.pop( 0 )
+        try:
+            if path.is_symlink(): continue
+            if path.is_file():
+                files.append( path )
+                size += path.stat().st_size
+            elif path.is_dir():
+                with os.scandir( path ) as entries:
+                    queue.extend( Path(entry.path) for entry in entries )
+        except OSError:
+            continue
+    return files
+
+def disk_read_throughput( sources: List[str], max_bytes: int = DISK_PROBE_SIZE ) -> Optional[float]:
+    """ Returns the bytes per second read from the files of the sources,
+    reading at most `max_bytes`. Pages read are dropped from the cache
+    afterwards. None if not enough data could be read. """
+    read, elapsed = 0, 0.0
+    for path in _probe_files( sources ):
+        try:
+            fd = os.open( path, os.O_RDONLY )
+        except OSError:
+            continue
+
+        try:
+            started = time.perf_counter()
+            while read < max_bytes and ( chunk := os.read( fd, 1024**2 ) ):
+                read += len( chunk )
+            elapsed += time.perf_counter() - started
+            os.posix_fadvise( fd, 0, 0, os.POSIX_FADV_DONTNEED )
+        except OSError:
+            continue
+        finally:
+            os.close( fd )
+
+        if read >= max_bytes: break
+
+    if read < DISK_PROBE_MIN or elapsed <= 0: return None
+    return read / elapsed
+
+def rsync_compress_choices( executable: str = "rsync" ) -> Set[str]:
+    """ Returns the compression algorithms supported by the local rsync,
+    empty if rsync is too old to list them. """
+    try:
+        out = subprocess.run( [ executable, "--version" ], capture_output=True, 
+            text=True, timeout=PROBE_TIMEOUT, check=False )
+    except ( OSError, subprocess.TimeoutExpired ):
+        return set()
+
+    lines = out.stdout.splitlines()
+    for idx, line in enumerate( lines ):
+        if line.strip() == "Compress list:" and idx + 1 < len(lines):
+            return set( lines[idx + 1].split() )
+    return set()
@@ -0,0 +1,174 @@
+import codecs
+import os
+import selectors
+import signal
+import subprocess
+import time
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, TextIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 # Bytes read from a pipe at each wake-up
+DEFAULT_TAIL_SIZE  = 64 * 1024 # Characters kept in memory for each stream
+STALL_POLL_INTERVAL = 5.0 # Seconds between two reads of the I/O counters
+STALL_KILL_GRACE    = 10.0 # Seconds a terminated process has to exit before SIGKILL
+
+class TailBuffer:
+    """ Text buffer that only keeps the last `size` characters written """
+    def __init__( self, size: int = DEFAULT_TAIL_SIZE ):
+        self.size = size
+        self.truncated = False
+        self._buffer = ""
+
+    def write( self, data: str ) -> None:
+        self._buffer += data
+        if len(self._buffer) > self.size:
+            self._buffer = self._buffer[-self.size:]
+            self.truncated = True
+
+    def getvalue( self ) -> str:
+        return self._buffer
+
+@dataclass
+class StreamResult:
+    return_code      : int  # The return code of the process
+    stdout_tail      : str  # The last characters printed on the stdout
+    stderr_tail      : str  # The last characters printed on the stderr
+    stderr_truncated : bool # True if the stderr tail lost some content
+    interrupted      : bool = False # True if terminated at the deadline
+    stalled          : bool = False # True if killed by the stall watchdog
+
+def io_counters( pid: int ) -> Optional[int]:
+    """ Returns the bytes read plus the bytes written by the process,
+    sockets included, or None if /proc/<pid>/io cannot be read """
+    try:
+        with open( f"/proc/{pid}/io", encoding="ascii" ) as io:
+            counters = dict( line.split(":", 1) for line in io if ":" in line )
+        return int( counters["rchar"] ) + int( counters["wchar"] )
+    except ( OSError, KeyError, ValueError ):
+        return None
+
+class StallWatchdog:
+    """ Tracks the activity of a process, that is its output and, where
+    available, its I/O counters. The process is stalled when neither of
+    them changed for `timeout` seconds. """
+    def __init__( self, pid: int, timeout: float, poll: float = STALL_POLL_INTERVAL ):
+        self.pid, self.timeout, self.poll = pid, timeout, poll
+        now = time.monotonic()
+        self.last_activity = now
+        self.next_poll = now + poll
+        self.counters = io_counters( pid )
+
+    def activity( self ) -> None:
+        self.last_activity = time.monotonic()
+
+    def wait_time( self ) -> float:
+        """ Returns the seconds before the watchdog must be checked again """
+        wake_up = min( self.next_poll, self.last_activity + self.timeout )
+        return max( 0.0, wake_up - time.monotonic() )
+
+    def stalled( self ) -> bool:
+        now = time.monotonic()
+        if now >= self.next_poll:
+            self.next_poll = now + self.poll
+            counters = io_counters( self.pid )
+            if counters is not None and counters != self.counters:
+                self.counters = counters
+                self.last_activity = now
+        return now - self.last_activity >= self.timeout
+
+def _signal_group( process: subprocess.Popen, sig: int ) -> None:
+    """ Send the signal to the process group led by the process """
+    try:
+        os.killpg( process.pid, sig )
+    except ProcessLookupError:
+        pass
+
+def stream_command(
+    command: List[str], stdout_sink: TextIO, stderr_sink: TextIO, *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE, tail_size: int = DEFAULT_TAIL_SIZE,
+    on_stdout: Optional[Callable[[str], None]] = None, deadline: Optional[float] = None,
+    stall_timeout: Optional[float] = None, on_start: Optional[Callable[[int], None]] = None
+) -> StreamResult:
+    """ Run the command and forward its stdout and stderr to the input
+    sinks while the process is running. Bytes are read in chunks and
+    decoded incrementally, so that only a bounded tail of each stream
+    is kept in memory regardless of how much the process prints. The
+    optional callback receives the decoded stdout as it arrives. If the
+    process is still running at the deadline, a `time.monotonic()`
+    timestamp, it is terminated and its output is drained. With a stall
+    timeout, a process showing no activity for that many seconds is
+    terminated. A terminated process, at the deadline or stalled, is
+    killed if it does not exit within a grace period.
+    The process runs in its own process group, signalled as a whole. The
+    optional `on_start` receives the pid of the started process. """
+    process = subprocess.Popen( command, stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True )
+
+    tails = { process.stdout: TailBuffer(tail_size), process.stderr: TailBuffer(tail_size) }
+    sinks = { process.stdout: stdout_sink, process.stderr: stderr_sink }
+    decoders = {
+        pipe: codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for pipe in sinks
+    }
+
+    interrupted, stalled, kill_at = False, False, None
+    watchdog = None if stall_timeout is None else StallWatchdog( process.pid, stall_timeout )
+    try:
+        if on_start is not None: on_start( process.pid )
+        with selectors.DefaultSelector() as selector:
+            for pipe in sinks: selector.register( pipe, selectors.EVENT_READ )
+
+            while selector.get_map():
+                wake_ups = []
+                if deadline is not None and not interrupted and not stalled:
+                    wake_ups.append( deadline - time.monotonic() )
+                if watchdog is not None and not interrupted and not stalled:
+                    wake_ups.append( watchdog.wait_time() )
+                if kill_at is not None:
+                    wake_ups.append( kill_at - time.monotonic() )
+
+                timeout = max( 0.0, min( wake_ups ) ) if wake_ups else None
+                events = selector.select( timeout )
+                if events and watchdog is not None: watchdog.activity()
+
+                now = time.monotonic()
+                if kill_at is not None and now >= kill_at:
+                    _signal_group( process, signal.SIGKILL )
+                    kill_at = None
+                elif not interrupted and not stalled:
+                    if deadline is not None and now >= deadline:
+                        _signal_group( process, signal.SIGTERM )
+                        interrupted, kill_at = True, now + STALL_KILL_GRACE
+                    elif watchdog is not None and watchdog.stalled():
+                        _signal_group( process, signal.SIGTERM )
+                        stalled, kill_at = True, now + STALL_KILL_GRACE
+
+                for key, _ in events:
+                    pipe = key.fileobj
+                    chunk = os.read( key.fd, chunk_size )
+                    text = decoders[pipe].decode( chunk, final=not chunk )
+
+                    if text:
+                        sinks[pipe].write( text )
+                        sinks[pipe].flush()
+                        tails[pipe].write( text )
+                        if on_stdout is not None and pipe is process.stdout:
+                            on_stdout( text )
+
+                    # An empty read means that the process closed the pipe
+                    if not chunk:
+                        selector.unregister( pipe )
+                        pipe.close()
+
+        return_code = process.wait()
+
+    finally:
+        # Never leave the child behind if the caller fails writing
+        if process.poll() is None:
+            _signal_group( process, signal.SIGKILL )
+            process.wait()
+
+    stdout_tail, stderr_tail = tails[process.stdout], tails[process.stderr]
+    return StreamResult( return_code, stdout_tail.getvalue(), 
+        stderr_tail.getvalue(), stderr_tail.truncated, interrupted, stalled )
@@ -0,0 +1,280 @@
+import ctypes
+import ctypes.util
+import os
+import platform
+import stat
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from backupctl.models.plan_config import ResourcesCfg
+from backupctl.models.resources import CGROUP_ROOT, IOPRIO_LEVEL_MASK, IOPRIO_WHO_PGRP, \
+    IOPRIO_WHO_PROCESS, IoniceClass, cpu_list, io_max_line, ioprio_value, transferred_name
+from backupctl.utils.console import cwarn
+from backupctl.utils.units import human_bytes
+
+DEFAULT_IONICE_LEVEL = 4 # The level of ionice(1) when only the class is given
+MAX_PENDING_NAME     = 4096 # Maximum characters kept waiting for a line end
+
+# Numbers of ioprio_set(2) and ioprio_get(2), which glibc does not wrap
+IOPRIO_SYSCALLS = {
+    "x86_64"  : ( 251, 252 ),
+    "i386"    : ( 289, 290 ),
+    "i686"    : ( 289, 290 ),
+    "aarch64" : ( 30, 31 ),
+    "riscv64" : ( 30, 31 ),
+    "armv7l"  : ( 314, 315 ),
+    "ppc64le" : ( 273, 274 ),
+    "s390x"   : ( 282, 283 ),
+}
+
+class IoPriority:
+    """ Thin ctypes binding of the Linux I/O priority system calls """
+    def __init__( self ):
+        self.numbers = IOPRIO_SYSCALLS.get( platform.machine() )
+        self._syscall = None
+        if self.numbers is not None:
+            libc = ctypes.CDLL( ctypes.util.find_library("c") or "libc.so.6", use_errno=True )
+            self._syscall = libc.syscall
+
+    def supported( self ) -> bool:
+        return self._syscall is not None
+
+    def set( self, who: int, ioprio: int, which: int = IOPRIO_WHO_PROCESS ) -> None:
+        if self._syscall( self.numbers[0], which, who, ioprio ) < 0:
+            errno = ctypes.get_errno()
+            raise OSError( errno, f"ioprio_set: {os.strerror(errno)}" )
+
+    def get( self, pid: int ) -> int:
+        ioprio = self._syscall( self.numbers[1], IOPRIO_WHO_PROCESS, pid )
+        if ioprio < 0:
+            errno = ctypes.get_errno()
+            raise OSError( errno, f"ioprio_get: {os.strerror(errno)}" )
+        return ioprio
+
+def block_device( path: str ) -> str:
+    """ Returns the MAJ:MIN of the disk holding the path, either a block
+    device or any file on its filesystem. Partitions resolve to their disk,
+    as io.max only throttles whole disks. """
+    st = os.stat( path )
+    dev = st.st_rdev if stat.S_ISBLK( st.st_mode ) else st.st_dev
+    number = f"{os.major(dev)}:{os.minor(dev)}"
+    sys_path = f"/sys/dev/block/{number}"
+    if not os.path.exists( sys_path ):
+        raise ValueError(f"{path} is not on a block device")
+    if os.path.exists( os.path.join( sys_path, "partition" ) ):
+        with open( os.path.join( sys_path, "..", "dev" ), encoding="ascii" ) as io:
+            number = io.read().strip()
+    return number
+
+def process_cgroup( pid: int ) -> Optional[str]:
+    """ Returns the cgroup v2 folder of the process """
+    with open( f"/proc/{pid}/cgroup", encoding="utf-8" ) as io:
+        for line in io:
+            if line.startswith("0::"): return CGROUP_ROOT + line[3:].rstrip("\n")
+    return None
+
+def _write( path: str, value: str ) -> None:
+    with open( path, "w", encoding="ascii" ) as io:
+        io.write( value )
+
+def _quietly( call: Callable[..., Any], *args: Any ) -> None:
+    """ Settings that cannot be applied are left out, see `describe` """
+    try:
+        call( *args )
+    except OSError:
+        pass
+
+class ResourceGovernor:
+    """ Applies the resource settings of a plan to the rsync processes of a
+    run. The run is multi-threaded, hence nothing runs in the child between
+    fork and exec: niceness, I/O priority and CPU affinity are set by the
+    parent on the started process, which then joins a cgroup v2 sub-group,
+    created for the run under the delegated parent, holding the io.max and
+    memory.high limits. A setting the host refuses is left out without
+    failing the run, hence the settings in effect are read back from the
+    running process. """
+    def __init__( self, cfg: ResourcesCfg, name: str ):
+        self.cfg, self.name = cfg, name
+        self.ioprio_calls = IoPriority()
+        self.ioprio = None
+        if cfg.ionice_class is not None:
+            ionice_class = IoniceClass( cfg.ionice_class )
+            level = 0 if ionice_class is IoniceClass.idle else \
+                DEFAULT_IONICE_LEVEL if cfg.ionice_level is None else cfg.ionice_level
+            self.ioprio = ioprio_value( ionice_class, level )
+
+        self.cgroup: Optional[str] = None # The sub-group of the run
+        self.limits: List[str] = [] # The limits written into the sub-group
+        self.notes: List[str] = [] # The settings left out and why
+        self._procs: Optional[int] = None
+
+    def __enter__( self ) -> 'ResourceGovernor':
+        if self.ioprio is not None and not self.ioprio_calls.supported():
+            self.notes.append(f"ionice is not supported on {platform.machine()}")
+        if self.cfg.cgroup is not None: self._create_cgroup()
+        return self
+
+    def __exit__( self, *exc_info ) -> None:
+        if self._procs is not None: os.close( self._procs )
+        if self.cgroup is None: return
+        try:
+            os.rmdir( self.cgroup )
+        except OSError as e:
+            cwarn(f"[*] Cannot remove the cgroup {self.cgroup}: {e.strerror}")
+
+    def _create_cgroup( self ) -> None:
+        """ Create the sub-group of the run, enabling the controllers of its
+        limits into the parent if needed """
+        cfg = self.cfg.cgroup
+        parent = os.path.normpath( cfg.parent )
+        if not os.path.isfile( os.path.join( parent, "cgroup.controllers" ) ):
+            self.notes.append(f"{parent} is not a cgroup v2 folder")
+            return
+        if not os.access( parent, os.W_OK ):
+            self.notes.append(f"the cgroup {parent} is not delegated to this user")
+            return
+
+        needed = [ name for name, used in ( ( "io", bool(cfg.io_max) ),
+            ( "memory", cfg.memory_high is not None ) ) if used ]
+        subtree_control = os.path.join( parent, "cgroup.subtree_control" )
+        try:
+            with open( subtree_control, encoding="ascii" ) as io:
+                missing = [ name for name in needed if name not in io.read().split() ]
+            if missing:
+                _write( subtree_control, " ".join( f"+{name}" for name in missing ) )
+        except OSError as e:
+            self.notes.append(f"cannot enable the {' and '.join(needed)} controllers "
+                f"of {parent}: {e.strerror}")
+            return
+
+        path = os.path.join( parent, f"backupctl-{self.name}-{os.getpid()}" )
+        try:
+            os.mkdir( path )
+        except OSError as e:
+            self.notes.append(f"cannot create the cgroup {path}: {e.strerror}")
+            return
+
+        try:
+            if cfg.memory_high is not None:
+                _write( os.path.join( path, "memory.high" ), str(cfg.memory_high) )
+                self.limits.append(f"memory.high={human_bytes(cfg.memory_high)}")
+            for limit in cfg.io_max:
+                line = io_max_line( block_device( limit.device ),
+                    limit.rbps, limit.wbps, limit.riops, limit.wiops )
+                _write( os.path.join( path, "io.max" ), line )
+                self.limits.append(f"io.max {line}")
+            self._procs = os.open( os.path.join( path, "cgroup.procs" ),
+                os.O_WRONLY | os.O_CLOEXEC )
+        except ( OSError, ValueError ) as e:
+            self.notes.append(f"cannot set the limits of the cgroup {path}: {e}")
+            self.limits.clear()
+            _quietly( os.rmdir, path )
+            return
+        self.cgroup = path
+
+    def apply( self, pid: int ) -> None:
+        """ Apply the settings to the started process, leading its own
+        process group. Niceness and I/O priority are set on the whole group,
+        so that the processes it already forked, e.g. the remote shell,
+        get them as well. Failures are ignored, see `describe`. """
+        if self.cfg.nice is not None:
+            _quietly( os.setpriority, os.PRIO_PGRP, pid, self.cfg.nice )
+        if self.ioprio is not None and self.ioprio_calls.supported():
+            _quietly( self.ioprio_calls.set, pid, self.ioprio, IOPRIO_WHO_PGRP )
+        if self.cfg.cpus:
+            _quietly( os.sched_setaffinity, pid, self.cfg.cpus )
+        if self._procs is not None:
+            _quietly( os.write, self._procs, str(pid).encode("ascii") )
+
+    def describe( self, pid: int ) -> str:
+        """ Returns the settings in effect for the process, and the ones left out """
+        applied = []
+        try:
+            if self.cfg.nice is not None:
+                nice = os.getpriority( os.PRIO_PROCESS, pid )
+                applied.append( f"nice {nice}" if nice == self.cfg.nice else
+                    f"nice {nice} (requested {self.cfg.nice})" )
+            if self.ioprio is not None and self.ioprio_calls.supported():
+                applied.append( self._describe_ioprio( self.ioprio_calls.get( pid ) ) )
+            if self.cfg.cpus:
+                cpus = os.sched_getaffinity( pid )
+                applied.append( f"cpus {cpu_list(cpus)}" if cpus == set(self.cfg.cpus) else
+                    f"cpus {cpu_list(cpus)} (requested {cpu_list(self.cfg.cpus)})" )
+            if self.cgroup is not None:
+                joined = process_cgroup( pid ) == self.cgroup
+                applied.append( f"cgroup {self.cgroup} ({', '.join(self.limits)})" if joined
+                    else f"cgroup {self.cgroup} not joined" )
+        except ( ProcessLookupError, FileNotFoundError ):
+            applied.append("exited before its settings could be read")
+
+        applied.extend( f"left out: {note}" for note in self.notes )
+        return ", ".join( applied ) if applied else "none"
+
+    def _describe_ioprio( self, ioprio: int ) -> str:
+        requested = IoniceClass.from_ioprio( self.ioprio ), self.ioprio & IOPRIO_LEVEL_MASK
+        in_effect = IoniceClass.from_ioprio( ioprio ), ioprio & IOPRIO_LEVEL_MASK
+        def label( value: Tuple[Optional[IoniceClass], int] ) -> str:
+            ionice_class, level = value
+            if ionice_class is None: return "none"
+            if ionice_class is IoniceClass.idle: return ionice_class.value
+            return f"{ionice_class.value} {level}"
+        if requested == in_effect: return f"ionice {label(in_effect)}"
+        return f"ionice {label(in_effect)} (requested {label(requested)})"
+
+    def page_cache_dropper( self, bases: List[str] ) -> Optional['PageCacheDropper']:
+        return PageCacheDropper( bases ) if self.cfg.drop_cache else None
+
+class PageCacheDropper:
+    """ Drops the cached pages of the source files sent by rsync, as named
+    in its output relative to the input source folders. rsync names a file
+    when it starts sending it and sends one file at a time, hence a file is
+    dropped once the next one is named, and the last one on close. """
+    def __init__( self, bases: List[str] ):
+        self.bases = bases
+        self.files, self.bytes = 0, 0
+        self._pending: Optional[str] = None
+        self._partial = ""
+
+    def feed( self, text: str ) -> None:
+        *lines, self._partial = ( self._partial + text ).replace("\r", "\n").split("\n")
+        if len(self._partial) > MAX_PENDING_NAME: self._partial = ""
+        for line in lines: self._line( line )
+
+    def close( self ) -> None:
+        self._line( self._partial )
+        self._partial = ""
+        if self._pending is not None: self._drop( self._pending )
+        self._pending = None
+
+    def summary( self ) -> str:
+        return f"dropped the cached pages of {self.files:,} files ({human_bytes(self.bytes)})"
+
+    def _line( self, line: str ) -> None:
+        name = transferred_name( line )
+        path = None if name is None else self._resolve( name )
+        if path is None or path == self._pending: return
+        if self._pending is not None: self._drop( self._pending )
+        self._pending = path
+
+    def _resolve( self, name: str ) -> Optional[str]:
+        """ Returns the regular file named by rsync, None for other lines """
+        for base in self.bases:
+            path = os.path.join( base, name )
+            try:
+                if stat.S_ISREG( os.lstat( path ).st_mode ): return path
+            except OSError:
+                continue
+        return None
+
+    def _drop( self, path: str ) -> None:
+        try:
+            fd = os.open( path, os.O_RDONLY | os.O_NOFOLLOW )
+            try:
+                size = os.fstat( fd ).st_size
+                os.posix_fadvise( fd, 0, 0, os.POSIX_FADV_DONTNEED )
+            finally:
+                os.close( fd )
+        except OSError:
+            return
+        self.files += 1
+        self.bytes += size
@@ -1,8 +1,17 @@
+import os
 import subprocess
-from typing import List, Optional, Any, Mapping, overload
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Mapping, NamedTuple, Tuple, overload
 from backupctl.models.rsync import *
 
-def get_model_from_opts(*, opts: Optional[object] = None, **kwargs: Any) -> RSyncOptionsModel:
+if TYPE_CHECKING:
+    from backupctl.models.rsync_options import RSyncOptionsModel
+
+def get_model_from_opts(*, opts: Optional[object] = None, **kwargs: Any) -> 'RSyncOptionsModel':
+    # The validation model is only needed to create commands, not to run them
+    from backupctl.models.rsync_options import RSyncOptionsModel
+
     if opts is not None and kwargs:
         raise TypeError("Pass either a single ops object/dict OR kwargs, not both")
     
@@ -26,7 +35,7 @@ def get_model_from_opts(*, opts: Optional[object] = None, **kwargs: Any) -> RSyn
     return model
 
 @overload
-def create_rsync_command(opts: RSyncOptionsModel) -> List[str]: ...
+def create_rsync_command(opts: 'RSyncOptionsModel') -> List[str]: ...
 @overload
 def create_rsync_command(opts: Mapping[str, Any]) -> List[str]: ...
 @overload
@@ -34,7 +43,7 @@ def create_rsync_command(**kwargs: Any) -> List[str]: ...
 
 def create_rsync_command(*, opts: Optional[object] = None, **kwargs: Any) -> List[str]:
     """ Format the rsync command as list of parts from options """
-    opts: RSyncOptionsModel = get_model_from_opts(opts=opts, **kwargs)
+    opts: 'RSyncOptionsModel' = get_model_from_opts(opts=opts, **kwargs)
 
     command = ["rsync"]
 
@@ -58,21 +67,177 @@ def create_rsync_command(*, opts: Optional[object] = None, **kwargs: Any) -> Lis
     if opts.itemize_changes: command += ["--itemize-changes"]
     if not opts.keep_specials: command += ["--no-specials"]
     if not opts.keep_devices: command += ["--no-devices"]
+    if opts.stats: command += ["--stats"]
 
     # Add the sources
     if opts.sources: command.extend(opts.sources)
 
     # Add the host, port, user, module and folder
-    rsync_user = "" if not opts.user else f"{opts.user}@"
-    rsync_host = f"rsync://{rsync_user}{opts.host}:{opts.port}/"
-    if opts.module: rsync_host += f"{opts.module}/"
-    if opts.folder: rsync_host += f"{opts.folder}/"
-    command += [rsync_host]
-
+    command += [rsync_url(opts.host, opts.port, opts.user, opts.module, opts.folder)]
     return command
 
+def rsync_url( 
+    host: str, port: int, user: Optional[str] = None, module: Optional[str] = None,
+    folder: Optional[str] = None
+) -> str:
+    """ Returns the rsync daemon URL of the input module folder """
+    rsync_user = "" if not user else f"{user}@"
+    url = f"rsync://{rsync_user}{host}:{port}/"
+    if module: url += f"{module}/"
+    if folder: url += f"{folder}/"
+    return url
+
+class RsyncCommandParts(NamedTuple):
+    """ An rsync command split into its components """
+    options : List[str] # The executable followed by all the options
+    sources : List[str] # The list of sources
+    dest    : str       # The destination
+
+def split_rsync_command( command: List[str] ) -> RsyncCommandParts:
+    """ Split a command created by `create_rsync_command` into options,
+    sources and destination. Options are always given in the `--opt=value`
+    form, hence every argument not starting with '-' is an operand. """
+    options  = [ command[0] ] + [ arg for arg in command[1:] if arg.startswith("-") ]
+    operands = [ arg for arg in command[1:] if not arg.startswith("-") ]
+    if not operands: raise ValueError("The rsync command has no destination")
+    return RsyncCommandParts( options, operands[:-1], operands[-1] )
+
+def set_rsync_options( command: List[str], *options: str ) -> List[str]:
+    """ Returns a copy of the command with the input `--opt[=value]` options
+    placed right after the executable, replacing the options with the same
+    name already in the command. """
+    names = { option.split("=", 1)[0] for option in options }
+    kept = [ 
+        arg for arg in command[1:] 
+        if not arg.startswith("-") or arg.split("=", 1)[0] not in names 
+    ]
+    return [ command[0], *options, *kept ]
+
+def remove_rsync_options( command: List[str], *names: str ) -> List[str]:
+    """ Returns a copy of the command without the input `--opt` options,
+    whatever their value is. """
+    return [ 
+        arg for idx, arg in enumerate(command)
+        if idx == 0 or not arg.startswith("-") or arg.split("=", 1)[0] not in names 
+    ]
+
+def source_base( source: str ) -> Tuple[str, str]:
+    """ Returns the folder the content of a source is relative to in the
+    destination and the relative path of the source from there. A trailing
+    slash copies the content of the folder, otherwise the folder itself is
+    created into the destination. """
+    if source.endswith("/"): return source, ""
+    path = Path( source )
+    return os.path.join( str(path.parent), "" ), path.name
+
+def source_roots( command: List[str] ) -> Dict[str, List[str]]:
+    """ Group the sources of the command by the folder they are relative to,
+    mapping each folder to the source paths relative to it, see `source_base` """
+    roots: Dict[str, List[str]] = dict()
+    for source in split_rsync_command( command ).sources:
+        base, root = source_base( source )
+        roots.setdefault( base, [] ).append( root )
+    return roots
+
+def files_from_command( 
+    command: List[str], files_from: str, base: str, recursive: bool = False 
+) -> List[str]:
+    """ Returns a copy of the command sending only the paths listed, NUL
+    separated, in the input file relative to the base folder. Deletions need
+    a recursive transfer, hence they are kept only if listed folders are
+    transferred recursively, and then only happen inside them. """
+    options, _, dest = split_rsync_command( command )
+    if recursive:
+        options = options + [ "--recursive" ]
+    else:
+        deletes = [ "--delete" ] + [ f"--delete-{d.value}" for d in DeleteType ]
+        options = remove_rsync_options( options, *deletes )
+    return [ *options, "--from0", f"--files-from={files_from}", base, dest ]
+
+def verify_command( command: List[str], files_from: str, base: str ) -> List[str]:
+    """ Returns a copy of the command comparing the checksum of the listed
+    files with the one of their copy on the destination, without sending
+    anything. Files that differ, or are missing, are itemized: an output
+    format, e.g. the one naming the files whose cached pages are dropped,
+    would replace the itemized lines. """
+    command = remove_rsync_options( command, "--write-batch", "--link-dest", "--info", 
+        "--partial", "--whole-file", "--no-whole-file", "--out-format" )
+    return set_rsync_options( files_from_command( command, files_from, base ),
+        "--checksum", "--dry-run", "--itemize-changes" )
+
+def timeout_options( io_timeout: Optional[int], connect_timeout: Optional[int] ) -> List[str]:
+    """ Returns the --timeout and --contimeout options, in seconds, for the
+    limits given. The connection timeout only applies to rsync daemons. """
+    options = []
+    if io_timeout is not None: options.append( f"--timeout={io_timeout}" )
+    if connect_timeout is not None: options.append( f"--contimeout={connect_timeout}" )
+    return options
+
+def deletes_extraneous( command: List[str] ) -> bool:
+    """ Check whether the command deletes the extraneous files of the destination """
+    return any( option == "--delete" or option.startswith("--delete-")
+        for option in split_rsync_command( command ).options[1:] )
+
+def lists_names( command: List[str] ) -> bool:
+    """ Check whether the command prints the name of each updated file,
+    through the verbose, itemize or output format options """
+    for option in split_rsync_command( command ).options[1:]:
+        if option in ( "--verbose", "--itemize-changes" ) or option.startswith("--out-format="):
+            return True
+        if not option.startswith("--") and ( "v" in option or "i" in option ):
+            return True
+    return False
+
+def connection_options( command: List[str] ) -> List[str]:
+    """ Returns the options of the command needed to open a session with the remote """
+    return [ arg for arg in command[1:] if arg.startswith("--password-file=") ]
+
+def snapshot_command( command: List[str], name: str, link_dests: List[str] ) -> List[str]:
+    """ Returns a copy of the command writing into the `name` subfolder of
+    the destination and hard-linking unchanged files against the input
+    sibling folders, given in order of preference. """
+    options, sources, dest = split_rsync_command( command )
+    links = [ f"--link-dest=../{link}" for link in link_dests ]
+    return [ *options, *links, *sources, f"{dest.rstrip('/')}/{name}/" ]
+
+def _replica_options( command: List[str], password_file: Optional[str] ) -> List[str]:
+    """ Returns the options of the command authenticated with another password file """
+    options = split_rsync_command( command ).options
+    options = remove_rsync_options( options, "--password-file", "--write-batch" )
+    return options + ( [] if password_file is None else [ f"--password-file={password_file}" ] )
+
+def replica_command( command: List[str], dest: str, password_file: Optional[str] ) -> List[str]:
+    """ Returns a copy of the command transferring the sources into another
+    destination, authenticated with its own password file. """
+    sources = split_rsync_command( command ).sources
+    return [ *_replica_options(command, password_file), *sources, dest ]
+
+def read_batch_command( 
+    command: List[str], batch_file: str, dest: str, password_file: Optional[str] 
+) -> List[str]:
+    """ Returns the command replaying into another destination the batch
+    written by the input command with --write-batch. """
+    options = _replica_options( command, password_file )
+    return [ *options, f"--read-batch={batch_file}", dest ]
+
+def list_dest_command( command: List[str] ) -> List[str]:
+    """ Returns the command listing the top level of the destination """
+    dest = split_rsync_command( command ).dest
+    return [ command[0], "--list-only", *connection_options(command), f"{dest.rstrip('/')}/" ]
+
+def delete_dest_folders_command( command: List[str], names: List[str], empty_dir: str ) -> List[str]:
+    """ Returns the command deleting the input top level folders of the
+    destination in a single session, by synching an empty folder over them
+    while every other entry is protected by the final exclude. """
+    dest = split_rsync_command( command ).dest
+    includes = [ f"--include=/{name}/***" for name in names ]
+    return [ 
+        command[0], "-r", "--delete", *connection_options(command), *includes, 
+        "--exclude=*", f"{empty_dir.rstrip('/')}/", f"{dest.rstrip('/')}/"
+    ]
+
 @overload
-def run_rsync_command(opts: RSyncOptionsModel) -> RSyncOutput: ...
+def run_rsync_command(opts: 'RSyncOptionsModel') -> RSyncOutput: ...
 @overload
 def run_rsync_command(opts: Mapping[str, Any]) -> RSyncOutput: ...
 @overload
@@ -0,0 +1,70 @@
+import os
+import stat
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, NamedTuple, Tuple
+
+SCAN_WORKERS = 8 # Threads walking the subtrees of the sources
+
+class ScanEntry(NamedTuple):
+    path     : str # The path relative to the base folder
+    size     : int # The size in bytes
+    mtime_ns : int # The modification time in nanoseconds
+    inode    : int # The inode number
+    mode     : int = 0 # The file type and permission bits
+    uid      : int = 0 # The owner user id
+    gid      : int = 0 # The owner group id
+    ctime_ns : int = 0 # The status change time in nanoseconds
+
+def _entry( path: str, st: os.stat_result ) -> ScanEntry:
+    return ScanEntry( path, st.st_size, st.st_mtime_ns, st.st_ino, st.st_mode, 
+        st.st_uid, st.st_gid, st.st_ctime_ns )
+
+def _scan_dir( base: str, rel: str ) -> Tuple[List[ScanEntry], List[str]]:
+    """ Returns the entries of a single folder and its sub-folders. Symbolic
+    links are not followed and unreadable entries are ignored. """
+    entries, subdirs = [], []
+    try:
+        with os.scandir( os.path.join(base, rel) ) as it:
+            for dir_entry in it:
+                path = os.path.join( rel, dir_entry.name )
+                try:
+                    st = dir_entry.stat( follow_symlinks=False )
+                except OSError:
+                    continue
+                entries.append( _entry(path, st) )
+                if stat.S_ISDIR( st.st_mode ): subdirs.append( path )
+    except OSError:
+        pass
+    return entries, subdirs
+
+def _walk( base: str, rel: str ) -> List[ScanEntry]:
+    """ Returns all the entries under the input folder """
+    entries, stack = [], [ rel ]
+    while stack:
+        found, subdirs = _scan_dir( base, stack.pop() )
+        entries.extend( found )
+        stack.extend( subdirs )
+    return entries
+
+def scan_sources( base: str, roots: List[str], workers: int = SCAN_WORKERS ) -> List[ScanEntry]:
+    """ Walk the roots, given relative to the base folder ('' for the base
+    folder itself), and returns all their entries sorted by path. Subtrees
+    are walked by concurrent threads, since the system calls release the
+    GIL. Raises OSError if a root does not exist. """
+    entries, subtrees = [], []
+    for root in roots:
+        st = os.lstat( os.path.join(base, root) )
+        if root: entries.append( _entry(root, st) )
+        if not stat.S_ISDIR( st.st_mode ): continue
+        found, subdirs = _scan_dir( base, root )
+        entries.extend( found )
+        subtrees.extend( subdirs )
+
+    with ThreadPoolExecutor( max_workers=workers ) as pool:
+        for found in pool.map( partial(_walk, base), subtrees ):
+            entries.extend( found )
+
+    entries.sort()
+    return entries
@@ -0,0 +1,30 @@
+import re
+
+from datetime import timedelta
+from typing import Optional
+
+# Durations such as 1.5s, 250ms or 2e3us
+TIMEOUT_PATTERN = re.compile(r"^(\d+)(?:\.(\d+))?(?:e(\d+))?(s|ms|us)$")
+
+BYTE_UNITS = ["B", "KiB", "MiB", "GiB", "TiB", "PiB"]
+
+def human_bytes( size: float ) -> str:
+    """ Format a number of bytes with a binary unit """
+    for unit in BYTE_UNITS:
+        if abs(size) < 1024 or unit == BYTE_UNITS[-1]: break
+        size /= 1024
+    return f"{int(size)} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+def human_duration( seconds: float ) -> str:
+    """ Format a duration in seconds as H:MM:SS """
+    return str( timedelta( seconds=round(seconds) ) )
+
+def timeout_seconds( v: Optional[str] ) -> Optional[float]:
+    """ Convert a timeout string matching TIMEOUT_PATTERN into seconds """
+    if v is None: return None
+    units, decs, exp, time_unit = TIMEOUT_PATTERN.fullmatch( v ).groups()
+    result = int(units)
+    if decs is not None: result += int( decs ) / ( 10**len(decs) )
+    if exp is not None: result *= 10**int(exp)
+    result /= ( { "s" : 1, "ms" : 1000, "us": 1e6 }[time_unit] )
+    return result
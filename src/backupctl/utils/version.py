@@ -1,10 +1,14 @@
-import requests
+import json
+import os
+import subprocess
+import sys
 
-from backupctl.constants import RELEASE_API_URL
-from packaging.version import Version
-from datetime import datetime
-from dataclasses import dataclass
-from typing import List, Tuple, TypeAlias
+from backupctl.constants import RELEASE_API_URL, VERSION_CACHE_FILE
+from packaging.version import InvalidVersion, Version
+from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, TypeAlias
 from backupctl.utils.console import cinfo, cwarn
 
 try:
@@ -12,6 +16,9 @@ try:
 except Exception:
     __version__ = "0.0.0"
 
+VERSION_CHECK_TTL     = timedelta(days=1) # Age of the cached releases before checking again
+VERSION_CHECK_TIMEOUT = 5.0 # Seconds before giving up on the release index
+
 @dataclass
 class RemoteFileInfo:
     name: str
@@ -20,16 +27,17 @@ class RemoteFileInfo:
 VersionList : TypeAlias = List[Version]
 FileList    : TypeAlias = List[RemoteFileInfo]
 
-def _get_all_versions() -> Tuple[VersionList, FileList] | None:
+def _get_all_versions() -> Tuple[VersionList, FileList]:
     """ Get the lastest version of the backupctl project """
+    import requests # Slow to import, and only needed here
+
     headers = {'Host': 'pypi.org', 'Accept': 'application/vnd.pypi.simple.v1+json'}
-    response = requests.get(RELEASE_API_URL, headers=headers, timeout=10)
-    if not response.ok: return
+    response = requests.get(RELEASE_API_URL, headers=headers, timeout=VERSION_CHECK_TIMEOUT)
+    response.raise_for_status()
     payload = response.json()
-    if not isinstance(payload, dict): return
-    if not "versions" in payload: return
-    if not isinstance(payload["versions"], list): return
-    if not "files" in payload: return
+    if not isinstance(payload, dict): raise ValueError("unexpected release index")
+    if not isinstance(payload.get("versions"), list): raise ValueError("no versions listed")
+    if not isinstance(payload.get("files"), list): raise ValueError("no files listed")
 
     # First parse all files
     version_list = list(map(Version, payload.get('versions')))
@@ -45,7 +53,7 @@ def _get_all_versions() -> Tuple[VersionList, FileList] | None:
 
         upload_time = datetime.fromisoformat(upload_time.replace("Z", "+00:00"))
         file_list.append(RemoteFileInfo( file_name, upload_time ))
-        
+
     return version_list, file_list
 
 def _get_latest_release( versions: VersionList ) -> Version:
@@ -61,24 +69,119 @@ def _get_release_time( version: Version, files: FileList ) -> datetime | None:
 
     return None
 
-def format_version() -> None:
-    """ Format the version and get latest version """
-    versions, files = _get_all_versions()
+@dataclass
+class ReleaseCache:
+    """ The releases last read from the release index, which the version
+    banner is shown from without waiting for the network """
+    checked       : Optional[datetime] = None # When the index was last queried, even unsuccessfully
+    latest        : Optional[str] = None # The latest version released
+    release_times : Dict[str, datetime] = field(default_factory=dict) # Version -> upload time
+
+    @staticmethod
+    def load( path: Path = VERSION_CACHE_FILE ) -> 'ReleaseCache':
+        """ Read the cache, empty if missing or corrupted """
+        try:
+            data = json.loads( path.read_text( encoding="utf-8" ) )
+            return ReleaseCache(
+                None if data["checked"] is None else datetime.fromisoformat( data["checked"] ),
+                data["latest"],
+                { v: datetime.fromisoformat( t ) for v, t in data["release_times"].items() }
+            )
+        except ( OSError, ValueError, KeyError, TypeError, AttributeError ):
+            return ReleaseCache()
+
+    def save( self, path: Path = VERSION_CACHE_FILE ) -> None:
+        """ Write the cache atomically """
+        data = {
+            "checked": None if self.checked is None else self.checked.isoformat(),
+            "latest": self.latest,
+            "release_times": { v: t.isoformat() for v, t in self.release_times.items() }
+        }
+        path.parent.mkdir( parents=True, exist_ok=True )
+        tmp_path = path.with_name( f".{path.name}.{os.getpid()}.tmp" )
+        tmp_path.write_text( json.dumps( data, indent=2 ), encoding="utf-8" )
+        os.replace( tmp_path, path )
+
+    def stale( self, now: datetime, ttl: timedelta = VERSION_CHECK_TTL ) -> bool:
+        return self.checked is None or now - self.checked >= ttl
+
+def refresh_release_cache( path: Path = VERSION_CACHE_FILE ) -> ReleaseCache:
+    """ Query the release index and update the cache. Without network or
+    with an unexpected answer, the previous releases are kept and the
+    index is not queried again before the TTL. """
+    cache = ReleaseCache.load( path )
+    cache.checked = datetime.now()
+    try:
+        versions, files = _get_all_versions()
+        cache.latest = str( _get_latest_release( versions ) )
+        cache.release_times = {
+            str(version): upload_time for version in versions
+            if ( upload_time := _get_release_time( version, files ) ) is not None
+        }
+    except Exception:
+        pass
+
+    try:
+        cache.save( path )
+    except OSError:
+        pass
+    return cache
+
+def spawn_release_refresh( cache: ReleaseCache, path: Path = VERSION_CACHE_FILE ) -> None:
+    """ Refresh the cache into a detached `backupctl --version`, so that
+    the caller does not wait for the network. The check is marked as done
+    beforehand, so that concurrent commands do not start one each. """
+    cache.checked = datetime.now()
+    try:
+        cache.save( path )
+    except OSError:
+        return
+
+    # The PyInstaller bundle is the backupctl executable itself
+    command = [ sys.executable ] if getattr( sys, "frozen", False ) \
+        else [ sys.executable, "-m", "backupctl" ]
+    try:
+        subprocess.Popen( command + [ "--version" ], stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True )
+    except OSError:
+        pass
+
+def version_check_enabled() -> bool:
+    """ The check runs for interactive sessions, unless disabled with
+    BACKUPCTL_VERSION_CHECK=0 """
+    flag = os.getenv( "BACKUPCTL_VERSION_CHECK", "1" ).strip().lower()
+    return flag not in { "0", "false", "no", "off" } and sys.stdout.isatty()
+
+def version_notice( path: Path = VERSION_CACHE_FILE ) -> None:
+    """ Show the version banner from the cache, refreshing the cache in
+    the background when stale """
+    if not version_check_enabled(): return
+    cache = ReleaseCache.load( path )
+    if cache.stale( datetime.now() ): spawn_release_refresh( cache, path )
+    format_version( cache )
+
+def format_version( cache: ReleaseCache ) -> None:
+    """ Format the version and the latest version known by the cache """
     curr_version = Version(__version__)
-    last_version = _get_latest_release( versions )
-    curr_version_time = _get_release_time( curr_version, files )
-    last_version_time = _get_release_time( last_version, files )
+    cinfo(f"Backupctl Version {curr_version}", end="")
 
-    # Print the current version
-    cinfo(f"Backupctl Version {curr_version} (", end="")
-    curr_t = "Not Yet Released" if curr_version_time is None else str(curr_version_time)
-    cinfo(f"{curr_t})")
+    # Print the release time of the current version, once the releases are known
+    if cache.latest is not None:
+        curr_version_time = cache.release_times.get( str(curr_version) )
+        curr_t = "Not Yet Released" if curr_version_time is None else str(curr_version_time)
+        cinfo(f" ({curr_t})", end="")
+    cinfo("")
 
     # Print if there is a more recent version
-    if curr_version < last_version:
+    try:
+        last_version = None if cache.latest is None else Version( cache.latest )
+    except InvalidVersion:
+        last_version = None
+
+    if last_version is not None and curr_version < last_version:
         cwarn(
             "!! A new version is available - " +\
-            f"{last_version} ({last_version_time}) !!"
+            f"{last_version} ({cache.release_times.get( cache.latest )}) !!"
         )
-        
+
     cinfo("")
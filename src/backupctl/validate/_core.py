@@ -8,6 +8,7 @@ from backupctl.models.rsync import RSyncStatus
 from backupctl.utils.rsync import run_rsync_command
 from backupctl.models.user_config import *
 from backupctl.models.filesystem import *
+from backupctl.models.registry import JobBackend
 from backupctl.utils.console import cerror, cinfo, cwarn
 from backupctl.utils.exceptions import (
     BackupCtlError,
@@ -24,6 +25,7 @@ from typing import Optional
 class Args:
     config_file: Path # The configuration file for the plan
     verbose: bool # Enable/Disable Verbosity
+    backend: JobBackend = JobBackend.cron # What fires the registered jobs
 
 def user_can_create_in_dir( path: Path ) -> None:
     """ Checks if the current user can access the parent path of either
@@ -285,7 +287,8 @@ def check_notification_system( notification: NotificationCfg, args: Args ) -> No
 def validate_target( target: user_cfg.NamedTarget, args: Args ) -> None:
     """ Validates a single target against some checks """
     # Checking if remote destination is reachable
-    check_remote_dest( target.remote, args )
+    for remote in target.remotes(): check_remote_dest( remote, args )
+    for replica in target.replicas: check_remote_dest( replica, args )
     ensure(
         check_exclude_file(target.rsync, args),
         f"Exclude file {target.rsync.exclude_from}, does not exists",
@@ -0,0 +1,181 @@
+import sys
+import tempfile
+
+from contextlib import nullcontext
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, TextIO
+
+from backupctl.constants import DEFAULT_PLAN_CONF_FOLDER, DEFAULT_PLAN_SUFFIX
+from backupctl.models.journal import append_verification, last_full_verification, \
+    read_runs, save_verified, verified_files
+from backupctl.models.notification import Event, EventType
+from backupctl.models.plan_config import PlanCfg, VerifyCfg, load_plan_configuration
+from backupctl.models.verify import VerifyResult, VerifyStrategy, full_verification_due, \
+    parse_mismatches, regular_files, sample_entries
+from backupctl.run._core import make_log_file, resource_governor, send_notification, \
+    target_admission
+from backupctl.utils.filters import ExcludeFilter
+from backupctl.utils.process import stream_command
+from backupctl.utils.resources import ResourceGovernor
+from backupctl.utils.rsync import set_rsync_options, snapshot_command, source_roots, \
+    timeout_options, verify_command
+from backupctl.utils.scan import ScanEntry, scan_sources
+from backupctl.utils.console import cinfo, cwarn
+
+class _LineCollector:
+    """ Collects the complete lines of a stream received in chunks """
+    def __init__( self ):
+        self.lines: List[str] = []
+        self._partial = ""
+
+    def __call__( self, text: str ) -> None:
+        *lines, self._partial = ( self._partial + text ).split("\n")
+        self.lines.extend( lines )
+
+    def output( self ) -> str:
+        return "\n".join( self.lines + [ self._partial ] )
+
+def _candidate_files( plan: PlanCfg, full: bool ) -> Dict[str, List[ScanEntry]]:
+    """ Returns, for each source folder, the files to verify relative to it.
+    Excluded files are never sent, and files verified since their last
+    change are skipped unless the verification is a full one. """
+    excludes = ExcludeFilter.from_command( plan.command )
+    cached = set() if full else verified_files( plan.name )
+    candidates: Dict[str, List[ScanEntry]] = dict()
+    for base, roots in source_roots( plan.command ).items():
+        candidates[base] = [
+            entry for entry in regular_files( scan_sources( base, roots ) )
+            if not excludes.excluded( entry.path, base + entry.path )
+            and ( base + entry.path, *entry[1:4] ) not in cached
+        ]
+    return candidates
+
+def _compare( 
+    plan: PlanCfg, base: str, entries: List[ScanEntry], log: TextIO,
+    resources: ResourceGovernor | None = None
+) -> tuple[List[str], str | None]:
+    """ Compare the files with their copy on the destination. Returns the
+    mismatched paths and the error that stopped the comparison, if any. """
+    collector = _LineCollector()
+    with tempfile.TemporaryDirectory(prefix="backupctl-") as work_dir:
+        files_from = Path(work_dir) / "verify.list"
+        files_from.write_bytes( "\0".join( e.path for e in entries )
+            .encode("utf-8", "surrogateescape") )
+        command = set_rsync_options( verify_command( plan.command, str(files_from), base ),
+            *timeout_options( plan.io_timeout, plan.connect_timeout ) )
+        log.write(f"Command: {' '.join(command)}\n")
+        log.flush()
+
+        def on_start( pid: int ) -> None:
+            resources.apply( pid )
+            log.write(f"Resources: {resources.describe(pid)}\n")
+
+        out = stream_command( command, log, log, on_stdout=collector, 
+            stall_timeout=plan.stall_timeout, on_start=None if resources is None else on_start )
+
+    # Files vanished before the comparison are not a failure of the copy
+    error = None
+    if out.stalled:
+        error = f"no activity for {plan.stall_timeout:.0f}s, rsync killed"
+    elif out.return_code not in ( 0, 24 ):
+        lines = out.stderr_tail.strip().splitlines()
+        error = lines[-1] if lines else f"rsync exited with code {out.return_code}"
+    return [ base + path for path in parse_mismatches( collector.output() ) ], error
+
+def verify_plan( plan: PlanCfg, full: bool, log_file: Path | None ) -> VerifyResult:
+    """ Compare the checksum of the sources with the one of their copy on
+    the destination, through a --checksum --dry-run rsync that sends no
+    data. Only a sample of the files not verified since they last changed
+    is compared, unless the verification is full, as requested or when
+    the full verification cadence of the plan has expired. Verified files
+    are recorded into the journal so that the next verifications only
+    hash new data. """
+    cfg = plan.verify or VerifyCfg()
+    started = datetime.now()
+    full = full or full_verification_due( last_full_verification( plan.name ),
+        cfg.full_every_days, started )
+
+    log = sys.stdout if not log_file else log_file.open("a", encoding="utf-8")
+    log.write(f"===== {'FULL' if full else 'SAMPLED'} VERIFICATION =====\n")
+
+    try:
+        candidates = _candidate_files( plan, full )
+    except OSError as e:
+        result = VerifyResult( started, datetime.now(), full, 0, 0, 
+            error=f"Cannot scan the sources: {e}" )
+    else:
+        entries = [ ( base, e ) for base, files in candidates.items() for e in files ]
+        if not full:
+            picked = sample_entries( [ e._replace( path=base + e.path ) for base, e in entries ],
+                cfg.sample, VerifyStrategy( cfg.strategy ) )
+            paths = { e.path for e in picked }
+            entries = [ ( base, e ) for base, e in entries if base + e.path in paths ]
+
+        # Checksums read every file sampled, under the resource settings of the plan
+        mismatched, error = [], None
+        resources = resource_governor( plan )
+        with resources or nullcontext():
+            for base in candidates:
+                files = [ e for b, e in entries if b == base ]
+                if not files or error is not None: continue
+                found, error = _compare( plan, base, files, log, resources )
+                mismatched.extend( found )
+
+        result = VerifyResult( started, datetime.now(), full,
+            sum( len(files) for files in candidates.values() ), len(entries),
+            mismatched, error )
+
+        if error is None:
+            failed = set( mismatched )
+            save_verified( plan.name, [ e._replace( path=base + e.path ) for base, e in entries
+                if base + e.path not in failed ], reset=full )
+
+    log.write(result.summary() + "\n\n")
+    log.flush()
+    if log_file is not None: log.close()
+    append_verification( plan.name, result )
+    return result
+
+def latest_snapshot( target: str ) -> str | None:
+    """ Returns the snapshot written by the last successful run """
+    for record in reversed( read_runs( [ target ] ) ):
+        if record.ok() and record.snapshot is not None: return record.snapshot
+    return None
+
+def verify_job( target: str, full: bool, notification_en: bool, logging_en: bool ) -> bool:
+    """ Verify the remote copy of the target, out of its runs. Snapshot
+    targets verify their most recent complete snapshot. Returns True if
+    no mismatch has been found. """
+    target_conf_path = DEFAULT_PLAN_CONF_FOLDER / f"{target}{DEFAULT_PLAN_SUFFIX}"
+    plan_configuration = load_plan_configuration( target_conf_path )
+
+    if plan_configuration.snapshot is not None:
+        snapshot = latest_snapshot( target )
+        if snapshot is None:
+            cwarn(f"[*] Target {target} has no complete snapshot to verify")
+            return False
+        plan_configuration = replace( plan_configuration,
+            command=snapshot_command( plan_configuration.command, snapshot, [] ) )
+
+    # Verifications do not overlap with the runs of the target
+    with target_admission( plan_configuration ) as admitted:
+        if not admitted:
+            cwarn(f"[*] Target {target} is already running or queued, skipping")
+            return False
+
+        file_log_path = make_log_file( plan_configuration, "-verify.log" ) if logging_en else None
+        cinfo(f"[*] Verifying the remote copy of target {target}")
+        result = verify_plan( plan_configuration, full, file_log_path )
+
+    summary = result.summary( None if file_log_path is None else str(file_log_path) )
+    cinfo(summary)
+    if notification_en:
+        event_type = EventType.on_success if result.ok() else EventType.on_failure
+        cinfo("[*] Sending notifications")
+        send_notification( plan_configuration.notification,
+            Event( plan_configuration.name, event_type, summary ), file_log_path,
+            plan_configuration.notification_deadline )
+
+    return result.ok()
@@ -0,0 +1,19 @@
+import argparse
+
+from ._core import verify_job
+from backupctl.models.registry import read_registry
+from backupctl.utils.console import cerror, cwarn
+
+def run( args: argparse.Namespace ) -> None:
+    try:
+        # Performs a first check that the target is in the registry
+        registry = read_registry()
+        if registry is None or args.target not in registry:
+            cwarn(f"[*] Target {args.target} is not a job in the registry")
+            return 0
+
+        return 0 if verify_job( args.target, args.full, args.notify, args.log ) else 1
+
+    except Exception as e:
+        cerror(f"[ERROR] {e}")
+        return 1
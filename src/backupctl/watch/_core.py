@@ -0,0 +1,221 @@
+import os
+import time
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+from backupctl.constants import DEFAULT_PLAN_CONF_FOLDER, DEFAULT_PLAN_SUFFIX
+from backupctl.models.manifest import TransferMode
+from backupctl.models.plan_config import PlanCfg, load_plan_configuration
+from backupctl.run._core import SourceScan, run_job
+from backupctl.utils.filters import ExcludeFilter
+from backupctl.utils.inotify import Inotify, InotifyEvent, IN_ATTRIB, IN_CLOSE_WRITE, \
+    IN_CREATE, IN_DELETE, IN_DONT_FOLLOW, IN_EXCL_UNLINK, IN_IGNORED, IN_ISDIR, \
+    IN_MODIFY, IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW
+from backupctl.utils.rsync import source_base, split_rsync_command
+from backupctl.utils.console import cinfo, cwarn
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_ATTRIB | IN_MODIFY | IN_CREATE | IN_DELETE | \
+    IN_MOVED_FROM | IN_MOVED_TO | IN_DONT_FOLLOW | IN_EXCL_UNLINK
+
+def topmost_paths( paths: Set[str] ) -> List[str]:
+    """ Reduce the relative paths to the ones with no ancestor in the set """
+    kept: List[str] = []
+    for path in sorted( paths, key=lambda p: (p.count("/"), p) ):
+        if not any( path.startswith(k + "/") for k in kept ):
+            kept.append( path )
+    return sorted( kept )
+
+@dataclass
+class DirtyPaths:
+    full    : str | None = None # Why a full sync is needed, if it is
+    rewatch : bool = False # Events have been lost, watches must be recreated
+    paths   : Set[str] = field(default_factory=set) # Changed paths relative to the base
+    since   : float | None = None # Monotonic time of the first change
+    latest  : float | None = None # Monotonic time of the last change
+
+    def pending( self ) -> bool:
+        return self.full is not None or bool(self.paths)
+
+    def touch( self ) -> None:
+        now = time.monotonic()
+        if self.since is None: self.since = now
+        self.latest = now
+
+class SourceWatcher:
+    """ Watches the sources of a plan with inotify, collecting the paths
+    changed since the last sync relative to the folder rsync sends the
+    sources from. Folders are watched one by one, as inotify is not
+    recursive, and excluded folders are never watched. """
+    def __init__( self, plan: PlanCfg, inotify: Inotify ):
+        self.inotify = inotify
+        self.filter = ExcludeFilter.from_command( plan.command )
+        self.deletes = any( arg == "--delete" or arg.startswith("--delete-")
+            for arg in plan.command )
+
+        # Snapshots must contain every file, hence they always sync in full
+        self.incremental = plan.snapshot is None
+        self.roots: Dict[str, str] = dict() # Relative root -> base folder
+        for source in split_rsync_command( plan.command ).sources:
+            base, root = source_base( source )
+            self.roots[root] = base
+
+        # Incremental syncs send paths relative to a single base folder
+        if len( set(self.roots.values()) ) != 1: self.incremental = False
+        self.base = next( iter(self.roots.values()) )
+        self.watches: Dict[int, str] = dict() # Watch descriptor -> relative path
+        self.dirty = DirtyPaths()
+
+    def watch_all( self ) -> None:
+        """ (Re)create the watches of all the sources """
+        for wd in list( self.watches ): self.inotify.rm_watch( wd )
+        self.watches.clear()
+        for root, base in self.roots.items():
+            self._watch_tree( os.path.join( base, root ) if root else base, root )
+
+    def _watch_tree( self, path: str, rel_path: str ) -> None:
+        """ Watch the folder and all its subfolders not excluded """
+        stack = [ ( path, rel_path ) ]
+        while stack:
+            path, rel_path = stack.pop()
+            try:
+                wd = self.inotify.add_watch( path, WATCH_MASK )
+            except OSError as e:
+                cwarn(f"[*] Cannot watch {path}: {e}")
+                continue
+
+            self.watches[wd] = rel_path
+            if not os.path.isdir( path ): continue
+            try:
+                with os.scandir( path ) as entries:
+                    for entry in entries:
+                        if not entry.is_dir( follow_symlinks=False ): continue
+                        child = os.path.join( rel_path, entry.name )
+                        if self.filter.excluded( child, entry.path ): continue
+                        stack.append( ( entry.path, child ) )
+            except OSError as e:
+                cwarn(f"[*] Cannot list {path}: {e}")
+
+    def _unwatch_tree( self, rel_path: str ) -> None:
+        """ Drop the watches of a folder moved away and of its subfolders """
+        for wd, path in list( self.watches.items() ):
+            if path == rel_path or path.startswith( rel_path + "/" ):
+                self.inotify.rm_watch( wd )
+                del self.watches[wd]
+
+    def _mark( self, rel_path: str ) -> None:
+        if rel_path and self.filter.excluded( rel_path, os.path.join( self.base, rel_path ) ):
+            return
+        if rel_path and self.incremental:
+            self.dirty.paths.add( rel_path )
+        else:
+            self.dirty.full = self.dirty.full or "the sources changed"
+        self.dirty.touch()
+
+    def _lost( self, reason: str ) -> None:
+        self.dirty.full = reason
+        self.dirty.rewatch = True
+        self.dirty.touch()
+
+    def handle( self, events: List[InotifyEvent] ) -> None:
+        """ Update the dirty paths with the input events """
+        for event in events:
+            if event.mask & IN_Q_OVERFLOW:
+                self._lost( "the inotify event queue overflowed" )
+                continue
+
+            folder = self.watches.get( event.wd )
+            if folder is None: continue
+            if event.mask & IN_IGNORED:
+                del self.watches[event.wd]
+                if folder in self.roots:
+                    self._lost( f"the source {folder or self.base} is no longer watched" )
+                continue
+
+            rel_path = os.path.join( folder, event.name ) if event.name else folder
+            abs_path = os.path.join( self.base, rel_path )
+            is_dir = bool( event.mask & IN_ISDIR )
+            if is_dir and self.filter.excluded( rel_path, abs_path ): continue
+
+            if event.mask & ( IN_DELETE | IN_MOVED_FROM ):
+                if is_dir and event.mask & IN_MOVED_FROM: self._unwatch_tree( rel_path )
+                if self.deletes: self._mark( folder )
+                continue
+
+            if is_dir and event.mask & ( IN_CREATE | IN_MOVED_TO ):
+                self._watch_tree( abs_path, rel_path )
+            self._mark( rel_path )
+
+    def take( self ) -> SourceScan | None:
+        """ Returns the scan of an incremental sync of the dirty paths, None
+        if a full sync is needed, and resets the dirty paths. Paths removed
+        in the meantime are replaced by their parent folder. """
+        dirty, self.dirty = self.dirty, DirtyPaths()
+        if dirty.full is not None or not self.incremental: return None
+
+        paths = set()
+        for path in dirty.paths:
+            while path and not os.path.lexists( os.path.join( self.base, path ) ):
+                if not self.deletes: break
+                path = os.path.dirname( path )
+            else:
+                if not path: return None
+                paths.add( path )
+
+        changed = topmost_paths( paths )
+        if not changed:
+            return SourceScan( None, TransferMode.noop, "the changed paths have been removed" )
+        return SourceScan( None, TransferMode.incremental,
+            f"{len(changed):,} paths changed", self.base, changed, recursive=True )
+
+    def restore( self, dirty: DirtyPaths ) -> None:
+        """ Merge back the dirty paths of a sync that did not happen """
+        self.dirty.full = self.dirty.full or dirty.full
+        self.dirty.paths |= dirty.paths
+        self.dirty.touch()
+
+def watch_job(
+    target: str, notification_en: bool, logging_en: bool,
+    debounce: float, max_delay: float
+) -> None:
+    """ Keep the target synchronised with its sources. Changes are collected
+    until no event arrives for `debounce` seconds, or `max_delay` seconds
+    have passed since the first one, then only the changed paths are sent.
+    The first sync, and the ones following a lost event, are full runs. """
+    target_conf_path = DEFAULT_PLAN_CONF_FOLDER / f"{target}{DEFAULT_PLAN_SUFFIX}"
+    plan_configuration = load_plan_configuration( target_conf_path )
+
+    with Inotify() as inotify:
+        watcher = SourceWatcher( plan_configuration, inotify )
+        watcher.watch_all()
+        cinfo(f"[*] Watching {len(watcher.watches):,} folders of target {target}")
+        watcher.dirty.full = "initial synchronisation"
+        watcher.dirty.touch()
+
+        while True:
+            timeout = None
+            dirty = watcher.dirty
+            if dirty.pending():
+                deadline = min( dirty.latest + debounce, dirty.since + max_delay )
+                timeout = max( 0.0, deadline - time.monotonic() )
+
+            events = inotify.read_events( timeout )
+            if events:
+                watcher.handle( events )
+                continue
+            if not watcher.dirty.pending(): continue
+
+            # The watches may be missing some folder after a lost event
+            if watcher.dirty.rewatch: watcher.watch_all()
+
+            pending = watcher.dirty
+            source_scan = watcher.take()
+            if source_scan is not None and source_scan.mode is TransferMode.noop: continue
+
+            reason = pending.full if source_scan is None else source_scan.reason
+            cinfo(f"[*] Synchronising target {target}: {reason}")
+
+            # Runs skipped by the overlap policy are retried after the debounce
+            if not run_job( target, False, notification_en, logging_en,
+                    source_scan=source_scan ):
+                watcher.restore( pending )
@@ -0,0 +1,23 @@
+import argparse
+
+from ._core import watch_job
+from backupctl.models.registry import read_registry
+from backupctl.utils.console import cerror, cwarn
+
+def run( args: argparse.Namespace ) -> None:
+    try:
+        # Performs a first check that the target is in the registry
+        registry = read_registry()
+        if registry is None or args.target not in registry:
+            cwarn(f"[*] Target {args.target} is not a job in the registry")
+            return 0
+
+        watch_job( args.target, args.notify, args.log, args.debounce, args.max_delay )
+        return 0
+
+    except KeyboardInterrupt:
+        cwarn("\n[*] CTRL+C - Exiting")
+        return 0
+    except Exception as e:
+        cerror(f"[ERROR] {e}")
+        return 1
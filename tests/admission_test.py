@@ -0,0 +1,131 @@
+import multiprocessing
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import backupctl.run._core as run_core
+from backupctl.models.plan_config import LogCfg, PlanCfg, ReplicaCfg
+from backupctl.utils.lock import SlotPool
+
+
+def test_slot_pool_limits_holders(tmp_path: Path) -> None:
+    """Hands out at most the configured number of slots."""
+    first, second = SlotPool(tmp_path, "host", 2), SlotPool(tmp_path, "host", 2)
+
+    assert first.try_acquire(2)
+    assert not second.try_acquire()
+
+    first.release()
+    assert second.try_acquire()
+
+
+def test_slot_pool_queue(tmp_path: Path) -> None:
+    """Serves waiting processes in order and bounds the queue length."""
+    holder = SlotPool(tmp_path, "target", 1, poll_interval=0.01)
+    waiter = SlotPool(tmp_path, "target", 1, poll_interval=0.01)
+    assert holder.try_acquire()
+
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: waiter.acquire() and acquired.set())
+    thread.start()
+    while waiter.waiting() == 0:
+        time.sleep(0.01)
+
+    # The queue already holds one pending acquisition
+    assert not SlotPool(tmp_path, "target", 1).acquire(max_waiting=1)
+    assert not acquired.is_set()
+
+    holder.release()
+    thread.join(timeout=5)
+    assert acquired.is_set()
+    waiter.release()
+
+
+def _hold_then_acquire(folder: Path, barrier, done) -> None:
+    """Holds one slot of two until the other process does, then asks for both."""
+    pool = SlotPool(folder, "host", 2, poll_interval=0.01)
+    assert pool.try_acquire()
+    barrier.wait()
+    assert pool.acquire(2)
+    done.put(len(pool._held))
+    pool.release()
+
+
+def test_slot_pool_no_partial_holds(tmp_path: Path) -> None:
+    """Two processes each holding a slot and needing both do not deadlock."""
+    context = multiprocessing.get_context("fork")
+    barrier, done = context.Barrier(2), context.Queue()
+    processes = [context.Process(target=_hold_then_acquire, args=(tmp_path, barrier, done))
+        for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=10)
+
+    alive = [process for process in processes if process.is_alive()]
+    for process in alive:
+        process.kill()
+    assert not alive, "the processes deadlocked"
+    assert [done.get(timeout=1), done.get(timeout=1)] == [2, 2]
+
+    # A failed attempt releases the slots it took
+    holder, pool = SlotPool(tmp_path, "host", 2), SlotPool(tmp_path, "host", 2)
+    assert holder.try_acquire()
+    assert not pool.try_acquire(2) and not pool._held
+    holder.release()
+
+
+def test_target_admission_skips_overlapping_runs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Skips a run while another run of the same target is active."""
+    monkeypatch.setattr(run_core, "RUN_LOCK_FOLDER", tmp_path)
+    plan = PlanCfg("docs", LogCfg(str(tmp_path), 10, 7), False, ["rsync"])
+
+    with run_core.target_admission(plan) as first:
+        with run_core.target_admission(plan) as second:
+            assert first and not second
+
+    with run_core.target_admission(plan) as third:
+        assert third
+
+
+def test_target_admission_keeps_queued_runs_first(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A run arriving once the active one ends does not overtake a queued run."""
+    monkeypatch.setattr(run_core, "RUN_LOCK_FOLDER", tmp_path)
+    plan = PlanCfg("docs", LogCfg(str(tmp_path), 10, 7), False, ["rsync"])
+    holder = SlotPool(tmp_path, "target-docs", 1)
+    waiter = SlotPool(tmp_path, "target-docs", 1, poll_interval=0.2)
+    assert holder.try_acquire()
+
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: waiter.acquire() and acquired.set())
+    thread.start()
+    while waiter.waiting() == 0:
+        time.sleep(0.01)
+
+    holder.release()
+    with run_core.target_admission(plan) as admitted:
+        assert not admitted
+
+    thread.join(timeout=5)
+    assert acquired.is_set()
+    waiter.release()
+
+
+def test_remote_sessions_reserved_up_front(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Reserves the sessions of the fan-out and replica hosts with the main ones."""
+    monkeypatch.setattr(run_core, "RUN_LOCK_FOLDER", tmp_path)
+    plan = PlanCfg("docs", LogCfg(str(tmp_path), 10, 7), False, ["rsync"])
+    plan.remote, plan.max_sessions = "first:873", 3
+    plan.fanout = [ReplicaCfg("first:873", "rsync://first:873/b/", None, 3)]
+    plan.replicas = [ReplicaCfg("first:873", "rsync://first:873/c/", None, 3),
+        ReplicaCfg("second:873", "rsync://second:873/c/", None, 2)]
+
+    with run_core.remote_sessions(plan, 4) as workers:
+        assert workers == 2  # One of the three sessions goes to the fan-out
+        assert not SlotPool(tmp_path, "host-first_873", 3).try_acquire()
+        assert SlotPool(tmp_path, "host-second_873", 2).try_acquire()
+        assert not SlotPool(tmp_path, "host-second_873", 2).try_acquire(2)
+
+    assert SlotPool(tmp_path, "host-first_873", 3).try_acquire(3)
@@ -0,0 +1,29 @@
+from datetime import datetime, time
+
+from backupctl.models.bandwidth import BandwidthSchedule, BandwidthWindow, bwlimit_option
+from backupctl.utils.rsync import set_rsync_options
+
+
+def test_bandwidth_schedule_windows() -> None:
+    """Applies the limit of the current window and finds when it changes."""
+    schedule = BandwidthSchedule(
+        [BandwidthWindow(time(8), time(19), 20 * 1024**2), BandwidthWindow(time(22), time(6), None)],
+        default=50 * 1024**2,
+    )
+
+    assert schedule.limit_at(datetime(2024, 1, 1, 9)) == 20 * 1024**2
+    assert schedule.limit_at(datetime(2024, 1, 1, 20)) == 50 * 1024**2
+    assert schedule.limit_at(datetime(2024, 1, 1, 23)) is None
+    assert schedule.next_change(datetime(2024, 1, 1, 9)) == datetime(2024, 1, 1, 19)
+    assert schedule.next_change(datetime(2024, 1, 1, 23)) == datetime(2024, 1, 2, 6)
+    assert BandwidthSchedule([], 1024).next_change(datetime(2024, 1, 1)) is None
+
+
+def test_bwlimit_options() -> None:
+    """Converts limits into rsync options replacing the previous ones."""
+    command = ["rsync", "-a", "--bwlimit=10", "/src", "rsync://host/mod/"]
+
+    assert bwlimit_option(None) == "--bwlimit=0"
+    assert set_rsync_options(command, bwlimit_option(2048 * 1024)) == [
+        "rsync", "--bwlimit=2048", "-a", "/src", "rsync://host/mod/"
+    ]
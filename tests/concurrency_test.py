@@ -0,0 +1,24 @@
+import time
+
+from backupctl.utils.concurrency import run_with_deadline
+
+
+def _fail() -> None:
+    raise RuntimeError("boom")
+
+
+def test_run_with_deadline_collects_results() -> None:
+    """Collects values, errors and tasks missing the deadline."""
+    tasks = {
+        "fast": lambda: "ok",
+        "error": _fail,
+        "slow": lambda: time.sleep(5),
+    }
+
+    started = time.monotonic()
+    results = run_with_deadline(tasks, started + 0.5)
+
+    assert time.monotonic() - started < 2
+    assert results["fast"].done and results["fast"].value == "ok"
+    assert results["error"].done and isinstance(results["error"].error, RuntimeError)
+    assert not results["slow"].done
@@ -0,0 +1,52 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from backupctl.models import registry as registry_model
+from backupctl.serve import _core
+from backupctl.serve._core import ControlServer, ControlState
+from backupctl.utils.control import control_query, served_registry
+from backupctl.utils.exceptions import InputValidationError
+
+JOB = "{} 0 2 * * * /usr/local/bin/backupctl run --log --notify {} ENABLED\n"
+
+
+@pytest.fixture
+def registry_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / "REGISTRY"
+    path.write_text(JOB.format("a", "a"), encoding="utf-8")
+    monkeypatch.setattr(registry_model, "REGISTERED_JOBS_FILE", path)
+    monkeypatch.setattr(_core, "REGISTERED_JOBS_FILE", path)
+    return path
+
+
+def test_state_reloads_changed_files(registry_file: Path) -> None:
+    """Serves the registry from memory until the file changes."""
+    state = ControlState()
+    assert list(state.registry()) == ["a"]
+    assert list(state.registry()) == ["a"]
+    assert (state.hits, state.misses) == (1, 1)
+
+    registry_file.write_text(JOB.format("a", "a") + JOB.format("b", "b"), encoding="utf-8")
+    assert list(state.registry()) == ["a", "b"]
+    assert state.misses == 2
+
+
+def test_control_server(registry_file: Path, tmp_path: Path) -> None:
+    """Answers the thin clients, raising the input errors again."""
+    path = tmp_path / "control.sock"
+    assert control_query({"query": "ping"}, path) is None
+
+    server = ControlServer(path, ControlState())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        registry = served_registry(path)
+        assert registry["a"].cmd.endswith("run --log --notify a")
+        assert control_query({"query": "ping"}, path)["result"]["misses"] == 1
+        with pytest.raises(InputValidationError, match="Targets not found: x"):
+            control_query({"query": "inspect", "targets": ["x"]}, path)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from backupctl.models.plan_config import ReplicaCfg, load_from_target
+from backupctl.models.quorum import quorum_reached, quorum_size
+from backupctl.models.user_config import (
+    NamedTarget, NotificationCfg, Remote, RemoteDest, RsyncCfg, Schedule, Target,
+)
+from backupctl.run._core import run_fanout_backup
+
+
+def test_quorum() -> None:
+    """Resolves all, any and N-of-M quorums."""
+    assert quorum_size("all", 3) == 3
+    assert quorum_size("any", 3) == 1
+    assert quorum_size("2", 3) == 2
+    assert quorum_reached("2", [True, False, True])
+    assert not quorum_reached("all", [True, False, True])
+
+
+def _target(tmp_path: Path, **kwargs) -> Target:
+    password_file = tmp_path / ".rsync_pass"
+    password_file.write_text("testpass\n", encoding="utf-8")
+    remotes = [
+        Remote(host=host, user="user", password_file=str(password_file),
+            dest=RemoteDest(module="backup", folder="data"))
+        for host in ("first", "second")
+    ]
+    return Target(remote=remotes, rsync=RsyncCfg(sources=[str(tmp_path)]),
+        schedule=Schedule(), notification=NotificationCfg(), **kwargs)
+
+
+def test_fanout_plan(tmp_path: Path) -> None:
+    """Keeps the first remote in the command and fans out to the others."""
+    plan = load_from_target(NamedTarget.from_target("sample", _target(tmp_path, quorum=1)))
+
+    assert plan.command[-1] == "rsync://user@first:873/backup/data/"
+    assert [d.dest for d in plan.fanout] == ["rsync://user@second:873/backup/data/"]
+    assert plan.quorum == "1"
+
+    with pytest.raises(ValidationError):
+        _target(tmp_path, quorum=3)
+
+
+def test_run_fanout_backup(tmp_path: Path) -> None:
+    """Succeeds or fails according to the quorum of destinations."""
+    fake_rsync = tmp_path / "rsync"
+    fake_rsync.write_text(
+        '#!/bin/sh\ncase "$*" in *second*) echo "@ERROR: auth failed" >&2; exit 5;; esac\nexit 0\n',
+        encoding="utf-8",
+    )
+    fake_rsync.chmod(0o755)
+    command = [str(fake_rsync), "-a", "/src", "rsync://first:873/mod/"]
+    destinations = [ReplicaCfg("second:873", "rsync://second:873/mod/")]
+    log_file = tmp_path / "run.log"
+
+    result = run_fanout_backup(command, 1, destinations, "any", log_file)
+    assert result.ok and result.return_code == 0
+    assert "DESTINATION 2/2: rsync://second:873/mod/" in log_file.read_text(encoding="utf-8")
+
+    result = run_fanout_backup(command, 1, destinations, "all", log_file)
+    assert not result.ok and result.return_code == 5
+    assert result.error == "@ERROR: auth failed"
+
+
+def test_fanout_shared_host_needs_sessions(tmp_path: Path) -> None:
+    """Rejects a host allowing fewer sessions than the remotes synched on it."""
+    target = _target(tmp_path)
+    shared = [remote.model_copy(update={"host": "first", "max_sessions": 1}) for remote in target.remotes()]
+    with pytest.raises(ValidationError, match="max_sessions must be at least 2"):
+        Target(remote=shared, rsync=target.rsync, schedule=target.schedule)
+
+    shared = [remote.model_copy(update={"max_sessions": 2}) for remote in shared]
+    assert len(Target(remote=shared, rsync=target.rsync, schedule=target.schedule).remotes()) == 2
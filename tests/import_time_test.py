@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+import pytest
+
+# Third-party packages slow to import, loaded only by the subcommands needing them
+HEAVY_MODULES = ("pydantic", "email_validator", "requests", "yaml", "croniter", "tabulate")
+
+# Subcommand module -> (heavy packages it may import, import-time budget in ms)
+SUBCOMMANDS: Dict[str, Tuple[Tuple[str, ...], int]] = {
+    "list": (("tabulate",), 400),
+    "status": ((), 350),
+    "inspect": ((), 550),
+    "remove": ((), 350),
+    "enable_disable": ((), 350),
+    "run": ((), 800),
+    "watch": ((), 900),
+    "verify": ((), 1000),
+    "retention": ((), 700),
+    "stats": (("tabulate",), 600),
+    "top": (("tabulate",), 450),
+    "serve": ((), 600),
+    "scheduler": (("croniter",), 850),
+    "register": (HEAVY_MODULES, 1500),
+    "validate": (HEAVY_MODULES, 1500),
+}
+
+# Slower machines scale the budgets rather than editing them
+BUDGET_SCALE = float(os.environ.get("BACKUPCTL_IMPORT_BUDGET_SCALE", "1"))
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """Returns the (name, self us, cumulative us) of each module imported
+    by the CLI followed by the input module, from `-X importtime`."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import backupctl.cli, {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        # Nested imports are indented after the separator space
+        times.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def total_ms(times: List[Tuple[str, int, int]]) -> float:
+    """Sums the cumulative times of the modules imported at the top level."""
+    return sum(cumulative for name, _, cumulative in times if not name.startswith(" ")) / 1000
+
+
+def summary(times: List[Tuple[str, int, int]], top: int = 8) -> str:
+    """Formats the total and the slowest modules by their own import time."""
+    slowest = sorted(times, key=lambda t: t[1], reverse=True)[:top]
+    lines = [f"total {total_ms(times):.1f} ms"]
+    lines += [f"  {self_us / 1000:7.1f} ms  {name.strip()}" for name, self_us, _ in slowest]
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("subcommand", SUBCOMMANDS)
+def test_subcommand_import_time(subcommand: str) -> None:
+    """Keeps the heavy packages and the import time of each subcommand in check."""
+    allowed, budget_ms = SUBCOMMANDS[subcommand]
+    times = import_times(f"backupctl.{subcommand}.cmd")
+    imported = {name.strip().split(".")[0] for name, _, _ in times}
+    unexpected = sorted(imported & set(HEAVY_MODULES) - set(allowed))
+    assert not unexpected, f"{subcommand} imports {', '.join(unexpected)}\n{summary(times)}"
+
+    # Timings are noisy, the best of a few measurements is compared
+    budget = budget_ms * BUDGET_SCALE
+    totals = [total_ms(times)]
+    while min(totals) > budget and len(totals) < 3:
+        times = import_times(f"backupctl.{subcommand}.cmd")
+        totals.append(total_ms(times))
+    print(f"\n[{subcommand}] {summary(times)}")
+    assert min(totals) <= budget, \
+        f"{subcommand} imports in {min(totals):.0f} ms (budget {budget:.0f} ms)\n{summary(times)}"
+
+def test_cli_imports_no_subcommand() -> None:
+    """The CLI module alone loads none of the subcommands."""
+    names = {name.strip() for name, _, _ in import_times("backupctl.cli")}
+    assert not {name for name in names if name.endswith(".cmd")}
+    assert not names & set(HEAVY_MODULES)
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from backupctl.models.journal import RunRecord, append_run, latest_run, read_runs
+from backupctl.models.rsync import RSyncStatus
+from backupctl.stats._core import compute_target_stats, percentile
+
+
+def _record(target: str, started: datetime, seconds: int, exit_code: int = 0) -> RunRecord:
+    return RunRecord(
+        target=target,
+        started=started,
+        finished=started + timedelta(seconds=seconds),
+        exit_code=exit_code,
+        status=RSyncStatus.OK if exit_code == 0 else RSyncStatus.OTHER_ERROR,
+        bytes_transferred=seconds * 1024,
+        notifications={"discord": None},
+    )
+
+
+def test_journal_roundtrip(tmp_path: Path) -> None:
+    """Appends runs and reads back the latest one per target."""
+    journal = tmp_path / "journal.db"
+    start = datetime(2025, 1, 1, 3, 0, 0)
+    append_run(_record("a", start, 10), journal)
+    append_run(_record("a", start + timedelta(days=1), 20, exit_code=23), journal)
+    append_run(_record("b", start, 5), journal)
+
+    latest = latest_run("a", journal)
+
+    assert latest is not None
+    assert latest.exit_code == 23
+    assert latest.status == RSyncStatus.OTHER_ERROR
+    assert latest.notifications == {"discord": None}
+    assert [r.target for r in read_runs(["b"], path=journal)] == ["b"]
+    assert latest_run("missing", journal) is None
+
+
+def test_compute_target_stats() -> None:
+    """Computes success rate, percentiles and throughput."""
+    start = datetime(2025, 1, 1)
+    records = [_record("a", start + timedelta(hours=i), 10 * (i + 1)) for i in range(4)]
+    records.append(_record("a", start + timedelta(hours=5), 100, exit_code=12))
+
+    stats = compute_target_stats("a", records)
+
+    assert stats.runs == 5
+    assert stats.success_rate == 0.8
+    assert stats.durations[50] == 30
+    assert stats.throughputs[50] == 1024
+    assert percentile([1, 2, 3, 4], 90) == 4
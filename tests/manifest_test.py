@@ -0,0 +1,73 @@
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from backupctl.models.manifest import SourceManifest, TransferMode, diff_manifests
+from backupctl.models.plan_config import ManifestCfg, PlanCfg
+from backupctl.run import _core
+from backupctl.utils.rsync import files_from_command
+from backupctl.utils.scan import scan_sources
+
+NOW = datetime(2024, 1, 1, 12)
+
+
+def _tree(root: Path) -> None:
+    (root / "src" / "sub").mkdir(parents=True)
+    (root / "src" / "a.txt").write_text("a", encoding="utf-8")
+    (root / "src" / "sub" / "b.txt").write_text("b", encoding="utf-8")
+
+
+def test_manifest_roundtrip(tmp_path: Path) -> None:
+    """Saves and loads the scanned tree, diffing it against a changed one."""
+    _tree(tmp_path)
+    base = f"{tmp_path}/"
+    manifest = SourceManifest.from_entries(scan_sources(base, ["src"]), NOW)
+    manifest.save(tmp_path / "target.manifest")
+
+    loaded = SourceManifest.load(tmp_path / "target.manifest")
+    assert loaded.paths == ["src", "src/a.txt", "src/sub", "src/sub/b.txt"]
+    assert loaded.full_run == NOW
+    assert diff_manifests(loaded, manifest).empty()
+
+    (tmp_path / "src" / "sub" / "b.txt").write_text("bb", encoding="utf-8")
+    (tmp_path / "src" / "a.txt").unlink()
+    diff = diff_manifests(loaded, SourceManifest.from_entries(scan_sources(base, ["src"]), NOW))
+    assert diff.changed == ["src", "src/sub/b.txt"]
+    assert diff.removed == ["src/a.txt"]
+
+
+def test_scan_plan_sources(tmp_path: Path, monkeypatch) -> None:
+    """Skips unchanged runs, sends few changes and falls back to full runs."""
+    _tree(tmp_path)
+    manifest_path = tmp_path / "target.manifest"
+    monkeypatch.setattr(_core, "manifest_file", lambda name: manifest_path)
+    plan = PlanCfg("target", None, False,
+        ["rsync", "-a", str(tmp_path / "src"), "rsync://host:873/mod/"],
+        manifest=ManifestCfg(max_changes=1, full_run_hours=24))
+
+    scan = _core.scan_plan_sources(plan, NOW)
+    assert scan.mode is TransferMode.full
+    scan.manifest.save(manifest_path)
+    assert _core.scan_plan_sources(plan, NOW + timedelta(hours=1)).mode is TransferMode.noop
+
+    os.utime(tmp_path / "src" / "a.txt", ns=(0, 0))
+    scan = _core.scan_plan_sources(plan, NOW + timedelta(hours=1))
+    assert scan.mode is TransferMode.incremental
+    assert (scan.base, scan.changed) == (f"{tmp_path}/", ["src/a.txt"])
+
+    # Permission, owner, ACL and xattr changes leave the size and mtime untouched
+    scan.manifest.save(manifest_path)
+    os.chmod(tmp_path / "src" / "sub" / "b.txt", 0o600)
+    scan = _core.scan_plan_sources(plan, NOW + timedelta(hours=1))
+    assert scan.mode is TransferMode.incremental
+    assert scan.changed == ["src/sub/b.txt"]
+    assert scan.manifest.full_run == NOW
+    assert _core.scan_plan_sources(plan, NOW + timedelta(hours=25)).mode is TransferMode.full
+
+
+def test_files_from_command() -> None:
+    """Sends the listed paths relative to the base without deletions."""
+    command = ["rsync", "-a", "--delete", "--delete-after", "/data/src", "rsync://host/mod/"]
+    assert files_from_command(command, "/tmp/list", "/data/") == [
+        "rsync", "-a", "--from0", "--files-from=/tmp/list", "/data/", "rsync://host/mod/"
+    ]
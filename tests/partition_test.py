@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from backupctl.run._core import plan_parallel_transfers
+from backupctl.utils.partition import balanced_partition
+
+
+def test_balanced_partition() -> None:
+    """Splits weighted items into groups of similar total weight."""
+    items = [("a", 10), ("b", 7), ("c", 5), ("d", 3), ("e", 2)]
+
+    groups = balanced_partition(items, 2)
+    weights = sorted(sum(dict(items)[i] for i in group) for group in groups)
+
+    assert weights == [13, 14]
+    assert balanced_partition(items[:1], 3) == [["a"]]
+
+
+def test_plan_parallel_transfers_per_source(tmp_path: Path) -> None:
+    """Creates one transfer per source when there are enough sources."""
+    command = ["rsync", "-aHAX", "/src/a", "/src/b", "rsync://host:873/mod/"]
+
+    transfers = plan_parallel_transfers(command, 2, tmp_path)
+
+    assert [t.command for t in transfers] == [
+        ["rsync", "-aHAX", "/src/a", "rsync://host:873/mod/"],
+        ["rsync", "-aHAX", "/src/b", "rsync://host:873/mod/"],
+    ]
+
+
+def test_plan_parallel_transfers_chunks_source(tmp_path: Path) -> None:
+    """Splits a single source into --files-from chunks."""
+    source = tmp_path / "data"
+    for name, size in [("big", 100), ("mid", 60), ("small", 40)]:
+        (source / name).mkdir(parents=True)
+        (source / name / "file").write_bytes(b"x" * size)
+
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    command = ["rsync", "-aHAX", str(source), "rsync://host:873/mod/"]
+
+    transfers = plan_parallel_transfers(command, 2, work_dir)
+
+    assert len(transfers) == 2
+    listed = []
+    for transfer in transfers:
+        assert transfer.command[-2] == str(tmp_path) + "/"
+        files_from = next(a for a in transfer.command if a.startswith("--files-from="))
+        listed += Path(files_from.split("=", 1)[1]).read_text().split()
+
+    assert sorted(listed) == ["data/big", "data/mid", "data/small"]
+
+
+def test_plan_parallel_transfers_with_delete(tmp_path: Path) -> None:
+    """Never splits a deleting command where workers would delete each other's files."""
+    dest = "rsync://host:873/mod/"
+    command = ["rsync", "-aHAX", "--delete", "--delete-after", "/src/a/", "/src/b/", dest]
+    assert [t.command for t in plan_parallel_transfers(command, 2, tmp_path)] == [command]
+
+    # Folders copied as a whole only delete inside themselves, but are not chunked
+    source = tmp_path / "data"
+    for name in ("big", "small"):
+        (source / name).mkdir(parents=True)
+    command = ["rsync", "-aHAX", "--delete", str(source), "/src/b", dest]
+    transfers = plan_parallel_transfers(command, 4, tmp_path)
+    assert [t.command for t in transfers] == [
+        ["rsync", "-aHAX", "--delete", str(source), dest],
+        ["rsync", "-aHAX", "--delete", "/src/b", dest],
+    ]
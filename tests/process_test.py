@@ -0,0 +1,94 @@
+import io
+import sys
+import time
+
+import pytest
+
+import backupctl.utils.process as process
+from backupctl.utils.process import stream_command
+
+
+def test_stream_command_forwards_output() -> None:
+    """Forwards the whole stdout/stderr to the sinks and keeps the return code."""
+    script = "import sys; print('hello'); print('oops', file=sys.stderr); sys.exit(3)"
+    stdout, stderr = io.StringIO(), io.StringIO()
+
+    out = stream_command([sys.executable, "-c", script], stdout, stderr)
+
+    assert out.return_code == 3
+    assert stdout.getvalue() == "hello\n"
+    assert stderr.getvalue() == "oops\n"
+    assert out.stderr_tail == "oops\n"
+    assert not out.stderr_truncated
+
+
+def test_stream_command_keeps_bounded_tail() -> None:
+    """Keeps only the last characters of a large stream in memory."""
+    script = (
+        "import sys\n"
+        "for i in range(20000): sys.stderr.write(f'line {i}\\n')\n"
+    )
+    stdout, stderr = io.StringIO(), io.StringIO()
+
+    out = stream_command([sys.executable, "-c", script], stdout, stderr, tail_size=1024)
+
+    assert out.return_code == 0
+    assert stderr.getvalue().count("\n") == 20000
+    assert len(out.stderr_tail) == 1024
+    assert out.stderr_tail.endswith("line 19999\n")
+    assert out.stderr_truncated
+
+
+def test_stream_command_terminates_at_deadline() -> None:
+    """Terminates the process still running at the deadline."""
+    script = "import time; print('started', flush=True); time.sleep(30)"
+    stdout, stderr = io.StringIO(), io.StringIO()
+
+    out = stream_command([sys.executable, "-c", script], stdout, stderr,
+        deadline=time.monotonic() + 0.5)
+
+    assert out.interrupted
+    assert out.return_code != 0
+    assert stdout.getvalue() == "started\n"
+
+
+def test_stream_command_kills_process_ignoring_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Kills the process still running a grace period after the deadline."""
+    monkeypatch.setattr(process, "STALL_KILL_GRACE", 0.5)
+    script = (
+        "import signal, time\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        "print('started', flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    started = time.monotonic()
+
+    out = stream_command([sys.executable, "-c", script], io.StringIO(), io.StringIO(),
+        deadline=time.monotonic() + 0.5)
+
+    assert out.interrupted and not out.stalled
+    assert out.return_code != 0
+    assert time.monotonic() - started < 10
+
+
+def test_stream_command_kills_stalled_process() -> None:
+    """Kills the process group of a process showing no activity."""
+    script = "import time; print('started', flush=True); time.sleep(30)"
+    started = time.monotonic()
+
+    out = stream_command([sys.executable, "-c", script], io.StringIO(), io.StringIO(),
+        stall_timeout=0.5)
+
+    assert out.stalled and not out.interrupted
+    assert out.return_code != 0
+    assert time.monotonic() - started < 10
+
+
+def test_stream_command_keeps_active_process() -> None:
+    """Does not kill a process printing more often than the stall timeout."""
+    script = "import time\nfor i in range(5): print(i, flush=True); time.sleep(0.2)"
+
+    out = stream_command([sys.executable, "-c", script], io.StringIO(), io.StringIO(),
+        stall_timeout=0.5)
+
+    assert not out.stalled and out.return_code == 0
@@ -0,0 +1,40 @@
+import json
+import os
+from pathlib import Path
+
+from backupctl.models.progress import (
+    ProgressPublisher,
+    ProgressUpdate,
+    progress_file,
+    read_progress_files,
+)
+
+
+def test_progress_update_from_line() -> None:
+    """Parses a --info=progress2 line into bytes, percent, rate and ETA."""
+    update = ProgressUpdate.from_line("  1,234,567  45%   12.50MB/s    0:01:10 (xfr#3, to-chk=10/20)")
+
+    assert update == ProgressUpdate(1234567, 45, 12.5 * 1024**2, 70)
+    assert ProgressUpdate.from_line("sending incremental file list") is None
+
+
+def test_progress_publisher_writes_status_file(tmp_path: Path) -> None:
+    """Publishes the last update fed through a tracker and cleans up on stop."""
+    publisher = ProgressPublisher("docs", folder=tmp_path, interval=0)
+    publisher.start()
+    tracker = publisher.tracker("1")
+
+    tracker.feed("      1,024   1%  1.00kB/s    0:00:09\r      2,0")
+    tracker.feed("48  50%  2.00kB/s    0:00:05\r")
+
+    data = json.loads(progress_file("docs", tmp_path).read_text())
+    assert data["pid"] == os.getpid()
+    assert data["workers"]["1"]["bytes_done"] == 2048
+
+    [progress] = read_progress_files(tmp_path)
+    assert progress.is_alive()
+    assert progress.percent() == 50
+    assert progress.eta_s() == 5
+
+    publisher.stop()
+    assert read_progress_files(tmp_path) == []
@@ -0,0 +1,46 @@
+import io
+from pathlib import Path
+
+from backupctl.models.plan_config import ReplicaCfg
+from backupctl.run._core import replicate_backup
+from backupctl.utils.rsync import read_batch_command, replica_command
+
+COMMAND = [
+    "rsync", "--write-batch=/tmp/b", "-aHAX", "--password-file=/pw", "/src",
+    "rsync://host:873/mod/data/",
+]
+
+
+def test_replica_commands() -> None:
+    """Builds the replay and the independent commands towards a replica."""
+    assert read_batch_command(COMMAND, "/tmp/b", "rsync://other:873/mod/", "/pw2") == [
+        "rsync", "-aHAX", "--password-file=/pw2", "--read-batch=/tmp/b", "rsync://other:873/mod/"
+    ]
+    assert replica_command(COMMAND, "rsync://other:873/mod/", None) == [
+        "rsync", "-aHAX", "/src", "rsync://other:873/mod/"
+    ]
+
+
+def test_replicate_backup_falls_back(tmp_path: Path) -> None:
+    """Runs an independent transfer when the batch replay fails."""
+    fake_rsync = tmp_path / "rsync"
+    fake_rsync.write_text(
+        "#!/bin/sh\n"
+        'case "$*" in *--read-batch*other*) echo "failed verification" >&2; exit 23;; esac\n'
+        "exit 0\n",
+        encoding="utf-8",
+    )
+    fake_rsync.chmod(0o755)
+    batch_file = tmp_path / "replica.batch"
+    batch_file.write_bytes(b"batch")
+
+    replicas = [
+        ReplicaCfg("same:873", "rsync://same:873/mod/"),
+        ReplicaCfg("other:873", "rsync://other:873/mod/"),
+    ]
+    command = [str(fake_rsync), "-a", "/src", "rsync://host:873/mod/"]
+    runs = replicate_backup(command, replicas, batch_file, io.StringIO())
+
+    assert [run.replayed for run in runs] == [True, False]
+    assert all(run.run.ok() for run in runs)
+    assert "--read-batch" not in " ".join(runs[1].run.command)
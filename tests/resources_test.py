@@ -0,0 +1,70 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from backupctl.models.plan_config import ResourcesCfg
+from backupctl.models.resources import cpu_list, io_max_line, transferred_name
+from backupctl.models.user_config import ResourcesCfg as UserResourcesCfg
+from backupctl.run._core import execute_command
+from backupctl.utils.resources import PageCacheDropper, ResourceGovernor
+from backupctl.utils.rsync import lists_names
+
+
+def test_resource_formats() -> None:
+    """Formats CPU ranges and io.max lines, and parses the names printed by rsync."""
+    assert cpu_list([3, 0, 1, 2, 8]) == "0-3,8"
+    assert io_max_line("8:0", 1000, None, None, 50) == "8:0 rbps=1000 wbps=max riops=max wiops=50"
+    assert transferred_name("docs/report.pdf\n") == "docs/report.pdf"
+    assert transferred_name(">f+++++++++ docs/report.pdf") == "docs/report.pdf"
+    assert transferred_name("docs/") is None
+
+
+def test_resources_config() -> None:
+    """Rejects a level without a class that has levels."""
+    assert UserResourcesCfg(ionice_class="best-effort", ionice_level=7).ionice_level == 7
+    with pytest.raises(ValidationError):
+        UserResourcesCfg(ionice_class="idle", ionice_level=7)
+    with pytest.raises(ValidationError):
+        UserResourcesCfg(cgroup={"parent": "backup.slice"})
+
+
+def test_lists_names() -> None:
+    """Detects the options printing the names of the updated files."""
+    assert lists_names(["rsync", "-avvHAX", "/src", "rsync://host/mod/"])
+    assert lists_names(["rsync", "-aHAX", "--itemize-changes", "/src", "rsync://host/mod/"])
+    assert not lists_names(["rsync", "-aHAX", "--stats", "/src", "rsync://host/mod/"])
+
+
+def test_page_cache_dropper(tmp_path: Path) -> None:
+    """Drops every regular file named in the output, split across chunks."""
+    for name in ("a", "b"):
+        (tmp_path / name).write_bytes(b"x" * 100)
+    (tmp_path / "dir").mkdir()
+
+    dropper = PageCacheDropper([str(tmp_path) + "/"])
+    dropper.feed("sending incremental file list\na\ndir/\n")
+    assert dropper.files == 0
+    dropper.feed("b")
+    dropper.close()
+    assert (dropper.files, dropper.bytes) == (2, 200)
+
+
+def test_governed_command(tmp_path: Path) -> None:
+    """Applies the niceness and the affinity to rsync and logs them."""
+    fake_rsync = tmp_path / "rsync"
+    fake_rsync.write_text("#!/bin/sh\nsleep 0.2\n", encoding="utf-8")
+    fake_rsync.chmod(0o755)
+
+    cpu = min(os.sched_getaffinity(0))
+    nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 5, 19)
+    cfg = ResourcesCfg(nice=nice, cpus=[cpu], cgroup=None)
+    log = io.StringIO()
+    with ResourceGovernor(cfg, "sample") as governor:
+        run = execute_command([str(fake_rsync), "-a", "/src", "rsync://host/mod/"], log,
+            resources=governor)
+
+    assert run.ok()
+    assert f"Resources: nice {nice}, cpus {cpu}\n\n----- STDOUT -----" in log.getvalue()
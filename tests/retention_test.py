@@ -0,0 +1,180 @@
+import os
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from zipfile import ZipFile
+
+import pytest
+
+from backupctl.models.plan_config import LogCfg
+from backupctl.models.retention import RetentionIndex, register_log_file
+from backupctl.retention import _core
+from backupctl.retention._core import apply_global_log_budget, apply_log_retention
+
+
+def _make_logs(folder: Path, count: int) -> list[Path]:
+    logs = []
+    for idx in range(count):
+        log_file = folder / f"my-target-20240101-0000{idx:02d}.log"
+        log_file.write_text(f"run {idx}\n")
+        logs.append(log_file)
+    return logs
+
+
+def test_retention_archives_logs_from_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Archives previous logs in groups and keeps the index up to date."""
+    logs = _make_logs(tmp_path, 5)
+    cfg = LogCfg(str(tmp_path), max_spare_files=2, retention_window=10000)
+
+    apply_log_retention(tmp_path, cfg)  # First run builds the index
+
+    index = RetentionIndex.load(tmp_path)
+    assert [e.name for e in index.logs] == [logs[-1].name]
+    assert sorted(e.name for e in index.archives) == [
+        "log_archive-20240101-20240101-2.zip",
+        "log_archive-20240101-20240101.zip",
+    ]
+    assert not logs[0].exists() and logs[-1].exists()
+
+    # Logs registered later are retained without listing the folder anymore
+    monkeypatch.setattr(os, "scandir", None)
+    monkeypatch.setattr(os, "listdir", None)
+    new_logs = [tmp_path / f"my-target-20240102-00000{idx}.log" for idx in range(2)]
+    for new_log in new_logs:
+        new_log.write_text("new run\n")
+        register_log_file(new_log)
+
+    apply_log_retention(tmp_path, cfg)
+
+    index = RetentionIndex.load(tmp_path)
+    assert [e.name for e in index.logs] == [new_logs[-1].name]
+    assert "log_archive-20240101-20240102.zip" in [e.name for e in index.archives]
+    assert not logs[-1].exists() and not new_logs[0].exists()
+
+
+def test_retention_registers_logs_while_archiving(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Lets a new run register its log while the archives are written."""
+    logs = _make_logs(tmp_path, 3)
+    new_log = tmp_path / "my-target-20240102-000000.log"
+    new_log.write_text("new run\n")
+    registered = []
+
+    write_archives = _core._write_archives
+    def register_while_writing(*args):
+        thread = threading.Thread(target=register_log_file, args=(new_log,))
+        thread.start()
+        thread.join(timeout=5)
+        registered.append(not thread.is_alive())
+        return write_archives(*args)
+
+    monkeypatch.setattr(_core, "_write_archives", register_while_writing)
+    apply_log_retention(tmp_path, LogCfg(str(tmp_path), max_spare_files=2, retention_window=10000))
+
+    assert registered == [True]
+    index = RetentionIndex.load(tmp_path)
+    assert [e.name for e in index.logs] == [logs[-1].name, new_log.name]
+    assert [e.name for e in index.archives] == ["log_archive-20240101-20240101.zip"]
+
+
+def test_retention_removes_expired_archives(tmp_path: Path) -> None:
+    """Removes the archives older than the retention window."""
+    old = (date.today() - timedelta(days=10)).strftime("%Y%m%d")
+    archive = tmp_path / f"log_archive-{old}-{old}.zip"
+    with ZipFile(archive, "w"):
+        pass
+
+    apply_log_retention(tmp_path, LogCfg(str(tmp_path), max_spare_files=2, retention_window=7))
+
+    assert not archive.exists()
+    assert RetentionIndex.load(tmp_path).archives == []
+
+
+def test_retention_archives_groups_in_parallel(tmp_path: Path) -> None:
+    """Writes one archive per group without clashing on the same date range."""
+    logs = _make_logs(tmp_path, 7)
+    cfg = LogCfg(str(tmp_path), max_spare_files=2, retention_window=10000)
+
+    apply_log_retention(tmp_path, cfg)
+
+    names = sorted(e.name for e in RetentionIndex.load(tmp_path).archives)
+    assert names == [
+        "log_archive-20240101-20240101-2.zip",
+        "log_archive-20240101-20240101-3.zip",
+        "log_archive-20240101-20240101.zip",
+    ]
+    with ZipFile(tmp_path / names[-1]) as zipf:
+        assert len(zipf.namelist()) == 2
+    assert [p.name for p in tmp_path.glob("*.log")] == [logs[-1].name]
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_retention_tar_zst_archives(tmp_path: Path) -> None:
+    """Archives logs into a zstd compressed tarball."""
+    zstandard = pytest.importorskip("zstandard")
+    _make_logs(tmp_path, 3)
+    cfg = LogCfg(str(tmp_path), max_spare_files=2, retention_window=10000, archive_format="tar.zst")
+
+    apply_log_retention(tmp_path, cfg)
+
+    archive = tmp_path / "log_archive-20240101-20240101.tar.zst"
+    with archive.open("rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as zstf:
+        import tarfile
+
+        with tarfile.open(fileobj=zstf, mode="r|") as tarf:
+            assert len(tarf.getnames()) == 2
+
+
+def test_retention_enforces_size_budget(tmp_path: Path) -> None:
+    """Evicts the oldest archives, then the oldest logs, to fit the budget."""
+    old_archive = tmp_path / "log_archive-20231201-20231201.zip"
+    old_archive.write_bytes(b"x" * 100)
+    logs = _make_logs(tmp_path, 3)
+    for log_file in logs:
+        log_file.write_bytes(b"x" * 100)
+    cfg = LogCfg(str(tmp_path), max_spare_files=10, retention_window=10000, max_total_bytes=150)
+
+    apply_log_retention(tmp_path, cfg)
+
+    assert not old_archive.exists()
+    assert [p.exists() for p in logs] == [False, False, True]
+    index = RetentionIndex.load(tmp_path)
+    assert index.total_size() == 100 and index.archives == []
+
+
+def test_global_budget_evicts_across_targets(tmp_path: Path) -> None:
+    """Evicts the oldest entries among all the targets log folders."""
+    first, second = tmp_path / "first", tmp_path / "second"
+    for folder, day in [(first, "01"), (second, "02")]:
+        folder.mkdir()
+        for hour in range(2):
+            (folder / f"t-202401{day}-0{hour}0000.log").write_bytes(b"x" * 100)
+
+    apply_global_log_budget(tmp_path, 300)
+
+    assert not (first / "t-20240101-000000.log").exists()
+    assert (second / "t-20240102-000000.log").exists()
+    assert sum(RetentionIndex.load(f).total_size() for f in (first, second)) == 300
+
+
+def test_global_budget_measures_the_growing_latest_log(tmp_path: Path) -> None:
+    """Never keeps the partial size of a log that is still written."""
+    folder = tmp_path / "target"
+    folder.mkdir()
+    previous, latest = folder / "t-20240101-000000.log", folder / "t-20240101-010000.log"
+    previous.write_bytes(b"x" * 100)
+    latest.write_bytes(b"x" * 10)
+
+    apply_global_log_budget(tmp_path, 200)
+    assert previous.exists()
+
+    latest.write_bytes(b"x" * 150)  # The run goes on after the global pass
+    apply_global_log_budget(tmp_path, 200)
+
+    assert not previous.exists()
+    index = RetentionIndex.load(folder)
+    assert [e.size for e in index.logs] == [None] and index.total_size() == 150
+
+    register_log_file(folder / "t-20240101-020000.log")
+    index = RetentionIndex.load(folder)
+    index.record_sizes()
+    assert [e.size for e in index.logs] == [150, None]
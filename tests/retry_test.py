@@ -0,0 +1,52 @@
+import io
+from pathlib import Path
+
+from backupctl.models.retry import RetryPolicy
+from backupctl.models.rsync import RSyncStatus
+from backupctl.run._core import execute_command
+
+
+def test_retry_policy() -> None:
+    """Retries transient exit codes only, with a capped exponential backoff."""
+    policy = RetryPolicy(4, backoff=10, backoff_factor=3, max_backoff=60)
+    assert policy.retryable(30, RSyncStatus.OTHER_ERROR)
+    assert not policy.retryable(5, RSyncStatus.OTHER_ERROR)
+    assert not policy.retryable(23, RSyncStatus.AUTH_FAILED)
+    assert policy.retryable(20, RSyncStatus.STALLED)
+    assert [policy.delay(attempt) for attempt in (1, 2, 3)] == [10, 30, 60]
+
+
+def _fake_rsync(tmp_path: Path, failures: int, code: int, stderr: str = "timeout") -> Path:
+    """rsync failing `failures` times with the input exit code, then succeeding."""
+    counter = tmp_path / "attempts"
+    fake_rsync = tmp_path / "rsync"
+    fake_rsync.write_text(
+        "#!/bin/sh\n"
+        f'echo x >> "{counter}"\n'
+        f'if [ "$(wc -l < "{counter}")" -le {failures} ]; then echo "{stderr}" >&2; exit {code}; fi\n'
+        'echo "$@"\n'
+        "exit 0\n",
+        encoding="utf-8",
+    )
+    fake_rsync.chmod(0o755)
+    return fake_rsync
+
+
+def test_execute_command_retries(tmp_path: Path) -> None:
+    """Resumes a transient failure from the partial dir and logs every attempt."""
+    fake_rsync = _fake_rsync(tmp_path, 2, 30)
+    log = io.StringIO()
+    run = execute_command([str(fake_rsync), "-a", "/src", "rsync://host/mod/"], log,
+        retry=RetryPolicy(3, backoff=0))
+
+    assert run.ok() and run.attempts == 3
+    assert "ATTEMPT 3/3" in log.getvalue()
+    assert "--partial-dir=.rsync-partial" in run.output.stdout_tail
+
+
+def test_execute_command_gives_up(tmp_path: Path) -> None:
+    """Does not retry failures that would fail again."""
+    fake_rsync = _fake_rsync(tmp_path, 5, 5, "@ERROR: auth failed")
+    run = execute_command([str(fake_rsync), "/src", "rsync://host/mod/"], io.StringIO(),
+        retry=RetryPolicy(3, backoff=0))
+    assert not run.ok() and run.attempts == 1 and run.status is RSyncStatus.AUTH_FAILED
@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from backupctl.models.admission import OverlapPolicy
+from backupctl.models.registry import Job, JobBackend, JobStatusType, load_registry, \
+    write_registry
+from backupctl.models.scheduler import MAX_CATCH_UP_RUNS, CatchUpPolicy, SchedulerState, TimerQueue, \
+    catch_up_fires, missed_fires, next_fire
+from backupctl.scheduler._core import ScheduledJob, Scheduler
+
+
+def test_cron_firings() -> None:
+    """Computes the next and the missed firings, and the ones caught up."""
+    assert next_fire("0 * * * *", datetime(2024, 1, 1, 10, 0)) == datetime(2024, 1, 1, 11, 0)
+    missed = missed_fires("0 * * * *", datetime(2024, 1, 1, 10, 0), datetime(2024, 1, 1, 13, 30))
+    assert missed == [datetime(2024, 1, 1, h, 0) for h in (11, 12, 13)]
+    assert catch_up_fires(CatchUpPolicy.skip, missed) == []
+    assert catch_up_fires(CatchUpPolicy.once, missed) == missed[-1:]
+    assert catch_up_fires(CatchUpPolicy.all, missed) == missed
+
+    # Only the latest firings are walked after a long downtime
+    now = datetime(2024, 3, 1, 12, 0)
+    missed = missed_fires("* * * * *", datetime(2024, 1, 1), now)
+    assert missed == [now - timedelta(minutes=m) for m in reversed(range(MAX_CATCH_UP_RUNS))]
+
+
+def test_timer_queue() -> None:
+    """Pops the due jobs in order, ignoring the rescheduled and cancelled entries."""
+    timers = TimerQueue()
+    timers.schedule("a", datetime(2024, 1, 1, 10))
+    timers.schedule("b", datetime(2024, 1, 1, 9))
+    timers.schedule("c", datetime(2024, 1, 1, 8))
+    timers.schedule("a", datetime(2024, 1, 1, 12))
+    timers.cancel("c")
+    assert len(timers) == 2
+    assert timers.next_time() == datetime(2024, 1, 1, 9)
+    assert timers.pop_due(datetime(2024, 1, 1, 11)) == [("b", datetime(2024, 1, 1, 9))]
+    assert timers.next_time() == datetime(2024, 1, 1, 12)
+
+
+def test_registry_backend(tmp_path: Path) -> None:
+    """Keeps the cron lines unchanged and reads back the scheduler backend."""
+    path = tmp_path / "REGISTRY"
+    cmd = "0 2 * * * /usr/local/bin/backupctl run --log --notify {}"
+    write_registry(path, {
+        "a": Job("a", cmd.format("a"), JobStatusType.enabled),
+        "b": Job("b", cmd.format("b"), JobStatusType.disabled, JobBackend.scheduler),
+    })
+    assert path.read_text().splitlines()[0].endswith(" ENABLED")
+
+    registry = load_registry(path)
+    assert registry["a"].backend is JobBackend.cron
+    assert registry["b"].backend is JobBackend.scheduler
+    assert registry["b"].cmd == cmd.format("b") and not registry["b"].is_enabled()
+    assert registry["b"].schedule() == "0 2 * * *"
+
+
+def test_scheduler_limits(tmp_path: Path) -> None:
+    """Runs the due jobs within the global and per-host limits, in FIFO order."""
+    release, started = threading.Event(), []
+    def runner(name: str, dry_run: bool, notify: bool, log: bool) -> bool:
+        started.append(name)
+        release.wait(5)
+        return True
+
+    def job(name: str, host: str) -> ScheduledJob:
+        return ScheduledJob(name, "0 * * * *", False, True, host, OverlapPolicy.skip)
+
+    now = datetime(2024, 1, 1, 10, 30)
+    jobs = {"a": job("a", "h1:873"), "b": job("b", "h1:873"), "c": job("c", "h2:873"),
+        "d": job("d", "h3:873")}
+    with Scheduler(2, 1, CatchUpPolicy.once, tmp_path / "state.json", runner) as scheduler:
+        scheduler.update_jobs(jobs, now, startup=True)
+        scheduler.fire(datetime(2024, 1, 1, 11, 0))
+        scheduler.dispatch()
+        assert sorted(scheduler.running) == ["a", "c"]
+        assert [run.job.name for run in scheduler.pending] == ["b", "d"]
+
+        # A job firing again while it is running is skipped
+        scheduler.timers.schedule("a", datetime(2024, 1, 1, 11, 0))
+        scheduler.fire(datetime(2024, 1, 1, 11, 0))
+        assert [run.job.name for run in scheduler.pending] == ["b", "d"]
+        release.set()
+
+    assert sorted(started) == ["a", "c"]
+    state = SchedulerState.load(tmp_path / "state.json")
+    assert state.last_fires["b"] == datetime(2024, 1, 1, 11, 0)
+
+
+def test_scheduler_catch_up(tmp_path: Path) -> None:
+    """Runs once the firings missed since the last one handled."""
+    state_path = tmp_path / "state.json"
+    SchedulerState({"a": datetime(2024, 1, 1, 6, 0)}).save(state_path)
+
+    with Scheduler(1, 1, CatchUpPolicy.once, state_path, lambda *_: True) as scheduler:
+        job = ScheduledJob("a", "0 * * * *", False, False, None, OverlapPolicy.skip)
+        scheduler.update_jobs({"a": job}, datetime(2024, 1, 1, 10, 30), startup=True)
+        assert [(run.fire, run.catch_up) for run in scheduler.pending] == \
+            [(datetime(2024, 1, 1, 10, 0), True)]
+        assert scheduler.timers.next_time() == datetime(2024, 1, 1, 11, 0)
+
+    assert SchedulerState.load(state_path).last_fires["a"] == datetime(2024, 1, 1, 10, 0)
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from backupctl.models.snapshot import gfs_keep, parse_list_only, snapshot_name
+from backupctl.utils.rsync import delete_dest_folders_command, list_dest_command, snapshot_command
+
+COMMAND = ["rsync", "-aHAX", "--password-file=/pw", "/src", "rsync://host:873/mod/data/"]
+
+
+def test_parse_list_only() -> None:
+    """Keeps only the snapshot folders of the listing, sorted by age."""
+    output = "\n".join([
+        "drwxr-xr-x          4,096 2024/01/02 10:00:00 .",
+        "drwxr-xr-x          4,096 2024/01/02 10:00:00 20240102-100000",
+        "drwxr-xr-x          4,096 2024/01/01 10:00:00 20240101-100000",
+        "-rw-r--r--             12 2024/01/01 10:00:00 20240103-100000",
+        "drwxr-xr-x          4,096 2024/01/01 10:00:00 other folder",
+    ])
+
+    assert parse_list_only(output) == ["20240101-100000", "20240102-100000"]
+
+
+def test_gfs_keep() -> None:
+    """Keeps the most recent snapshot of each period of every level."""
+    start = datetime(2024, 1, 1, 0, 30)
+    names = [snapshot_name(start + timedelta(hours=6 * i)) for i in range(60)]
+
+    keep = gfs_keep(names, daily=3, weekly=3)
+
+    assert keep == {"20240115-183000", "20240114-183000", "20240113-183000", "20240107-183000"}
+    assert gfs_keep(names) == {names[-1]}
+    assert gfs_keep([]) == set()
+
+
+def test_snapshot_commands() -> None:
+    """Builds the snapshot, listing and pruning commands from the plan command."""
+    assert snapshot_command(COMMAND, "20240102-100000", ["20240101-100000"]) == [
+        "rsync", "-aHAX", "--password-file=/pw", "--link-dest=../20240101-100000",
+        "/src", "rsync://host:873/mod/data/20240102-100000/",
+    ]
+    assert list_dest_command(COMMAND) == [
+        "rsync", "--list-only", "--password-file=/pw", "rsync://host:873/mod/data/"
+    ]
+    assert delete_dest_folders_command(COMMAND, ["a", "b"], "/tmp/empty") == [
+        "rsync", "-r", "--delete", "--password-file=/pw", "--include=/a/***",
+        "--include=/b/***", "--exclude=*", "/tmp/empty/", "rsync://host:873/mod/data/",
+    ]
@@ -0,0 +1,50 @@
+from backupctl.models.rsync import RSyncStats
+
+RSYNC_STATS_OUTPUT = """
+Number of files: 1,234 (reg: 1,000, dir: 234)
+Number of created files: 10
+Number of deleted files: 0
+Number of regular files transferred: 56
+Total file size: 10,485,760 bytes
+Total transferred file size: 1,048,576 bytes
+Literal data: 524,288 bytes
+Matched data: 524,288 bytes
+File list size: 2,048
+File list generation time: 1.250 seconds
+File list transfer time: 0.001 seconds
+Total bytes sent: 600,000
+Total bytes received: 1,234
+
+sent 600,000 bytes  received 1,234 bytes  40,000.00 bytes/sec
+total size is 10,485,760  speedup is 17.44
+"""
+
+
+def test_parse_rsync_stats() -> None:
+    """Parses the --stats section printed by rsync."""
+    stats = RSyncStats.from_output("noise\n" + RSYNC_STATS_OUTPUT)
+
+    assert stats is not None
+    assert stats.num_files == 1234
+    assert stats.num_files_transferred == 56
+    assert stats.total_file_size == 10485760
+    assert stats.total_transferred_size == 1048576
+    assert stats.literal_data == 524288
+    assert stats.file_list_generation_time == 1.25
+    assert stats.speedup == 17.44
+
+
+def test_parse_rsync_stats_missing() -> None:
+    """Returns None when rsync did not print the stats."""
+    assert RSyncStats.from_output("rsync error: some error (code 5)") is None
+
+
+def test_merge_rsync_stats() -> None:
+    """Aggregates the stats of concurrent transfers."""
+    stats = RSyncStats.from_output(RSYNC_STATS_OUTPUT)
+
+    merged = RSyncStats.merge([stats, stats])
+
+    assert merged.num_files == 2468
+    assert merged.file_list_generation_time == 1.25
+    assert merged.speedup == stats.speedup
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from backupctl.models.tuning import LinkProfile, tune_transfer
+from backupctl.utils.probe import disk_read_throughput
+
+MiB = 1024**2
+
+
+def test_tune_transfer_wan() -> None:
+    """Compresses on a slow link and keeps the delta transfer."""
+    tuning = tune_transfer(LinkProfile(throughput=1 * MiB, disk_throughput=200 * MiB, zstd=True))
+
+    assert tuning.options[:2] == ["--compress", "--compress-level=9"]
+    assert tuning.options[2].startswith("--skip-compress=") and "zst" in tuning.options[2]
+    assert tuning.options[3:] == ["--compress-choice=zstd", "--no-whole-file"]
+    assert len(tuning.reasons) == 3
+
+
+def test_tune_transfer_lan() -> None:
+    """Sends whole files when the link is faster than the source disk."""
+    tuning = tune_transfer(LinkProfile(throughput=100 * MiB, disk_throughput=80 * MiB))
+    assert tuning.options == ["--whole-file"]
+
+    tuning = tune_transfer(LinkProfile(rtt_s=0.0002))
+    assert tuning.options == ["--no-whole-file"]
+
+
+def test_tune_transfer_forced() -> None:
+    """Options set by the configuration win over the measures."""
+    tuning = tune_transfer(LinkProfile(throughput=100 * MiB), compress=True, whole_file=False)
+
+    assert tuning.options[:2] == ["--compress", "--compress-level=6"]
+    assert tuning.options[-1] == "--no-whole-file"
+    assert "set by the configuration" in tuning.reasons[0]
+
+
+def test_disk_read_throughput(tmp_path: Path) -> None:
+    """Measures the disk reading the files of the sources."""
+    (tmp_path / "data").write_bytes(b"x" * 2 * MiB)
+
+    assert disk_read_throughput([str(tmp_path)]) > 0
+    assert disk_read_throughput([str(tmp_path / "missing")]) is None
@@ -0,0 +1,66 @@
+import random
+import stat
+from functools import partial
+from pathlib import Path
+
+from backupctl.models import journal
+from backupctl.models.plan_config import PlanCfg, VerifyCfg
+from backupctl.models.verify import VerifyStrategy, parse_mismatches, sample_entries
+from backupctl.utils.rsync import verify_command
+from backupctl.utils.scan import ScanEntry
+from backupctl.verify import _core
+
+
+def test_sample_entries() -> None:
+    """Keeps at least one file of each size class in a stratified sample."""
+    entries = [ScanEntry(f"small{i}", 10, 0, i, stat.S_IFREG) for i in range(98)]
+    entries += [ScanEntry("big1", 1 << 30, 0, 98), ScanEntry("big2", 1 << 30, 0, 99)]
+    sample = sample_entries(entries, 10, VerifyStrategy.stratified, random.Random(0))
+    assert len(sample) == 10
+    assert any(e.path.startswith("big") for e in sample)
+    assert sample == sorted(sample)
+
+
+def test_parse_mismatches() -> None:
+    output = (
+        ">fcsT...... src/changed.txt\n"
+        ">f+++++++++ src/missing.txt\n"
+        ".f          src/same.txt\n"
+        "cd+++++++++ src/folder/\n"
+    )
+    assert parse_mismatches(output) == ["src/changed.txt", "src/missing.txt"]
+
+
+def test_verify_plan(tmp_path: Path, monkeypatch) -> None:
+    """Reports mismatches and only samples files not verified yet."""
+    (tmp_path / "src").mkdir()
+    for name in ("a.txt", "b.txt", "c.tmp"):
+        (tmp_path / "src" / name).write_text(name, encoding="utf-8")
+
+    fake_rsync = tmp_path / "rsync"
+    fake_rsync.write_text('#!/bin/sh\necho ">fc.T...... src/b.txt"\nexit 0\n', encoding="utf-8")
+    fake_rsync.chmod(0o755)
+
+    journal_file = tmp_path / "journal.db"
+    for name in ("append_verification", "last_full_verification", "verified_files", "save_verified"):
+        monkeypatch.setattr(_core, name, partial(getattr(journal, name), path=journal_file))
+
+    plan = PlanCfg("target", None, False, [
+        str(fake_rsync), "-a", "--exclude=*.tmp", str(tmp_path / "src"), "rsync://host:873/mod/",
+    ], verify=VerifyCfg(sample=1))
+
+    result = _core.verify_plan(plan, True, tmp_path / "verify.log")
+    assert result.full and result.checked == 2
+    assert result.mismatched == [f"{tmp_path}/src/b.txt"]
+    assert "--checksum" in (tmp_path / "verify.log").read_text(encoding="utf-8")
+
+    result = _core.verify_plan(plan, False, None)
+    assert not result.full and result.candidates == 1 and not result.ok()
+
+
+def test_verify_command_itemizes_drop_cache_plan() -> None:
+    """Drops the output format naming the files sent, which hides the itemized changes."""
+    command = ["rsync", "--out-format=%n", "--timeout=30", "-aHAX", "/data/src", "rsync://host/mod/"]
+    verify = verify_command(command, "/tmp/list", "/data/")
+    assert not any(arg.startswith("--out-format") for arg in verify)
+    assert {"--checksum", "--dry-run", "--itemize-changes"} <= set(verify)
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+
+from backupctl.utils import version
+from backupctl.utils.version import ReleaseCache, RemoteFileInfo, refresh_release_cache, \
+    version_notice
+
+
+def test_release_cache_roundtrip(tmp_path: Path) -> None:
+    """Reads back the saved cache, and an empty one when corrupted."""
+    path = tmp_path / "version.json"
+    released = datetime(2024, 5, 1, 12, 0)
+    ReleaseCache(datetime(2024, 6, 1), "1.2.0", {"1.2.0": released}).save(path)
+    cache = ReleaseCache.load(path)
+    assert (cache.latest, cache.release_times) == ("1.2.0", {"1.2.0": released})
+    assert not cache.stale(datetime(2024, 6, 1, 12))
+    assert cache.stale(datetime(2024, 6, 2))
+
+    path.write_text("{not json", encoding="utf-8")
+    assert ReleaseCache.load(path) == ReleaseCache()
+
+
+def test_refresh_keeps_releases_offline(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Records the attempt without losing the releases known so far."""
+    path = tmp_path / "version.json"
+    monkeypatch.setattr(version, "_get_all_versions", lambda: (
+        [Version("1.0.0"), Version("1.1.0")],
+        [RemoteFileInfo("backupctl-1.1.0.tar.gz", datetime(2024, 5, 1))],
+    ))
+    assert refresh_release_cache(path).latest == "1.1.0"
+
+    def offline():
+        raise OSError("Network is unreachable")
+    monkeypatch.setattr(version, "_get_all_versions", offline)
+    cache = refresh_release_cache(path)
+    assert cache.latest == "1.1.0" and cache.release_times == {"1.1.0": datetime(2024, 5, 1)}
+    assert not cache.stale(datetime.now())
+
+
+def test_version_notice_background(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Spawns a single refresh for a stale cache, and none when not interactive."""
+    path = tmp_path / "version.json"
+    spawned = []
+    monkeypatch.setattr(version.subprocess, "Popen", lambda command, **_: spawned.append(command))
+    monkeypatch.setattr(version, "_get_all_versions", lambda: pytest.fail("blocking check"))
+
+    monkeypatch.setattr(version.sys.stdout, "isatty", lambda: False, raising=False)
+    version_notice(path)
+    assert not spawned and not path.exists()
+
+    monkeypatch.setattr(version, "version_check_enabled", lambda: True)
+    ReleaseCache(datetime.now() - timedelta(days=2), "9.0.0").save(path)
+    version_notice(path)
+    version_notice(path)
+    assert len(spawned) == 1 and spawned[0][-1] == "--version"
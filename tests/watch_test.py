@@ -0,0 +1,66 @@
+import struct
+from pathlib import Path
+
+from backupctl.models.manifest import TransferMode
+from backupctl.models.plan_config import PlanCfg
+from backupctl.utils.filters import ExcludeFilter
+from backupctl.utils.inotify import IN_CREATE, IN_ISDIR, IN_Q_OVERFLOW, Inotify, parse_events
+from backupctl.watch._core import SourceWatcher, topmost_paths
+
+
+def test_parse_events() -> None:
+    """Decodes the inotify records with their padded names."""
+    data = struct.pack("iIII", 1, IN_CREATE | IN_ISDIR, 0, 16) + b"folder".ljust(16, b"\0")
+    data += struct.pack("iIII", -1, IN_Q_OVERFLOW, 0, 0)
+    events = parse_events(data)
+    assert [(e.wd, e.name) for e in events] == [(1, "folder"), (-1, "")]
+
+
+def test_exclude_filter() -> None:
+    """Matches basename, relative and anchored patterns, includes first."""
+    filter_ = ExcludeFilter.from_command([
+        "rsync", "--include=src/keep.tmp", "--exclude=*.tmp", "--exclude=cache/",
+        "--exclude=/data/src/build/***", "/data/src", "rsync://host:873/mod/",
+    ])
+    assert filter_.excluded("src/a.tmp", "/data/src/a.tmp")
+    assert not filter_.excluded("src/keep.tmp", "/data/src/keep.tmp")
+    assert filter_.excluded("src/x/cache", "/data/src/x/cache")
+    assert filter_.excluded("src/build/out", "/data/src/build/out")
+    assert not filter_.excluded("src/main.c", "/data/src/main.c")
+
+
+def test_topmost_paths() -> None:
+    assert topmost_paths({"a/b", "a/b/c", "a/bc", "d"}) == ["a/b", "a/bc", "d"]
+
+
+def test_source_watcher(tmp_path: Path) -> None:
+    """Collects the changed paths, watching new folders and skipping excludes."""
+    (tmp_path / "src" / "sub").mkdir(parents=True)
+    plan = PlanCfg("target", None, False, [
+        "rsync", "-a", "--delete", "--exclude=*.tmp", str(tmp_path / "src"),
+        "rsync://host:873/mod/",
+    ])
+
+    with Inotify() as inotify:
+        watcher = SourceWatcher(plan, inotify)
+        watcher.watch_all()
+        assert sorted(watcher.watches.values()) == ["src", "src/sub"]
+
+        (tmp_path / "src" / "sub" / "a.txt").write_text("a", encoding="utf-8")
+        (tmp_path / "src" / "b.tmp").write_text("b", encoding="utf-8")
+        (tmp_path / "src" / "new").mkdir()
+        watcher.handle(inotify.read_events(1))
+        (tmp_path / "src" / "new" / "c.txt").write_text("c", encoding="utf-8")
+        watcher.handle(inotify.read_events(1))
+
+        scan = watcher.take()
+        assert scan.mode is TransferMode.incremental and scan.recursive
+        assert scan.base == f"{tmp_path}/"
+        assert scan.changed == ["src/new", "src/sub/a.txt"]
+
+        (tmp_path / "src" / "sub" / "a.txt").unlink()
+        watcher.handle(inotify.read_events(1))
+        assert watcher.take().changed == ["src/sub"]
+
+        watcher.handle(parse_events(struct.pack("iIII", -1, IN_Q_OVERFLOW, 0, 0)))
+        assert watcher.dirty.rewatch and watcher.take() is None